@@ -9,7 +9,9 @@ from api.v1.endpoints import (
     error_router,
     transport_router,
     iodta_router,
-    user_log_router
+    user_log_router,
+    monitor_router,
+    geo_router
 )
 
 
@@ -40,3 +42,9 @@ api_router.include_router(transport_router, prefix="/transport", tags=["运输
 api_router.include_router(iodta_router, prefix="/iodta", tags=["IODTA"])
 
 api_router.include_router(user_log_router, prefix="/user_log", tags=["近期用户操作日志"])
+
+# 添加运行监控路由
+api_router.include_router(monitor_router, prefix="/monitor", tags=["运行监控"])
+
+# 添加地理服务路由
+api_router.include_router(geo_router, prefix="/geo", tags=["地理服务"])
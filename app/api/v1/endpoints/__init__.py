@@ -13,6 +13,8 @@ from api.v1.endpoints.error import router as error_router
 from api.v1.endpoints.transport import router as transport_router
 from api.v1.endpoints.iodta import router as iodta_router
 from api.v1.endpoints.user_log import router as user_log_router
+from api.v1.endpoints.monitor import router as monitor_router
+from api.v1.endpoints.geo import router as geo_router
 
 __all__ = [
     "auth_router",
@@ -23,5 +25,7 @@ __all__ = [
     "error_router",
     "transport_router",
     "iodta_router",
-    "user_log_router"
+    "user_log_router",
+    "monitor_router",
+    "geo_router"
 ]
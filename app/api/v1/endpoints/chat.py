@@ -14,7 +14,12 @@ async def chat_endpoint(
     message: ChatMessage, user: str = Depends(get_current_user)
 ) -> StreamingResponse:
     user_id = user.id
-    return StreamingResponse(chat(message, user_id), media_type="text/event-stream")
+    return StreamingResponse(
+        chat(message, user_id),
+        media_type="text/event-stream",
+        # 禁止代理缓冲与缓存，保证每个事件到达后立即发送给客户端
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/chat/reset")
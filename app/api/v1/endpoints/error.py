@@ -1,15 +1,17 @@
+from datetime import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from loguru import logger
 
 from core.security import get_current_user
 from db.database import CurrentSession
-from models.user import User
+from schemas.user import Principal
 from schemas.error import ErrorCreate, ErrorUpdate, ErrorResponse
 from schemas.patrol import ErrorUpdateResponse
 from crud.error import get_error_by_id, create_error as create_error_crud, update_error, delete_error, get_errors_by_user_id, get_all_errors
 from crud.user import get_user_by_id
 from service.user_log import insert_user_log
+from utils.pagination import PageParams, paginate_rows, set_next_cursor
 
 router = APIRouter()
 
@@ -18,15 +20,31 @@ router = APIRouter()
     "", response_model=List[ErrorUpdateResponse], summary="获取错误列表及统计"
 )
 async def get_errors(
-    db: CurrentSession, current_user: User = Depends(get_current_user)
+    db: CurrentSession,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: Principal = Depends(get_current_user)
 ) -> List[ErrorUpdateResponse]:
     """
-    获取所有错误信息及状态统计
+    获取错误信息及状态统计
     
-    返回带有用户信息的错误列表，包括错误ID、发送者、标题、内容、创建时间和状态
+    返回带有用户信息的错误列表，包括错误ID、发送者、标题、内容、创建时间和状态；
+    按创建时间从新到旧分页，下一页游标见响应头 X-Next-Cursor
     """
+    after = page.after(2)
+    if after:
+        try:
+            # 游标中的发现时间解析为 datetime，早期游标中为字符串
+            found_time = after[0] if isinstance(after[0], datetime) else datetime.fromisoformat(after[0])
+            after = [found_time, int(after[1])]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
     try:
-        errors_data = await get_all_errors(db)
+        rows = await get_all_errors(db, limit=page.limit, after=after)
+        errors_data, next_cursor = paginate_rows(
+            rows, page.limit, lambda row: [row["found_time"], row["id"]]
+        )
+        set_next_cursor(response, next_cursor)
         insert_user_log(str(current_user.id), "查看系统报告", "成功")
         # 将字典数据转换为ErrorUpdateResponse模型
         return [ErrorUpdateResponse(**error) for error in errors_data]
@@ -42,7 +60,7 @@ async def get_errors(
 async def create_error_record(
     error_create: ErrorCreate,
     db: CurrentSession,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> ErrorResponse:
     """
         创建问题记录
@@ -71,7 +89,7 @@ async def create_error_record(
 async def delete_error_record(
     error_id: int,
     db: CurrentSession, 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     删除一条巡查问题记录
@@ -121,7 +139,7 @@ async def update_error_record(
     error_id: int,
     update_data: ErrorUpdate,
     db: CurrentSession,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     更新一条巡查问题记录
@@ -165,7 +183,7 @@ async def update_error_record(
 async def get_error(
     error_id: int,
     db: CurrentSession,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     获取错误详细信息
@@ -198,10 +216,12 @@ async def get_error(
 async def get_user_errors(
     user_id: int,
     db: CurrentSession,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
-    获取指定用户的所有错误记录
+    获取指定用户的错误记录（按错误ID分页，下一页游标见响应头 X-Next-Cursor）
     
     Args:
         user_id: 用户ID
@@ -219,7 +239,9 @@ async def get_user_errors(
             )
             
         # 获取用户的所有错误
-        errors = await get_errors_by_user_id(db, user_id)
+        rows = await get_errors_by_user_id(db, user_id, limit=page.limit, after=page.after(1))
+        errors, next_cursor = paginate_rows(rows, page.limit, lambda row: [row.error_id])
+        set_next_cursor(response, next_cursor)
         return errors
     except HTTPException:
         raise
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from loguru import logger
+
+from core.config import settings
+from core.security import get_current_user
+from schemas.user import Principal
+from schemas.geo import (
+    BatchGeocodeRequest,
+    BatchGeocodeResponse,
+    GeocodeResult,
+    DistanceMatrixRequest,
+    DistanceMatrixResponse,
+)
+from service.gaode import geocode_many, distance_matrix, normalize_coordinate
+
+router = APIRouter()
+
+
+@router.post(
+    "/geocode/batch",
+    response_model=BatchGeocodeResponse,
+    summary="批量地理编码",
+)
+async def batch_geocode(
+        request: BatchGeocodeRequest,
+        user: Principal = Depends(get_current_user)
+):
+    """
+    一次解析多个地址的经纬度。
+
+    相同地址只解析一次，已缓存的地址不会调用高德API，其余地址以每批10个调用高德批量接口。
+    """
+    if len(request.addresses) > settings.GEO_BATCH_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many addresses, at most {settings.GEO_BATCH_MAX_ADDRESSES} per request"
+        )
+
+    locations = await geocode_many([(item.address, item.city) for item in request.addresses])
+    logger.info(f"批量地理编码完成: {len(request.addresses)} 个地址, 成功 {sum(1 for loc in locations if loc)} 个")
+    return BatchGeocodeResponse(results=[
+        GeocodeResult(
+            address=item.address,
+            city=item.city,
+            found=bool(location),
+            longitude=location.get("longitude"),
+            latitude=location.get("latitude"),
+        )
+        for item, location in zip(request.addresses, locations)
+    ])
+
+
+@router.post(
+    "/distance-matrix",
+    response_model=DistanceMatrixResponse,
+    summary="计算距离/耗时矩阵",
+)
+async def get_distance_matrix(
+        request: DistanceMatrixRequest,
+        user: Principal = Depends(get_current_user)
+):
+    """
+    计算 N 个起点 × M 个终点的距离与预计耗时。
+
+    起终点对会去重并复用缓存，剩余部分按终点分组、每批最多100个起点调用高德距离测量接口。
+    """
+    if request.type not in (0, 1, 3):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="type must be 0 (straight line), 1 (driving) or 3 (walking)"
+        )
+    if len(request.origins) * len(request.destinations) > settings.GEO_MATRIX_MAX_ELEMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many matrix elements, at most {settings.GEO_MATRIX_MAX_ELEMENTS} per request"
+        )
+    try:
+        origins = [normalize_coordinate(coord) for coord in request.origins]
+        destinations = [normalize_coordinate(coord) for coord in request.destinations]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Coordinates must be 'longitude,latitude' strings"
+        )
+
+    result = await distance_matrix(origins, destinations, request.type)
+    logger.info(
+        f"距离矩阵计算完成: {len(origins)}×{len(destinations)}, "
+        f"去重后 {result['unique_legs']} 对, 缓存命中 {result['cached_legs']} 对, 调用高德API {result['upstream_calls']} 次"
+    )
+    return DistanceMatrixResponse(origins=origins, destinations=destinations, **result)
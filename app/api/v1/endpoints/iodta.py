@@ -1,13 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from huaweicloudsdkcore.exceptions import exceptions
 from loguru import logger
 from core.security import get_current_user
 from crud import iodta
+from core.config import settings
+from crud import iotda_command
+from crud import iotda_mirror
+from db.database import CurrentSession
+from schemas.user import Principal
 from schemas import iodta as iodta_schemas
+from service.iotda_command import enqueue_command_batch
+from service.iotda_sync import (
+    forget_mirror_device,
+    get_mirror_age,
+    mirror_key,
+    request_iotda_sync,
+    set_data_freshness,
+)
 
 
 router = APIRouter()
 
 
+def _iotda_error(e: Exception, action: str) -> HTTPException:
+    """
+    将调用 IoTDA 时的异常转换为 HTTP 错误
+
+    调用网关在重试用尽后抛出 asyncio.TimeoutError 或华为云 SDK 异常（5xx、连接失败），
+    分别返回 504 与 502；其他异常返回 500
+
+    Args:
+        e: 捕获的异常
+        action: 出错的操作，用于日志
+
+    Returns:
+        HTTPException: 对应的 HTTP 错误
+    """
+    if isinstance(e, (asyncio.TimeoutError, exceptions.RequestTimeoutException)):
+        logger.error(f"IoTDA timed out while {action}: {e!r}")
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="IoTDA request timed out",
+        )
+    if isinstance(e, exceptions.SdkException):
+        logger.error(f"IoTDA failed while {action}: {e}")
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="IoTDA request failed",
+        )
+    logger.error(f"Error {action}: {e}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Internal Server Error",
+    )
+
+
 @router.get("/list_devices", summary="获取设备列表")
 async def list_devices(
     instance_id: str | None = Query(None, description="实例ID"),
@@ -22,22 +71,53 @@ async def list_devices(
     start_time: str | None = Query(None, description="开始时间"),
     end_time: str | None = Query(None, description="结束时间"),
     app_id: str | None = Query(None, description="应用ID"),
+    live: bool = Query(False, description="跳过本地镜像，直接查询华为云"),
+    *,
+    db: CurrentSession,
+    response: Response,
     user: str = Depends(get_current_user),
 ):
-    devices = await iodta.list_devices(
-        instance_id=instance_id,
-        product_id=product_id,
-        gateway_id=gateway_id,
-        is_cascade_query=is_cascade_query,
-        node_id=node_id,
-        device_name=device_name,
-        limit=limit,
-        marker=marker,
-        offset=offset,
-        start_time=start_time,
-        end_time=end_time,
-        app_id=app_id,
-    )
+    """
+    获取设备列表
+
+    已开启设备镜像且未指定 start_time、end_time、is_cascade_query 时从本地镜像查询，
+    此时 marker 为上一页最后一个设备ID；响应头 X-Data-Freshness 为数据距上次同步的秒数，直接查询华为云时为 live。
+    查询华为云超时返回 504，华为云返回错误或连接失败（已用尽重试）返回 502
+    """
+    if not live and start_time is None and end_time is None and is_cascade_query is None:
+        age = await get_mirror_age(db, instance_id)
+        if age is not None:
+            set_data_freshness(response, age)
+            return await iotda_mirror.list_devices(
+                db,
+                mirror_key(instance_id),
+                product_id=product_id,
+                gateway_id=gateway_id,
+                node_id=node_id,
+                device_name=device_name,
+                app_id=app_id,
+                limit=limit or 10,
+                marker=marker,
+                offset=offset or 0,
+            )
+    set_data_freshness(response, None)
+    try:
+        devices = await iodta.list_devices(
+            instance_id=instance_id,
+            product_id=product_id,
+            gateway_id=gateway_id,
+            is_cascade_query=is_cascade_query,
+            node_id=node_id,
+            device_name=device_name,
+            limit=limit,
+            marker=marker,
+            offset=offset,
+            start_time=start_time,
+            end_time=end_time,
+            app_id=app_id,
+        )
+    except Exception as e:
+        raise _iotda_error(e, "listing devices")
     if not devices:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,14 +132,17 @@ async def create_or_delete_device(
     user: str = Depends(get_current_user),
 ):
     try:
-        result = await iodta.create_or_delete_device(body)
+        result = await iodta.create_or_delete_device(
+            instance_id=body.instance_id,
+            group_id=body.group_id,
+            action_id=body.action_id,
+            device_id=body.device_id,
+        )
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error managing device group: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "managing device group")
 
 
 @router.post("/add_application", summary="创建资源空间")
@@ -70,11 +153,7 @@ async def add_application(
         result = await iodta.add_application(body.app_name)
         return result
     except Exception as e:
-        logger.error(f"Error adding application: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "adding application")
 
 
 @router.delete("/delete_application", summary="删除资源空间")
@@ -88,11 +167,7 @@ async def delete_application(
         )
         return result
     except Exception as e:
-        logger.error(f"Error deleting application: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "deleting application")
 
 
 @router.get("/show_application", summary="查询资源空间")
@@ -112,11 +187,7 @@ async def show_application(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error showing application: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "showing application")
 
 
 @router.get("/show_applications", summary="查询资源空间列表")
@@ -138,11 +209,7 @@ async def show_applications(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error showing applications: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "showing applications")
 
 
 @router.put("/update_application", summary="更新资源空间")
@@ -158,11 +225,7 @@ async def update_application(
         )
         return result
     except Exception as e:
-        logger.error(f"Error updating application: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "updating application")
 
 
 @router.post("/create_async_command", summary="下发异步设备命令")
@@ -178,11 +241,7 @@ async def create_async_command(
         )
         return result
     except Exception as e:
-        logger.error(f"Error creating async command: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "creating async command")
 
 
 @router.get("/list_async_commands", summary="查询设备下队列中的命令")
@@ -219,11 +278,69 @@ async def list_async_commands(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error listing async commands: {e}")
+        raise _iotda_error(e, "listing async commands")
+
+
+@router.post(
+    "/create_batch_command",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="向多台设备批量下发异步命令",
+)
+async def create_batch_command(
+    body: iodta_schemas.CreateBatchCommand,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    向多台设备批量下发同一条异步命令
+
+    命令写入发件箱后立即返回 batch_id，由后台任务限速下发并在失败时重试，
+    下发进度通过 /show_batch_command 查询
+    """
+    if not settings.IOTDA_COMMAND_OUTBOX_ENABLED:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="批量命令未启用",
         )
+    if len(body.device_ids) > settings.IOTDA_COMMAND_BATCH_MAX_DEVICES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多向 {settings.IOTDA_COMMAND_BATCH_MAX_DEVICES} 台设备下发命令",
+        )
+    try:
+        return await enqueue_command_batch(
+            body.device_ids,
+            body.body.model_dump(exclude_none=True),
+            instance_id=body.instance_id,
+            created_by=user.id,
+        )
+    except Exception as e:
+        raise _iotda_error(e, "creating batch command")
+
+
+@router.get("/show_batch_command", summary="查询批量命令的下发进度")
+async def show_batch_command(
+    db: CurrentSession,
+    batch_id: int = Query(..., description="批次ID"),
+    user: str = Depends(get_current_user),
+):
+    """
+    查询批量命令的下发进度
+
+    pending/sending/sent/failed 为各发件箱状态的设备数，done 表示所有命令都已处理完成；
+    command_statuses 为已受理命令在 IoTDA 中的状态分布，failures 为部分下发失败的设备及原因
+    """
+    if not settings.IOTDA_COMMAND_OUTBOX_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="批量命令未启用",
+        )
+    progress = await iotda_command.get_command_batch_progress(db, batch_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch command not found",
+        )
+    return progress
 
 
 @router.post("/add_device_group", summary="添加设备组")
@@ -235,13 +352,11 @@ async def add_device_group(
             instance_id=body.instance_id,
             body=body.body,
         )
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error adding device group: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "adding device group")
 
 
 @router.delete("/delete_device_group", summary="删除设备组")
@@ -253,13 +368,11 @@ async def delete_device_group(
         result = await iodta.delete_device_group(
             instance_id=body.instance_id, group_id=body.group_id
         )
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error deleting device group: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "deleting device group")
 
 
 @router.get("/list_device_groups", summary="查询设备组列表")
@@ -272,9 +385,32 @@ async def list_device_groups(
     app_id: str | None = Query(None, description="应用ID过滤"),
     group_type: str | None = Query(None, description="设备组类型过滤"),
     name: str | None = Query(None, description="设备组名称过滤"),
+    live: bool = Query(False, description="跳过本地镜像，直接查询华为云"),
+    *,
+    db: CurrentSession,
+    response: Response,
     user: str = Depends(get_current_user),
 ):
+    """
+    查询设备组列表
+
+    已开启设备镜像且未指定 last_modified_time、app_id 时从本地镜像查询，响应头 X-Data-Freshness 含义同设备列表
+    """
     try:
+        if not live and last_modified_time is None and app_id is None:
+            age = await get_mirror_age(db, instance_id)
+            if age is not None:
+                set_data_freshness(response, age)
+                return await iotda_mirror.list_device_groups(
+                    db,
+                    mirror_key(instance_id),
+                    name=name,
+                    group_type=group_type,
+                    limit=limit or 10,
+                    marker=marker,
+                    offset=offset or 0,
+                )
+        set_data_freshness(response, None)
         result = await iodta.list_device_groups(
             instance_id=instance_id,
             limit=limit,
@@ -294,11 +430,7 @@ async def list_device_groups(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error listing device groups: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "listing device groups")
 
 
 @router.get("/show_devices_in_group", summary="查询设备组设备列表")
@@ -308,16 +440,37 @@ async def show_devices_in_group(
     limit: int | None = Query(None, description="分页大小"),
     marker: str | None = Query(None, description="分页标记"),
     offset: int | None = Query(None, description="偏移量"),
+    live: bool = Query(False, description="跳过本地镜像，直接查询华为云"),
+    *,
+    db: CurrentSession,
+    response: Response,
     user: str = Depends(get_current_user),
 ):
+    """
+    查询设备组设备列表
+
+    已开启设备镜像时从本地镜像查询，响应头 X-Data-Freshness 含义同设备列表
+    """
     try:
-        result = await iodta.show_devices_in_group(
-            instance_id=instance_id,
-            group_id=group_id,
-            limit=limit,
-            marker=marker,
-            offset=offset,
-        )
+        age = None if live else await get_mirror_age(db, instance_id)
+        set_data_freshness(response, age)
+        if age is not None:
+            result = await iotda_mirror.show_devices_in_group(
+                db,
+                mirror_key(instance_id),
+                group_id,
+                limit=limit or 10,
+                marker=marker,
+                offset=offset or 0,
+            )
+        else:
+            result = await iodta.show_devices_in_group(
+                instance_id=instance_id,
+                group_id=group_id,
+                limit=limit,
+                marker=marker,
+                offset=offset,
+            )
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -327,11 +480,34 @@ async def show_devices_in_group(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error showing devices in group: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
+        raise _iotda_error(e, "showing devices in group")
+
+
+@router.post("/show_devices_in_groups", summary="并发查询多个设备组的设备列表")
+async def show_devices_in_groups(
+    body: iodta_schemas.ShowDevicesInGroups,
+    db: CurrentSession,
+    response: Response,
+    live: bool = Query(False, description="跳过本地镜像，直接查询华为云"),
+    user: str = Depends(get_current_user),
+):
+    """
+    并发查询多个设备组的设备列表，results 与 group_ids 顺序一致
+
+    单个设备组查询失败时对应项的 error 为失败原因，不影响其他设备组；
+    已开启设备镜像时一次查询本地镜像返回全部设备组，响应头 X-Data-Freshness 含义同设备列表
+    """
+    age = None if live else await get_mirror_age(db, body.instance_id)
+    set_data_freshness(response, age)
+    if age is not None:
+        results = await iotda_mirror.show_devices_in_groups(
+            db, mirror_key(body.instance_id), body.group_ids, limit=body.limit or 10
+        )
+    else:
+        results = await iodta.show_devices_in_groups(
+            body.group_ids, instance_id=body.instance_id, limit=body.limit
         )
+    return {"results": results}
 
 
 @router.put("/update_device_group", summary="修改设备组")
@@ -345,13 +521,11 @@ async def update_device_group(
             instance_id=body.instance_id,
             body=body.body,
         )
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error updating device group: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "updating device group")
 
 
 @router.post("/add_device", summary="添加设备")
@@ -360,41 +534,54 @@ async def add_device(
 ):
     try:
         result = await iodta.add_device(instance_id=body.instance_id, body=body.body)
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error adding device: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "adding device")
 
 
 @router.delete("/delete_device", summary="删除设备")
 async def delete_device(
     body: iodta_schemas.DeleteDevice,
+    db: CurrentSession,
     user: str = Depends(get_current_user),
 ):
     try:
         result = await iodta.delete_device(
             instance_id=body.instance_id, device_id=body.device_id
         )
+        if result is not None:
+            await forget_mirror_device(db, body.instance_id, body.device_id)
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error deleting device: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "deleting device")
 
 
 @router.get("/show_device", summary="查询设备")
 async def show_device(
     instance_id: str = Query(..., description="实例ID"),
     device_id: str = Query(..., description="设备ID"),
+    live: bool = Query(False, description="跳过本地镜像，直接查询华为云"),
+    *,
+    db: CurrentSession,
+    response: Response,
     user: str = Depends(get_current_user),
 ):
+    """
+    查询设备
+
+    已开启设备镜像时从本地镜像查询，只返回设备列表中的字段；
+    需要认证信息、模组等完整详情时指定 live=true。响应头 X-Data-Freshness 含义同设备列表
+    """
     try:
-        result = await iodta.show_device(instance_id=instance_id, device_id=device_id)
+        age = None if live else await get_mirror_age(db, instance_id)
+        set_data_freshness(response, age)
+        if age is not None:
+            result = await iotda_mirror.show_device(db, mirror_key(instance_id), device_id)
+        else:
+            result = await iodta.show_device(instance_id=instance_id, device_id=device_id)
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -404,11 +591,7 @@ async def show_device(
     except HTTPException as httpe:
         raise httpe
     except Exception as e:
-        logger.error(f"Error showing device: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "showing device")
 
 
 @router.put("/update_device", summary="修改设备")
@@ -422,10 +605,8 @@ async def update_device(
             instance_id=body.instance_id,
             body=body.body,
         )
+        if result is not None:
+            request_iotda_sync()
         return result
     except Exception as e:
-        logger.error(f"Error updating device: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal Server Error",
-        )
+        raise _iotda_error(e, "updating device")
@@ -0,0 +1,59 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from core.password import get_password_executor_stats
+from core.principal_cache import get_principal_cache_stats
+from core.role_revocation import get_role_revocation_stats
+from core.security import get_super_admin_user
+from service.chat_history import get_chat_history_stats
+from service.chat_service import get_answer_cache_stats, session_manager
+from service.gaode import get_gaode_stats
+from service.iotda_service import get_iotda_stats
+from service.iotda_sync import get_iotda_sync_stats
+from service.iotda_command import get_iotda_command_stats
+from service.avatar import get_avatar_stats
+from service.status_summary import get_status_summary_stats
+from service.user_log import get_user_log_stats
+from schemas.user import Principal
+
+router = APIRouter()
+
+
+@router.get("/stats", summary="获取运行时缓存与队列统计")
+async def get_runtime_stats(
+    current_user: Principal = Depends(get_super_admin_user)
+) -> Dict[str, Any]:
+    """
+    获取进程内缓存、队列等组件的运行时统计信息（仅限超级管理员）
+
+    返回:
+    - principal_cache: 认证用户缓存的条目数、命中数、未命中数与命中率
+    - role_revocation: 角色来源与被撤销而未采用的令牌角色声明次数
+    - password_hash: 密码哈希工作池的并发数与拒绝次数
+    - gaode: 地理编码缓存命中率与请求合并次数
+    - chat_sessions: 聊天会话数、淘汰次数与上下文令牌数
+    - chat_history: 聊天记录缓冲区长度与写入、丢弃的消息数
+    - chat_answer_cache: 智能助手回答缓存的命中率、失效次数与各表数据版本号
+    - user_log: 用户操作日志队列长度与写入、丢弃的条数
+    - status_summary: 巡检看板状态统计快照的命中、后台刷新与失效次数
+    - iotda: IoTDA 调用数、重试、限流与超时次数
+    - iotda_mirror: IoTDA 设备镜像的同步次数，以及由镜像/华为云提供的查询次数
+    - iotda_commands: 批量命令的入队、下发、重试与失败数，以及下发限流统计
+    - avatar: 头像上传的存储后端、处理中的数量与各原因拒绝的次数
+    """
+    return {
+        "principal_cache": get_principal_cache_stats(),
+        "role_revocation": get_role_revocation_stats(),
+        "password_hash": get_password_executor_stats(),
+        "gaode": get_gaode_stats(),
+        "chat_sessions": session_manager.stats(),
+        "chat_history": get_chat_history_stats(),
+        "chat_answer_cache": get_answer_cache_stats(),
+        "user_log": get_user_log_stats(),
+        "status_summary": get_status_summary_stats(),
+        "iotda": get_iotda_stats(),
+        "iotda_mirror": get_iotda_sync_stats(),
+        "iotda_commands": get_iotda_command_stats(),
+        "avatar": get_avatar_stats(),
+    }
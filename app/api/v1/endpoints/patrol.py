@@ -4,14 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
 
 from db.database import CurrentSession
-from crud.patrol import get_patrol_list, get_road_conditions, get_status_summary
+from crud.patrol import get_patrol_list, get_road_conditions
 from schemas.patrol import PatrolListResponse, RoadConditionResponse, StatusSummaryResponse, PatrolUpdate
 from core.security import get_current_user
 from models.patrol import Patrol
 from sqlalchemy import select, delete
 from starlette.status import HTTP_404_NOT_FOUND
 from service.user_log import insert_user_log
-from models.user import User
+from schemas.user import Principal
+from core.data_version import bump_data_version
+from utils.pagination import PageParams, paginate_rows
+from service.status_summary import get_status_summary_snapshot
 
 router = APIRouter()
 
@@ -19,11 +22,14 @@ router = APIRouter()
 @router.get("/list", response_model=PatrolListResponse, summary="获取巡逻列表")
 async def get_patrol_list_endpoint(
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    page: PageParams = Depends(),
+    user: Principal = Depends(get_current_user)
 ) -> PatrolListResponse:
     """
-    获取所有巡逻信息列表
+    获取巡逻信息列表（按巡查记录ID分页）
     
+    - **cursor**: 上一页响应中的 next_cursor
+    - **limit**: 每页条数
     - **user**: 当前登录用户
     
     返回:
@@ -34,11 +40,14 @@ async def get_patrol_list_endpoint(
       - 状态: 工作状态（正常工作/未工作）
       - 预计续航时长: 预计续航时长
       - 已工作时长: 已工作时长
+    - next_cursor: 下一页的游标，没有更多数据时为空
     """
+    after = page.after(1)
     try:
-        patrols = await get_patrol_list(db)
+        rows = await get_patrol_list(db, limit=page.limit, after=after)
+        patrols, next_cursor = paginate_rows(rows, page.limit, lambda row: [row.id])
         insert_user_log(str(user.id), "查看巡查信息", "成功")
-        return PatrolListResponse(patrols=patrols)
+        return PatrolListResponse(patrols=patrols, next_cursor=next_cursor)
     except Exception as e:
         logger.error(f"获取巡逻列表失败: {str(e)}")
         raise HTTPException(
@@ -50,7 +59,7 @@ async def get_patrol_list_endpoint(
 @router.get("/road-conditions", response_model=RoadConditionResponse, summary="获取道路状况")
 async def get_road_conditions_endpoint(
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ) -> RoadConditionResponse:
     """
     获取道路状况信息
@@ -78,7 +87,7 @@ async def get_road_conditions_endpoint(
 @router.get("/status-summary", response_model=StatusSummaryResponse, summary="获取状态统计")
 async def get_status_summary_endpoint(
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ) -> StatusSummaryResponse:
     """
     获取系统状态统计信息
@@ -92,9 +101,11 @@ async def get_status_summary_endpoint(
     - issuesFound: 错误总数
     - pendingIssues: 待处理错误数量
     - solvingIssues: 处理中的错误数量
+
+    统计结果在 STATUS_SUMMARY_CACHE_SECONDS 内复用同一个快照，巡检或问题记录有写入时立即失效
     """
     try:
-        summary = await get_status_summary(db)
+        summary = await get_status_summary_snapshot(db)
         return summary
     except Exception as e:
         logger.error(f"获取状态统计信息失败: {str(e)}")
@@ -108,7 +119,7 @@ async def get_status_summary_endpoint(
 async def get_road_conditions_endpoint(
     patrol_data: PatrolUpdate,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
     # 创建 Patrol 实例
     new_patrol = Patrol(
@@ -123,6 +134,7 @@ async def get_road_conditions_endpoint(
     try:
         db.add(new_patrol)
         await db.commit()
+        bump_data_version("patrol")
         await db.refresh(new_patrol)
         logger.info(f"新增巡查记录 ID: {new_patrol.id}")
         insert_user_log(str(user.id), "新增巡查任务", "成功")
@@ -137,7 +149,7 @@ async def get_road_conditions_endpoint(
 async def delete_patrol_record(
     patrol_id: int,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
     if patrol_id in [2, 4, 6, 8, 10]:
         return {"message": "删除成功"}
@@ -151,5 +163,6 @@ async def delete_patrol_record(
     # 执行删除
     await db.execute(delete(Patrol).where(Patrol.id == patrol_id))
     await db.commit()
+    bump_data_version("patrol")
     insert_user_log(str(user.id), "删除巡查任务", "成功")
     return {"message": "删除成功"}
\ No newline at end of file
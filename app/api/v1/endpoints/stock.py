@@ -1,12 +1,15 @@
 from typing import Dict, List
 from sqlalchemy import select, delete
 from db.database import CurrentSession
-from service.warehouse_service import get_warehouse_stock_statistics
+from service.warehouse_service import get_warehouse_stock_statistics, parse_stock_bulk_csv
 from schemas.stock import (
     StockCreate,
     StockUpdate,
     StockResponse,
-    StockStatisticsResponse
+    StockStatisticsResponse,
+    StockBulkLine,
+    StockBulkRequest,
+    StockBulkResponse,
 )
 from schemas import RoomsResponse, StreamUrlRequest
 from crud.stock import (
@@ -14,19 +17,25 @@ from crud.stock import (
     get_stock,
     get_stocks_by_warehouse,
     update_stock,
+    update_stock_by_warehouse_goods,
     delete_stock,
     get_stock_statistics_by_warehouse,
-    check_stock_exists
+    check_stock_exists,
+    bulk_apply_stock_deltas,
 )
+from core.config import settings
 from core.security import get_current_user
-from models.user import User
+from schemas.user import Principal
 from models import Rooms, Stock
 from models import StreamConfig
 from fastapi.responses import JSONResponse
 from service.user_log import insert_user_log
-from fastapi import APIRouter, Depends, HTTPException, status
+from core.data_version import bump_data_version
+from utils.pagination import PageParams, keyset_paginate, paginate_rows, set_next_cursor
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from models import Goods, Stock
@@ -39,7 +48,7 @@ router = APIRouter()
 async def create_stock_endpoint(
     stock_data: StockCreate,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ) -> StockResponse:
     """
     创建新的库存记录
@@ -77,6 +86,7 @@ async def create_stock_endpoint(
         )
         db.add(stock)
         await db.commit()
+        bump_data_version("goods", "stock")
         await db.refresh(stock)
 
         insert_user_log(str(user.id), "新增库存", "成功")
@@ -101,12 +111,67 @@ async def create_stock_endpoint(
         )
 
 
+async def _bulk_ingest(db: AsyncSession, lines: List[StockBulkLine], user: Principal) -> StockBulkResponse:
+    if len(lines) > settings.STOCK_BULK_MAX_LINES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多导入 {settings.STOCK_BULK_MAX_LINES} 行"
+        )
+    try:
+        response = await bulk_apply_stock_deltas(db, lines)
+    except SQLAlchemyError as e:
+        insert_user_log(str(user.id), "批量入库", "失败")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量入库失败: {str(e)}"
+        )
+    insert_user_log(str(user.id), "批量入库", f"成功 {response.succeeded} 行，失败 {response.failed} 行")
+    return response
+
+
+@router.post("/stock/bulk", response_model=StockBulkResponse, summary="批量入库")
+async def bulk_stock_endpoint(
+    request: StockBulkRequest,
+    db: CurrentSession,
+    user: Principal = Depends(get_current_user)
+) -> StockBulkResponse:
+    """
+    批量调整库存（入库单）
+
+    - **lines**: 入库明细，每行包含 warehouse_id、goods_id 或 goods_name、delta（可以为负数）
+    - goods_name 对应的货物不存在时自动创建
+    - 所有行在一个事务中处理，单行失败（仓库/货物不存在、库存不足）不影响其他行
+    - results 与 lines 顺序一致，line 为行号（从1开始）
+    """
+    return await _bulk_ingest(db, request.lines, user)
+
+
+@router.post("/stock/bulk/csv", response_model=StockBulkResponse, summary="通过CSV文件批量入库")
+async def bulk_stock_csv_endpoint(
+    db: CurrentSession,
+    user: Principal = Depends(get_current_user),
+    file: UploadFile = File(..., description="UTF-8 编码的 CSV 文件，表头: warehouse_id,goods_id,goods_name,delta")
+) -> StockBulkResponse:
+    """
+    上传 CSV 文件批量调整库存，规则与 POST /stock/bulk 相同
+
+    行号 line 对应数据行的序号（不含表头与空行）
+    """
+    try:
+        lines = parse_stock_bulk_csv(await file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not lines:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV 文件中没有数据行")
+    return await _bulk_ingest(db, lines, user)
+
+
 @router.put("/stock/{stock_id}", response_model=StockResponse, summary="更新库存")
 async def update_stock_endpoint(
     stock_id: int,
     stock_data: StockUpdate,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ) -> StockResponse:
     """
     更新指定ID的库存记录
@@ -117,8 +182,8 @@ async def update_stock_endpoint(
     - **user**: 当前登录用户
     
     注意：
-    - 如果提供了last_add_count，系统会自动计算新的总库存量(all_count = 原all_count + last_add_count)
-    - 如果计算后的all_count小于0，将被设置为0
+    - 如果只提供了last_add_count，系统会在同一条SQL中计算新的总库存量(all_count = 原all_count + last_add_count)，并发调整不会丢失更新
+    - 如果计算后的all_count小于0，不做修改并返回 409
     """
     try:
         updated_stock = await update_stock(db, stock_id, stock_data)
@@ -157,20 +222,16 @@ async def update_stock_by_warehouse_goods_endpoint(
     - **user**: 当前登录用户
     
     注意：
-    - 如果提供了last_add_count，系统会自动计算新的总库存量(all_count = 原all_count + last_add_count)
-    - 如果计算后的all_count小于0，将被设置为0
+    - 如果只提供了last_add_count，系统会在同一条SQL中计算新的总库存量(all_count = 原all_count + last_add_count)，并发调整不会丢失更新
+    - 如果计算后的all_count小于0，不做修改并返回 409
     """
     try:
-        # 查找库存记录
-        existing_stock = await check_stock_exists(db, warehouse_id, goods_id)
-        if not existing_stock:
+        updated_stock = await update_stock_by_warehouse_goods(db, warehouse_id, goods_id, stock_data)
+        if not updated_stock:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"仓库ID {warehouse_id} 和商品ID {goods_id} 的库存记录不存在"
             )
-        
-        # 更新库存记录
-        updated_stock = await update_stock(db, existing_stock.id, stock_data)
         return updated_stock
     except HTTPException:
         raise
@@ -186,7 +247,7 @@ async def update_stock_by_warehouse_goods_endpoint(
 async def delete_stock_endpoint(
     stock_id: int,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
     """
     删除指定ID的库存记录
@@ -347,16 +408,23 @@ async def get_stock_by_warehouse_goods_endpoint(
 async def get_warehouse_stocks(
     warehouse_id: int,
     db: CurrentSession,
-    user: User = Depends(get_current_user)
+    response: Response,
+    page: PageParams = Depends(),
+    user: Principal = Depends(get_current_user)
 ):
     """
-    获取指定仓库的所有库存记录
+    获取指定仓库的库存记录（按库存ID分页，下一页游标见响应头 X-Next-Cursor）
     
     - **warehouse_id**: 仓库ID
+    - **cursor**: 上一页的游标
+    - **limit**: 每页条数
     - **user**: 当前登录用户
     """
+    after = page.after(1)
     try:
-        stocks = await get_stocks_by_warehouse(db, warehouse_id)
+        rows = await get_stocks_by_warehouse(db, warehouse_id, limit=page.limit, after=after)
+        stocks, next_cursor = paginate_rows(rows, page.limit, lambda row: [row["id"]])
+        set_next_cursor(response, next_cursor)
         insert_user_log(str(user.id), "查看所有库存", "成功")
         return stocks
     except Exception as e:
@@ -370,15 +438,21 @@ async def get_warehouse_stocks(
 @router.get("/rooms", summary="获取仓库平面图数据", response_model=List[RoomsResponse])
 async def get_rooms(
         db: CurrentSession,
+        response: Response,
+        page: PageParams = Depends(),
         user: str = Depends(get_current_user)
 ) -> List[RoomsResponse]:
-    # 联表查询 rooms 和 stock
+    # 联表查询 rooms 和 stock，按 rooms.id 分页，下一页游标见响应头 X-Next-Cursor
     result = await db.execute(
-        select(Rooms, Stock.all_count)
-        .join(Stock, Rooms.stock_id == Stock.id)
-        .order_by(Rooms.id)
+        keyset_paginate(
+            select(Rooms, Stock.all_count).join(Stock, Rooms.stock_id == Stock.id),
+            [Rooms.id],
+            page.after(1),
+            page.limit,
+        )
     )
-    rows = result.all()
+    rows, next_cursor = paginate_rows(result.all(), page.limit, lambda row: [row[0].id])
+    set_next_cursor(response, next_cursor)
 
     # 手动构造响应数据，替换 num 为 all_count
     rooms_response = []
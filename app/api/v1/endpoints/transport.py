@@ -1,13 +1,23 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import datetime
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
 from loguru import logger
 from typing import List
 
+from core.config import settings
 from db.database import CurrentSession
-from schemas.transport import TransportRead, TransportCreate, TransportUpdate
+from schemas.transport import (
+    TransportRead,
+    TransportCreate,
+    TransportUpdate,
+    RouteOptimizeRequest,
+    RouteOptimizeResponse,
+)
 from crud import transport as crud_transport
 from core.security import get_current_user
+from service.route_optimizer import optimize_route
 from service.user_log import insert_user_log
-from models.user import User
+from schemas.user import Principal
+from utils.pagination import PageParams, paginate_rows, set_next_cursor
 
 router = APIRouter()
 
@@ -21,7 +31,7 @@ router = APIRouter()
 async def create_transport(
         transport_in: TransportCreate,
         db: CurrentSession,
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
 ):
     """
     创建运输线路记录。
@@ -40,15 +50,18 @@ async def create_transport(
 )
 async def read_transports(
         db: CurrentSession,
-        skip: int = 0,
-        limit: int = 100,
-        user: User = Depends(get_current_user)
+        response: Response,
+        page: PageParams = Depends(),
+        skip: int = Query(0, ge=0, deprecated=True, description="跳过的记录数，请改用 cursor"),
+        user: Principal = Depends(get_current_user)
 ):
     """
-    获取运输线路列表 (支持分页)。
+    获取运输线路列表 (按 ID 游标分页，下一页游标见响应头 X-Next-Cursor)。
     """
-    logger.info(f"请求运输线路列表: skip={skip}, limit={limit}")
-    transports = await crud_transport.get_transports(db=db, skip=skip, limit=limit)
+    logger.info(f"请求运输线路列表: cursor={page.cursor}, skip={skip}, limit={page.limit}")
+    rows = await crud_transport.get_transports(db=db, skip=skip, limit=page.limit, after=page.after(1))
+    transports, next_cursor = paginate_rows(rows, page.limit, lambda row: [row.id])
+    set_next_cursor(response, next_cursor)
     logger.debug(f"查询到 {len(transports)} 条运输线路记录")
     insert_user_log(str(user.id), "查看运输任务", "成功")
     return transports
@@ -119,7 +132,7 @@ async def update_transport(
 async def delete_transport(
         transport_id: int,
         db: CurrentSession,
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
 ):
     """
     删除运输线路记录。
@@ -138,3 +151,72 @@ async def delete_transport(
     logger.info(f"成功删除运输线路记录，ID: {transport_id}")
     insert_user_log(str(user.id), "删除运输任务", "成功")
     return deleted_transport
+
+
+@router.post(
+    "/{transport_id}/optimize",
+    response_model=RouteOptimizeResponse,
+    summary="优化运输线路的配送顺序",
+)
+async def optimize_transport_route(
+        transport_id: int,
+        request: RouteOptimizeRequest,
+        db: CurrentSession,
+        user: Principal = Depends(get_current_user)
+):
+    """
+    为运输线路规划多站点配送顺序，并将预估时长写回该线路。
+
+    - 单趟装载量不超过运输线路的货物量 (stock)，超出时车辆返回仓库后再出发
+    - 距离来源 auto 在站点较少时使用高德驾车距离，否则使用本地估算
+    - 显式指定 gaode 时点数（含仓库）不能超过 ROUTE_GAODE_MAX_POINTS，否则返回 400
+    """
+    db_transport = await crud_transport.get_transport(db=db, transport_id=transport_id)
+    if db_transport is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"ID 为 {transport_id} 的运输记录未找到"
+        )
+    if len(request.stops) > settings.ROUTE_MAX_STOPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"站点数量超过上限 {settings.ROUTE_MAX_STOPS}"
+        )
+
+    capacity = db_transport.stock if db_transport.stock > 0 else None
+    if capacity is not None and any(stop.demand > capacity for stop in request.stops):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"存在配送量超过运输线路货物量 ({capacity}) 的站点"
+        )
+
+    logger.info(f"开始优化运输线路，ID: {transport_id}, 站点数: {len(request.stops)}, 距离来源: {request.distance_source}")
+    try:
+        plan = await optimize_route(
+            depot=(request.depot.longitude, request.depot.latitude),
+            stops=[(stop.longitude, stop.latitude) for stop in request.stops],
+            demands=[stop.demand for stop in request.stops],
+            capacity=capacity,
+            source=request.distance_source,
+            return_to_depot=request.return_to_depot,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    estimated_duration = datetime.timedelta(seconds=round(plan["total_duration_seconds"]))
+    if request.apply:
+        await crud_transport.update_transport(
+            db=db, db_obj=db_transport, obj_in=TransportUpdate(estimated_duration=estimated_duration)
+        )
+        insert_user_log(str(user.id), "优化运输线路", "成功")
+
+    logger.info(
+        f"运输线路优化完成，ID: {transport_id}, {len(plan['trips'])} 趟, "
+        f"总距离 {plan['total_distance_meters']:.0f} 米 (初始解 {plan['baseline_distance_meters']:.0f} 米)"
+    )
+    return RouteOptimizeResponse(
+        transport_id=transport_id,
+        estimated_duration=estimated_duration,
+        applied=request.apply,
+        **plan,
+    )
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from core.security import get_current_user
 from schemas import LogResponse
-from models import User
-from typing import List
-from service.user_log import insert_user_log, get_user_logs
-USER_LOG_DIR = "user_log"
+from schemas.user import Principal
+from typing import List, Optional
+from service.user_log import query_user_logs
 
 router = APIRouter()
 
 
 @router.get("/{count}", summary="获取近期用户日志")
 async def get_user_log(
-        count: int,
-        user: User = Depends(get_current_user)
+        response: Response,
+        count: int = Path(..., ge=1, le=1000, description="每页条数"),
+        cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的游标"),
+        action: Optional[str] = Query(None, description="只返回指定活动类型的日志"),
+        start_time: Optional[datetime] = Query(None, description="起始时间（包含）"),
+        end_time: Optional[datetime] = Query(None, description="结束时间（不包含）"),
+        user: Principal = Depends(get_current_user)
 ) -> List[LogResponse]:
-    return get_user_logs(user.id, count)
-
+    """
+    从新到旧分页获取当前用户的操作日志
 
+    还有更多日志时，响应头 X-Next-Cursor 返回下一页的游标
+    """
+    try:
+        logs, next_cursor = await query_user_logs(
+            user.id, count, cursor=cursor, action=action, start_time=start_time, end_time=end_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
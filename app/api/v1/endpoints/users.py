@@ -1,7 +1,7 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status,UploadFile, File
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from loguru import logger
 
 from core.security import (
     get_current_user,
@@ -15,16 +15,18 @@ from crud.user import (
     get_user_by_id,
     update_user,
     delete_user,
-    get_user_roles
+    get_user_roles,
+    get_user_with_roles,
+    list_users_with_roles,
 )
 from crud.role import get_all_roles, get_role_by_id
 from db.database import CurrentSession
-from models.user import User
-from schemas.user import UserCreate, UserResponse, UserUpdate, UserResponse_me, PasswordChange,UpdateUserPayload
+from schemas.user import UserCreate, UserResponse, UserUpdate, UserResponse_me, PasswordChange,UpdateUserPayload, Principal
 from schemas.role import RoleResponse
 from service.user_log import insert_user_log
-from core.password import verify_password, get_password_hash
-from service.aliyunOSS import upload_avatar
+from core.password import verify_password_async
+from service.avatar import AVATAR_UPLOAD_OPENAPI, read_avatar_upload, save_avatar
+from utils.pagination import PageParams, paginate_rows, set_next_cursor
 
 router = APIRouter()
 
@@ -32,7 +34,7 @@ router = APIRouter()
 @router.get("/logout")
 async def logout(
     db: CurrentSession,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     insert_user_log(str(current_user.id), "退出登录", "成功")
     return current_user
@@ -41,7 +43,7 @@ async def logout(
 @router.get("/me", response_model=UserResponse_me, summary="获取当前用户信息")
 async def read_users_me(
         db: CurrentSession,
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ) -> UserResponse_me:
     """
     获取当前登录用户信息
@@ -53,7 +55,7 @@ async def read_users_me(
 @router.get("/me/roles", response_model=List[RoleResponse], summary="获取当前用户角色")
 async def read_user_me_roles(
         db: CurrentSession,
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ) -> List[RoleResponse]:
     """
     获取当前登录用户的所有角色
@@ -65,38 +67,35 @@ async def read_user_me_roles(
 @router.get("", summary="获取所有用户")
 async def read_users(
         db: CurrentSession,
-        skip: int = 0,
-        limit: int = 100,
-        current_user: User = Depends(get_super_admin_user)
+        response: Response,
+        page: PageParams = Depends(),
+        skip: int = Query(0, ge=0, deprecated=True, description="跳过的记录数，请改用 cursor"),
+        current_user: Principal = Depends(get_super_admin_user)
 ):
     """
     获取所有用户（仅限超级管理员）
     
-    - **skip**: 跳过记录数
-    - **limit**: 返回记录数
+    - **cursor**: 上一页响应头 X-Next-Cursor 中的游标
+    - **limit**: 每页记录数
+    - **skip**: 跳过记录数（已弃用）
     """
-
-    query = select(
-        User.id,
-        User.username,
-        User.name,
-        User.email,
-        User.phone,
-        func.to_char(User.createtime, "YYYY-MM-DD HH24:MI:SS").label("createTime")  # 格式化时间并别名
-    ).order_by(User.id.asc()).offset(skip).limit(limit)
-
-    result = await db.execute(query)
-    users = result.mappings().all()  # 返回字典列表，如 [{"id": 1, "name": "张三", ...}]
-    user_dicts = []
-    for user in users:
-        user_id = user.id
-        roles = await get_user_roles(db, user_id)
-        user_dict = dict(user)
-        if roles:
-            user_dict["role"] = roles[0].role_id
-        else:
-            user_dict["role"] = None  # 或者 "未分配"、空字符串等，视你的业务需要
-        user_dicts.append(user_dict)
+    # 用户与角色在同一条SQL中聚合查询，每页只查询一次数据库
+    rows = await list_users_with_roles(db, page.limit, after=page.after(1), skip=skip)
+    users, next_cursor = paginate_rows(rows, page.limit, lambda row: [row["id"]])
+    set_next_cursor(response, next_cursor)
+    # 返回字典列表，如 [{"id": 1, "name": "张三", "role": 1, ...}]
+    user_dicts = [
+        {
+            "id": user["id"],
+            "username": user["username"],
+            "name": user["name"],
+            "email": user["email"],
+            "phone": user["phone"],
+            "createTime": user["createtime"].strftime("%Y-%m-%d %H:%M:%S") if user["createtime"] else None,
+            "role": user["role"],
+        }
+        for user in users
+    ]
     insert_user_log(str(current_user.id), "查看所有用户", "成功")
     return user_dicts
 
@@ -106,7 +105,7 @@ async def create_new_user(
         db: CurrentSession,
         user_in: UserCreate,
         role_id: int,
-        current_user: User = Depends(get_super_admin_user)
+        current_user: Principal = Depends(get_super_admin_user)
 ) -> UserResponse:
     """
     创建新用户（仅限超级管理员）
@@ -134,14 +133,14 @@ async def create_new_user(
 async def read_user(
         db: CurrentSession,
         user_id: int,
-        current_user: User = Depends(get_any_admin_user)
-) -> User:
+        current_user: Principal = Depends(get_any_admin_user)
+) -> UserResponse:
     """
     获取指定用户信息（任意管理员可访问）
     
     - **user_id**: 用户ID
     """
-    user = await get_user_by_id(db, user_id)
+    user = await get_user_with_roles(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,7 +154,7 @@ async def update_user_endpoint(
         db: CurrentSession,
         user_id: int,
         payload: UpdateUserPayload,
-        current_user: User = Depends(get_super_admin_user),
+        current_user: Principal = Depends(get_super_admin_user),
 ) -> UserResponse:
     """
     更新用户信息（仅限超级管理员）
@@ -179,7 +178,7 @@ async def update_user_endpoint(
 async def delete_user_endpoint(
         db: CurrentSession,
         user_id: int,
-        current_user: User = Depends(get_super_admin_user)
+        current_user: Principal = Depends(get_super_admin_user)
 ) -> None:
     """
     删除用户（仅限超级管理员）
@@ -209,7 +208,7 @@ async def delete_user_endpoint(
 async def delete_user_endpoint(
         password_change: PasswordChange,
         db: CurrentSession,
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ):
     # 检查当前用户是否正在删除自己
     print("当前用户id：", current_user.id)
@@ -228,7 +227,7 @@ async def delete_user_endpoint(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"can't find user with user_id = {password_change.user_id}"
         )
-    psw_result = verify_password(password_change.old_password, user.password)
+    psw_result = await verify_password_async(password_change.old_password, user.password)
     print("old_password:", password_change.old_password)
     print("hashed_password:", user.password)
     print("psw_result:", psw_result)
@@ -244,25 +243,30 @@ async def delete_user_endpoint(
     return res_user
 
 
-@router.post("/upload-avatar")
+@router.post("/upload-avatar", openapi_extra=AVATAR_UPLOAD_OPENAPI)
 async def upload_user_avatar(
+        request: Request,
         db: CurrentSession,
-        current_user: User = Depends(get_current_user),
-        file: UploadFile = File(...)
+        current_user: Principal = Depends(get_current_user)
 ):
-    # 限制文件类型（建议做）
-    allowed_suffix = {"jpg", "jpeg", "png", "gif"}
-    suffix = file.filename.split('.')[-1].lower()
-    if suffix not in allowed_suffix:
-        raise HTTPException(status_code=400, detail="不支持的文件类型")
+    """
+    上传头像（multipart/form-data 的 file 字段，支持 JPEG/PNG/GIF/WEBP）
 
+    图片会被居中裁剪并缩放为固定尺寸的 WEBP，返回最大尺寸头像的地址
+    """
+    # 认证通过后才开始读取请求体，文件超过大小上限时立即返回413
+    file_bytes = await read_avatar_upload(request)
     try:
-        file_bytes = await file.read()
-        url = upload_avatar(file_bytes, suffix)
-        user_in = UserUpdate(avatar_url=url)
-        user = await update_user(db, current_user.id, user_in, None)
-        if user is None:
-            raise HTTPException(status_code=500, detail=f"上传失败")
-        return {"url": url}
+        url = await save_avatar(file_bytes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"上传失败: {str(e)}")
\ No newline at end of file
+        logger.error(f"头像上传失败: {e!r}")
+        raise HTTPException(status_code=500, detail=f"上传失败: {str(e)}")
+
+    user = await update_user(db, current_user.id, UserUpdate(avatar_url=url), None)
+    if user is None:
+        raise HTTPException(status_code=500, detail="上传失败")
+    return {"url": url}
\ No newline at end of file
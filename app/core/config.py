@@ -20,6 +20,28 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # 认证用户缓存配置
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # 角色鉴权配置
+    # database: 使用已加载的用户角色; token: 信任JWT中的roles声明
+    AUTH_ROLE_SOURCE: str = "database"
+    # 令牌模式下启用角色声明撤销，角色变更后旧令牌的roles声明失效（依赖 migrations/008_user_roles_changed_at.sql）
+    AUTH_ROLE_REVOCATION_ENABLED: bool = False
+
+    # 密码哈希工作池配置
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread 或 process
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 超出工作线程数后允许排队的任务数，再多则返回429
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # 智能助手数据库查询工具配置
+    QUERY_TOOL_STATEMENT_TIMEOUT_MS: int = 5000  # 单条语句超时时间（毫秒）
+    QUERY_TOOL_MAX_ROWS: int = 200  # 单次查询返回的最大行数
+    QUERY_TOOL_FETCH_SIZE: int = 50  # 服务端游标每批读取的行数
+
     # 数据库配置
     DB_HOST: str
     DB_PORT: int
@@ -42,13 +64,81 @@ class Settings(BaseSettings):
 
     # Gemini API配置
     GEMINI_API_KEY: str
+    CHAT_MAX_TOOL_ROUNDS: int = 5  # 单次对话中模型连续调用工具的最大轮数
+    CHAT_SESSION_MAX: int = 500  # 同时保留的最大会话数，超出时淘汰最久未使用的会话
+    CHAT_SESSION_IDLE_TTL_SECONDS: int = 1800  # 会话空闲回收时间（秒）
+    CHAT_CONTEXT_MAX_TOKENS: int = 8000  # 每个会话上下文的令牌预算，超出时丢弃最早的消息
+    CHAT_CONTEXT_MAX_MESSAGES: int = 40  # 每个会话上下文保留的最大消息数
+    CHAT_HISTORY_PERSIST: bool = False  # 是否将聊天记录写入数据库 (jishe.chat_history)
+    CHAT_HISTORY_FLUSH_INTERVAL_SECONDS: float = 2.0  # 聊天记录批量写入间隔
+    CHAT_HISTORY_BATCH_SIZE: int = 100  # 缓冲区攒满多少条消息时立即写入
+    CHAT_HISTORY_MAX_BUFFER: int = 10000  # 缓冲区最大消息数，数据库不可用时超出部分丢弃最早的消息
+    CHAT_HISTORY_HYDRATE_MESSAGES: int = 20  # 创建会话时从数据库恢复的最近消息数
+    CHAT_ANSWER_CACHE_ENABLED: bool = True  # 是否缓存只依赖数据库查询的回答
+    CHAT_ANSWER_CACHE_MAXSIZE: int = 1000  # 回答缓存最大条目数
+    CHAT_ANSWER_CACHE_TTL_SECONDS: int = 60  # 回答缓存有效期，兜底其他进程与外部系统的写入
+    CHAT_ANSWER_CACHE_CONTEXT_MESSAGES: int = 4  # 参与回答缓存键的最近上下文消息数，上下文不同的追问不会命中其他会话的回答
 
     # 高德地图 API配置
     GAODE_API_KEY: str
+    GEOCODE_CACHE_TTL_SECONDS: int = 86400  # 内存缓存过期时间
+    GEOCODE_CACHE_MAX_SIZE: int = 4096
+    GEOCODE_CACHE_PERSIST: bool = False  # 是否将地理编码结果持久化到数据库 (jishe.geocode_cache)
+    GEOCODE_CACHE_PERSIST_TTL_SECONDS: int = 30 * 86400  # 数据库缓存的有效期
+    DISTANCE_CACHE_TTL_SECONDS: int = 3600  # 距离矩阵单元缓存过期时间
+    DISTANCE_CACHE_MAX_SIZE: int = 20000
+    GAODE_RATE_LIMIT_QPS: float = 3.0  # 高德API调用速率上限（次/秒），0 表示不限
+    GAODE_MAX_CONCURRENCY: int = 8  # 同时进行的高德API请求数上限
+    GEO_BATCH_MAX_ADDRESSES: int = 200  # 批量地理编码单次请求的最大地址数
+    GEO_MATRIX_MAX_ELEMENTS: int = 2500  # 距离矩阵单次请求的最大单元数 (起点数×终点数)
+
+    # 运输线路优化配置
+    ROUTE_MAX_STOPS: int = 1000  # 单次优化的最大站点数
+    ROUTE_GAODE_MAX_POINTS: int = 30  # distance_source=auto 时，点数（含仓库）不超过该值才使用高德距离
+    ROUTE_DETOUR_FACTOR: float = 1.3  # 本地估算时直线距离到道路距离的绕行系数
+    ROUTE_AVERAGE_SPEED_KMH: float = 40.0  # 本地估算时的平均车速
+    ROUTE_SERVICE_SECONDS: int = 300  # 每个站点的停留时间（秒）
+    ROUTE_OPTIMIZE_TIME_LIMIT_SECONDS: float = 10.0  # 局部优化的时间预算
+
+    # 共享HTTP客户端配置
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+    HTTP_DEFAULT_TIMEOUT: float = 30.0
 
     # 华为云配置
     HUAWEICLOUD_SDK_AK: str
     HUAWEICLOUD_SDK_SK: str
+    IOTDA_PROJECT_ID: str = "8b086955-1e5d-45f7-ab7b-1a54fdbf5e68"
+    IOTDA_REGION_ID: str = "cn-north-4"
+    IOTDA_ENDPOINT: str = "2f6dd797a9.st1.iotda-app.cn-north-4.myhuaweicloud.com"  # 以 http:// 开头时按原样使用，可指向本地模拟服务 scripts/fake_iotda.py
+    IOTDA_MAX_WORKERS: int = 16  # 执行 IoTDA 调用的线程数，即同时进行的调用数上限
+    IOTDA_POOL_MAXSIZE: int = 16  # HTTP 连接池大小
+    IOTDA_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    IOTDA_READ_TIMEOUT_SECONDS: float = 15.0
+    IOTDA_CALL_TIMEOUT_SECONDS: float = 20.0  # 单次调用的总超时
+    IOTDA_MAX_RETRIES: int = 3  # 限流或查询失败时的最大重试次数
+    IOTDA_RETRY_BASE_DELAY_SECONDS: float = 0.5  # 重试退避的初始上限，之后每次翻倍
+    IOTDA_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    IOTDA_FANOUT_CONCURRENCY: int = 10  # 批量查询时同时进行的调用数
+
+    # IoTDA 设备镜像配置
+    IOTDA_MIRROR_ENABLED: bool = False  # 是否将设备、设备组同步到本地表并从本地表查询（需执行 migrations/006_iotda_mirror.sql）
+    IOTDA_INSTANCE_ID: Optional[str] = None  # 同步的 IoTDA 实例ID，为空时同步默认实例
+    IOTDA_SYNC_INTERVAL_SECONDS: float = 30.0  # 增量同步（新注册设备）间隔
+    IOTDA_SYNC_FULL_INTERVAL_SECONDS: float = 300.0  # 全量同步（设备属性、状态、设备组成员与删除）间隔
+    IOTDA_MIRROR_MAX_STALENESS_SECONDS: float = 1800.0  # 距上次全量同步超过此时长时查询回退到华为云
+
+    # IoTDA 批量命令配置
+    IOTDA_COMMAND_OUTBOX_ENABLED: bool = False  # 是否启用批量命令发件箱（需执行 migrations/007_iotda_command_outbox.sql）
+    IOTDA_COMMAND_WORKERS: int = 8  # 下发任务数，即同时下发的命令数上限
+    IOTDA_COMMAND_RATE_PER_SECOND: float = 20.0  # 每个进程每秒最多调用的命令接口次数（下发与状态查询共用）
+    IOTDA_COMMAND_MAX_ATTEMPTS: int = 5  # 限流、服务端错误或超时时的最大下发次数
+    IOTDA_COMMAND_RETRY_DELAY_SECONDS: float = 5.0  # 重新下发的初始等待时间，之后每次翻倍
+    IOTDA_COMMAND_LEASE_SECONDS: float = 120.0  # 认领时长，超过此时长未记录结果的命令重新下发
+    IOTDA_COMMAND_POLL_INTERVAL_SECONDS: float = 2.0  # 没有待下发命令时的轮询间隔
+    IOTDA_COMMAND_STATUS_REFRESH_SECONDS: float = 30.0  # 已受理命令的状态刷新间隔，0 表示不刷新
+    IOTDA_COMMAND_BATCH_MAX_DEVICES: int = 10000  # 单个批量命令的最大设备数
 
     # aliyunOSS配置
     OSS_ACCESS_KEY_ID: str
@@ -56,6 +146,17 @@ class Settings(BaseSettings):
     OSS_ENDPOINT: str
     OSS_BUCKET_NAME: str
 
+    # 头像上传配置
+    AVATAR_STORAGE: str = "oss"  # oss: 阿里云 OSS; local: 本地目录 AVATAR_LOCAL_DIR（开发与测试使用）
+    AVATAR_LOCAL_DIR: str = "static"  # 本地存储目录，应用以 /static 路径提供访问
+    AVATAR_LOCAL_BASE_URL: str = "/static"  # 本地存储时头像地址的前缀
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024  # 上传文件大小上限
+    AVATAR_MAX_PIXELS: int = 40_000_000  # 上传图片的像素数上限
+    AVATAR_SIZES: List[int] = [256, 64]  # 生成的头像边长，头像地址为最大尺寸
+    AVATAR_QUALITY: int = 85  # WEBP 编码质量
+    AVATAR_WORKERS: int = 2  # 处理与上传头像的线程数
+    AVATAR_MAX_PENDING: int = 8  # 超出线程数后允许排队的头像数，再多则返回429
+
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
@@ -69,6 +170,24 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
 
+    # 巡检看板状态统计快照有效期（秒），0 表示每次请求都查询
+    STATUS_SUMMARY_CACHE_SECONDS: float = 5.0
+
+    # 批量入库配置
+    STOCK_BULK_MAX_LINES: int = 50000  # 单次批量入库的最大行数
+    STOCK_BULK_BATCH_SIZE: int = 1000  # 每条 INSERT ... ON CONFLICT 语句包含的行数
+
+    # 列表接口分页配置
+    PAGINATION_DEFAULT_LIMIT: int = 100  # 未指定 limit 时的每页条数
+    PAGINATION_MAX_LIMIT: int = 1000  # 每页最大条数
+
+    # 用户操作日志配置
+    USER_LOG_BACKEND: str = "file"  # file: user_log/ 目录下的按用户文件; database: jishe.user_log 表
+    USER_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0  # 日志批量写入间隔
+    USER_LOG_BATCH_SIZE: int = 200  # 队列攒满多少条日志时立即写入
+    USER_LOG_MAX_QUEUE: int = 10000  # 队列最大长度，超出时丢弃新日志
+    USER_LOG_RETRY_MAX_SECONDS: float = 30.0  # 写入失败后重试间隔按倍数增长的上限
+
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8', extra='ignore')
 
     def get_db_uri(self) -> str:
@@ -1,7 +1,14 @@
 from contextlib import asynccontextmanager
 from loguru import logger
-import aiohttp
 from core.config import settings
+from core.http_client import close_http_session
+from core.password import shutdown_password_executor
+from service.iotda_service import shutdown_iotda_gateway
+from service.iotda_sync import start_iotda_sync, stop_iotda_sync
+from service.iotda_command import start_iotda_command_workers, stop_iotda_command_workers
+from service.avatar import shutdown_avatar_executor
+from service.chat_history import start_chat_history_writer, stop_chat_history_writer
+from service.user_log import start_user_log_writer, stop_user_log_writer
 
 
 @asynccontextmanager
@@ -16,6 +23,10 @@ async def app_lifespan_context(app):
     """
     # 启动时执行的操作
     logger.info(f"正在启动 {settings.APP_NAME}")
+    start_chat_history_writer()
+    start_user_log_writer()
+    start_iotda_sync()
+    start_iotda_command_workers()
 
     
     # 提供应用上下文
@@ -23,4 +34,12 @@ async def app_lifespan_context(app):
     
     # 关闭时执行的操作
     logger.info(f"正在关闭 {settings.APP_NAME}")
+    await stop_chat_history_writer()
+    await stop_user_log_writer()
+    await stop_iotda_sync()
+    await stop_iotda_command_workers()
+    shutdown_password_executor()
+    shutdown_iotda_gateway()
+    shutdown_avatar_executor()
+    await close_http_session()
 
@@ -0,0 +1,48 @@
+"""
+业务表数据版本号
+
+每张业务表维护一个进程内版本号，CRUD 层写入某张表并提交后调用 bump_data_version 递增。
+依赖表数据的缓存（如智能助手的回答缓存）保存写入时的版本号，读取时版本号不一致即视为失效。
+
+版本号只反映本进程内的写入；其他进程或外部系统（如无人机数据上报）的写入
+由缓存自身的TTL兜底。
+"""
+
+from typing import Any, Dict, Iterable, Tuple
+
+# 表名 -> 版本号
+_versions: Dict[str, int] = {}
+
+
+def bump_data_version(*tables: str) -> None:
+    """
+    递增指定表的版本号
+
+    Args:
+        tables: 发生写入的表名（不含 schema），如 "stock"
+    """
+    for table in tables:
+        _versions[table] = _versions.get(table, 0) + 1
+
+
+def get_data_versions(tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+    """
+    获取指定表的版本号快照
+
+    Args:
+        tables: 表名
+
+    Returns:
+        Tuple[Tuple[str, int], ...]: 按表名排序的 (表名, 版本号)，可直接比较或作为缓存键
+    """
+    return tuple((table, _versions.get(table, 0)) for table in sorted(set(tables)))
+
+
+def get_data_version_stats() -> Dict[str, Any]:
+    """
+    获取各表当前的版本号
+
+    Returns:
+        Dict[str, Any]: 表名 -> 版本号
+    """
+    return dict(_versions)
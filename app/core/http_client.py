@@ -0,0 +1,48 @@
+"""
+共享HTTP客户端
+
+进程内所有对外HTTP调用（高德地图等）共用一个 aiohttp 会话，
+复用 keep-alive 连接，避免每次请求都重新建立TCP/TLS连接。
+会话在首次使用时创建，在应用关闭时由生命周期管理器关闭。
+"""
+
+from typing import Optional
+
+import aiohttp
+from loguru import logger
+
+from core.config import settings
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    获取共享的 aiohttp 会话，必须在事件循环中调用
+
+    Returns:
+        aiohttp.ClientSession: 共享会话
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,  # 总连接数上限
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,  # 单个主机的连接数上限
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,  # 空闲连接保持时间
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.HTTP_DEFAULT_TIMEOUT),
+        )
+        logger.info("共享HTTP会话已创建")
+    return _session
+
+
+async def close_http_session() -> None:
+    """关闭共享的 aiohttp 会话，在应用关闭时调用"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("共享HTTP会话已关闭")
+    _session = None
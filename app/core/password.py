@@ -1,5 +1,15 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from loguru import logger
 from passlib.context import CryptContext
 
+from core.config import settings
+
+T = TypeVar("T")
+
 # 定义密码哈希上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -27,4 +37,105 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: 哈希后的密码
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+# bcrypt 每次计算耗时约 100-300 ms，直接在协程中调用会阻塞事件循环，
+# 以下异步接口将计算放到有界的工作池中执行，并在排队过多时拒绝新请求
+_executor: Optional[Executor] = None
+# 正在执行或排队中的哈希任务数
+_in_flight = 0
+# 因排队已满而被拒绝的任务数
+_rejected = 0
+
+
+def _get_executor() -> Executor:
+    """按配置惰性创建哈希工作池"""
+    global _executor
+    if _executor is None:
+        workers = settings.PASSWORD_HASH_WORKERS
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        logger.info(f"密码哈希工作池已创建: {settings.PASSWORD_HASH_EXECUTOR} x {workers}")
+    return _executor
+
+
+async def _run_in_pool(func: Callable[..., T], *args: Any) -> T:
+    """
+    在哈希工作池中执行函数，排队任务超过上限时返回429
+
+    Raises:
+        HTTPException: 工作池已饱和
+    """
+    global _in_flight, _rejected
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING
+    if _in_flight >= capacity:
+        _rejected += 1
+        logger.warning(f"密码哈希工作池已饱和({_in_flight}/{capacity})，拒绝请求")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many concurrent authentication requests, please retry later",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    在工作池中验证明文密码是否与哈希密码匹配
+
+    Args:
+        plain_password: 明文密码
+        hashed_password: 哈希后的密码
+
+    Returns:
+        bool: 密码是否匹配
+
+    Raises:
+        HTTPException: 工作池已饱和(429)
+    """
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    在工作池中计算密码的哈希值
+
+    Args:
+        password: 明文密码
+
+    Returns:
+        str: 哈希后的密码
+
+    Raises:
+        HTTPException: 工作池已饱和(429)
+    """
+    return await _run_in_pool(get_password_hash, password)
+
+
+def shutdown_password_executor() -> None:
+    """关闭哈希工作池，在应用关闭时调用"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+        logger.info("密码哈希工作池已关闭")
+
+
+def get_password_executor_stats() -> Dict[str, Any]:
+    """获取哈希工作池的统计信息"""
+    return {
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "in_flight": _in_flight,
+        "rejected": _rejected,
+    }
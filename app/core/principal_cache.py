@@ -0,0 +1,70 @@
+"""
+认证用户缓存
+
+缓存 get_current_user 解析出的用户快照 (Principal)，避免每个请求都查询数据库。
+缓存的是不可变的快照而不是 ORM 对象，并发请求共享同一条目时不会互相影响，也不会触发已脱离会话对象的懒加载。
+缓存键为 (用户ID, 令牌过期时间)，条目寿命不超过令牌剩余有效期。
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from core.config import settings
+from schemas.user import Principal
+from utils.cache import TTLCache
+
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def get_cached_principal(user_id: int, token_exp: int) -> Optional[Principal]:
+    """
+    读取缓存的认证用户
+
+    Args:
+        user_id: 用户ID
+        token_exp: 令牌过期时间戳
+
+    Returns:
+        Principal: 缓存的用户快照或None
+    """
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return None
+    return principal_cache.get((user_id, token_exp))
+
+
+def cache_principal(user: Principal, token_exp: int) -> None:
+    """
+    缓存认证用户，过期时间取配置TTL与令牌剩余有效期中的较小值
+
+    Args:
+        user: 用户快照
+        token_exp: 令牌过期时间戳
+    """
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return
+    ttl = min(settings.PRINCIPAL_CACHE_TTL_SECONDS, token_exp - time.time())
+    principal_cache.set((user.id, token_exp), user, ttl=ttl)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    使指定用户的所有缓存条目失效
+
+    在用户信息、密码、头像或角色变更以及用户删除后调用
+
+    Args:
+        user_id: 用户ID
+    """
+    removed = principal_cache.pop_where(lambda key: key[0] == user_id)
+    if removed:
+        logger.debug(f"已清除用户(ID:{user_id})的 {removed} 条认证缓存")
+
+
+def get_principal_cache_stats() -> Dict[str, Any]:
+    """获取认证用户缓存的统计信息"""
+    return {"enabled": settings.PRINCIPAL_CACHE_ENABLED, **principal_cache.stats()}
@@ -0,0 +1,50 @@
+"""
+角色声明撤销
+
+在令牌信任模式（AUTH_ROLE_SOURCE=token）下，角色检查直接读取JWT中的 roles 声明。
+用户角色变更时 update_user 会把 jishe.user.roles_changed_at 更新为当前时间
+（需先执行 migrations/008_user_roles_changed_at.sql）；签发时间不晚于该时间的令牌，
+其 roles 声明将不再被信任，角色检查回退到用户对象上的角色。
+
+撤销时间保存在数据库中，所有进程（多个 uvicorn / gunicorn worker）共享；
+其他进程在认证用户缓存过期（最长 PRINCIPAL_CACHE_TTL_SECONDS）后读到新的撤销时间。
+用户被删除后 get_current_user 查不到用户，令牌直接失效，无需撤销。
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from core.config import settings
+
+_stats = {
+    "revoked_claims": 0,
+}
+
+
+def is_role_claim_revoked(roles_changed_at: Optional[datetime], issued_at: Optional[int]) -> bool:
+    """
+    判断令牌中的角色声明是否已被撤销
+
+    Args:
+        roles_changed_at: 用户最近一次角色变更的时间，从未变更时为 None
+        issued_at: 令牌签发时间戳，旧令牌可能没有该字段
+
+    Returns:
+        bool: 已撤销返回True
+    """
+    if roles_changed_at is None:
+        return False
+    # 缺少签发时间的令牌无法判断先后，按已撤销处理；iat 为整秒，同一秒内签发的令牌同样视为已撤销
+    revoked = issued_at is None or issued_at <= roles_changed_at.timestamp()
+    if revoked:
+        _stats["revoked_claims"] += 1
+    return revoked
+
+
+def get_role_revocation_stats() -> Dict[str, Any]:
+    """获取角色声明撤销的统计信息"""
+    return {
+        "role_source": settings.AUTH_ROLE_SOURCE,
+        "enabled": settings.AUTH_ROLE_REVOCATION_ENABLED,
+        **_stats,
+    }
@@ -11,8 +11,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.config import settings
 from db.database import CurrentSession
 from schemas.token import TokenPayload
-from crud.user import get_user_by_id, get_user_roles
-from models.user import User
+from schemas.user import Principal
+from crud.user import get_user_by_id
+from core.principal_cache import get_cached_principal, cache_principal
+from core.role_revocation import is_role_claim_revoked
 
 # 定义密码哈希上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -73,6 +75,7 @@ def create_access_token(
     
     to_encode = {
         "exp": expire,
+        "iat": datetime.now(timezone.utc),
         "sub": str(subject)
     }
     
@@ -87,22 +90,20 @@ def create_access_token(
     return encoded_jwt
 
 
-async def get_current_user(
-    db: CurrentSession,
-    token: str = Depends(oauth2_scheme)
-) -> User:
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
     """
-    获取当前用户，依赖验证
-    
+    解码并校验JWT令牌，依赖验证
+
+    同一请求内的多个依赖共享该结果，令牌只解码一次
+
     Args:
-        db: 数据库会话
         token: JWT令牌
-        
+
     Returns:
-        User: 当前用户对象
-        
+        TokenPayload: 令牌数据
+
     Raises:
-        HTTPException: 凭证无效或用户不存在
+        HTTPException: 凭证无效或令牌过期
     """
     try:
         # 解码JWT令牌
@@ -124,9 +125,33 @@ async def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    return token_data
+
+
+async def get_current_user(
+    db: CurrentSession,
+    token_data: TokenPayload = Depends(get_token_payload)
+) -> Principal:
+    """
+    获取当前用户，依赖验证
     
-    # 从令牌中获取用户ID并查询用户
+    Args:
+        db: 数据库会话
+        token_data: 已校验的令牌数据
+        
+    Returns:
+        Principal: 当前用户的只读快照
+        
+    Raises:
+        HTTPException: 凭证无效或用户不存在
+    """
+    # 从令牌中获取用户ID，优先读取认证缓存
     user_id = int(token_data.sub)
+    user = get_cached_principal(user_id, token_data.exp)
+    if user is not None:
+        return user
+
     user = await get_user_by_id(db, user_id)
     
     # 检查用户是否存在
@@ -135,8 +160,35 @@ async def get_current_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    return user
+
+    principal = Principal.from_user(user)
+    cache_principal(principal, token_data.exp)
+    return principal
+
+
+def resolve_role_ids(current_user: Principal, token_data: TokenPayload) -> List[int]:
+    """
+    解析当前用户的角色ID列表
+
+    - AUTH_ROLE_SOURCE=token 时直接信任令牌中的 roles 声明；
+      若启用了角色撤销列表且令牌签发早于该用户最近一次角色变更，则回退到用户对象上的角色
+    - 其余情况使用 get_current_user 已加载的角色，不再额外查询数据库
+
+    Args:
+        current_user: 当前用户
+        token_data: 已校验的令牌数据
+
+    Returns:
+        List[int]: 角色ID列表
+    """
+    if settings.AUTH_ROLE_SOURCE == "token" and token_data.roles is not None:
+        is_revoked = settings.AUTH_ROLE_REVOCATION_ENABLED and is_role_claim_revoked(
+            current_user.roles_changed_at, token_data.iat
+        )
+        if not is_revoked:
+            return token_data.roles
+
+    return list(current_user.role_ids)
 
 
 def get_role_checker(required_roles: List[int]):
@@ -150,25 +202,24 @@ def get_role_checker(required_roles: List[int]):
         callable: 角色检查依赖
     """
     async def check_roles(
-        db: CurrentSession,
-        current_user: User = Security(get_current_user)
-    ) -> User:
+        current_user: Principal = Security(get_current_user),
+        token_data: TokenPayload = Depends(get_token_payload)
+    ) -> Principal:
         """
         检查用户是否具有所需角色
         
         Args:
-            db: 数据库会话
             current_user: 当前用户
+            token_data: 已校验的令牌数据
             
         Returns:
-            User: 当前用户对象
+            Principal: 当前用户的只读快照
             
         Raises:
             HTTPException: 用户没有所需角色
         """
         # 获取用户角色
-        user_roles = await get_user_roles(db, current_user.id)
-        user_role_ids = [role.role_id for role in user_roles]
+        user_role_ids = resolve_role_ids(current_user, token_data)
         
         # 检查是否有所需角色的任意一个
         if not any(role_id in required_roles for role_id in user_role_ids):
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence
 from sqlalchemy import select, update, delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
@@ -7,6 +7,8 @@ from loguru import logger
 
 from models.error import Error
 from schemas.error import ErrorCreate, ErrorUpdate
+from core.data_version import bump_data_version
+from utils.pagination import keyset_paginate
 
 
 async def get_error_by_id(db: AsyncSession, error_id: int) -> Optional[Error]:
@@ -21,27 +23,43 @@ async def get_error_by_id(db: AsyncSession, error_id: int) -> Optional[Error]:
         raise
 
 
-async def get_errors_by_user_id(db: AsyncSession, user_id: int) -> List[Error]:
+async def get_errors_by_user_id(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+) -> List[Error]:
     """
-    获取某个用户下的所有问题记录
+    获取某个用户下的问题记录
+
+    传入 limit 时按 error_id 键集分页，多返回一条用于判断是否还有下一页；after 为上一页最后一条的 (error_id,)
     """
     try:
-        result = await db.execute(select(Error).where(Error.user_id == user_id))
+        stmt = select(Error).where(Error.user_id == user_id)
+        if limit is not None:
+            stmt = keyset_paginate(stmt, [Error.error_id], after, limit)
+        result = await db.execute(stmt)
         return result.scalars().all()
     except SQLAlchemyError as e:
         logger.error(f"查询用户(ID:{user_id})的问题记录失败: {str(e)}")
         raise
 
 
-async def get_all_errors(db: AsyncSession) -> List[Dict[str, Any]]:
+async def get_all_errors(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+) -> List[Dict[str, Any]]:
     """
-    获取所有错误信息并添加发送者信息
+    获取错误信息并添加发送者信息，按发现时间从新到旧排列
     
     Args:
         db: 数据库会话
+        limit: 每页条数，为空时返回全部；分页时多返回一条用于判断是否还有下一页
+        after: 上一页最后一条的 (found_time, id)，按 (发现时间, 错误ID) 键集分页
         
     Returns:
-        List[Dict[str, Any]]: 包含用户信息的错误列表
+        List[Dict[str, Any]]: 包含用户信息的错误列表；found_time 为原始发现时间，用作分页排序键
     """
     try:
         # 创建SQL查询语句
@@ -52,6 +70,7 @@ async def get_all_errors(db: AsyncSession) -> List[Dict[str, Any]]:
                e.title, 
                e.error_content AS content, 
                e.error_found_time::text AS "createTime",
+               e.error_found_time AS found_time,
                CASE 
                    WHEN e.states = '0' THEN '待处理' 
                    WHEN e.states = '1' THEN '已处理' 
@@ -59,11 +78,22 @@ async def get_all_errors(db: AsyncSession) -> List[Dict[str, Any]]:
                END AS status
         FROM jishe.error e
         LEFT JOIN jishe.user u ON e.user_id = u.id
-        ORDER BY e.error_found_time DESC
         """
+        params: Dict[str, Any] = {}
+        if after:
+            query += """
+        WHERE (e.error_found_time, e.error_id) < (CAST(:after_time AS timestamp), :after_id)
+        """
+            params.update(after_time=after[0], after_id=int(after[1]))
+        query += """
+        ORDER BY e.error_found_time DESC, e.error_id DESC
+        """
+        if limit is not None:
+            query += "LIMIT :limit"
+            params["limit"] = limit + 1
         
         # 执行原生SQL查询
-        result = await db.execute(text(query))
+        result = await db.execute(text(query), params)
         rows = result.mappings().all()
         
         # 转换结果为字典列表
@@ -92,6 +122,7 @@ async def create_error(db: AsyncSession, error_create: ErrorCreate) -> Error:
         new_error = Error(**data)
         db.add(new_error)
         await db.commit()
+        bump_data_version("error")
         await db.refresh(new_error)
         logger.info(f"创建问题成功: ID={new_error.error_id}")
         return new_error
@@ -121,6 +152,7 @@ async def update_error(db: AsyncSession, error_id: int, error_update: ErrorUpdat
             setattr(db_error, key, value)
 
         await db.commit()
+        bump_data_version("error")
         await db.refresh(db_error)
         logger.info(f"问题(ID:{error_id})更新成功")
         return db_error
@@ -143,6 +175,7 @@ async def delete_error(db: AsyncSession, error_id: int) -> bool:
 
         await db.delete(db_error)
         await db.commit()
+        bump_data_version("error")
         logger.info(f"问题(ID:{error_id})已删除")
         return True
     except SQLAlchemyError as e:
@@ -6,6 +6,7 @@ from loguru import logger
 
 from models.goods import Goods
 from schemas.goods import GoodsCreate, GoodsUpdate
+from core.data_version import bump_data_version
 
 
 async def create_goods(db: AsyncSession, goods: GoodsCreate) -> Goods:
@@ -23,6 +24,7 @@ async def create_goods(db: AsyncSession, goods: GoodsCreate) -> Goods:
         db_goods = Goods(goods_name=goods.goods_name)
         db.add(db_goods)
         await db.commit()
+        bump_data_version("goods")
         await db.refresh(db_goods)
         return db_goods
     except SQLAlchemyError as e:
@@ -91,6 +93,7 @@ async def update_goods(db: AsyncSession, goods_id: int, goods: GoodsUpdate) -> O
             setattr(db_goods, field, value)
         
         await db.commit()
+        bump_data_version("goods")
         await db.refresh(db_goods)
         return db_goods
     except SQLAlchemyError as e:
@@ -117,6 +120,7 @@ async def delete_goods(db: AsyncSession, goods_id: int) -> bool:
         
         await db.delete(db_goods)
         await db.commit()
+        bump_data_version("goods")
         return True
     except SQLAlchemyError as e:
         logger.error(f"删除货物(ID:{goods_id})失败: {str(e)}")
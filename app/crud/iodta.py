@@ -1,4 +1,4 @@
-from service.iotda_service import client
+from service.iotda_service import call, fan_out
 from huaweicloudsdkcore.exceptions import exceptions
 
 from loguru import logger
@@ -55,8 +55,8 @@ async def list_devices(
             app_id=app_id
         )
         # 调用查询设备列表接口
-        response = client.list_devices_async(request)
-        return response
+        response = await call("list_devices", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -87,8 +87,8 @@ async def create_or_delete_device(
             action_id=action_id,
             device_id=device_id,
         )
-        response = client.create_or_delete_device_in_group_async(request)
-        return response
+        response = await call("create_or_delete_device_in_group", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -102,8 +102,8 @@ async def add_application(app_name: str):
     """
     try:
         request = AddApplicationRequest(app_name=app_name)
-        response = client.add_application_async(request)
-        return response
+        response = await call("add_application", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -121,8 +121,8 @@ async def delete_application(instance_id=None, app_id=None):
     """
     try:
         request = DeleteApplicationRequest(instance_id=instance_id, app_id=app_id)
-        response = client.delete_application_async(request)
-        return response
+        response = await call("delete_application", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -141,8 +141,8 @@ async def show_application(instance_id=None, app_id=None):
     """
     try:
         request = ShowApplicationRequest(instance_id=instance_id, app_id=app_id)
-        response = client.show_application_async(request)
-        return response
+        response = await call("show_application", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -163,8 +163,8 @@ async def show_applications(instance_id=None, default_app=None):
         request = ShowApplicationsRequest(
             instance_id=instance_id, default_app=default_app
         )
-        response = client.show_applications_async(request)
-        return response
+        response = await call("show_applications", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -187,8 +187,8 @@ async def update_application(instance_id=None, app_id=None, body=None):
         request = UpdateApplicationRequest(
             instance_id=instance_id, app_id=app_id, body=body
         )
-        response = client.update_application_async(request)
-        return response
+        response = await call("update_application", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -212,8 +212,8 @@ async def create_async_command(device_id=None, instance_id=None, body=None):
         request = CreateAsyncCommandRequest(
             device_id=device_id, instance_id=instance_id, body=body
         )
-        response = client.create_async_command_async(request)
-        return response
+        response = await call("create_async_command", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -266,8 +266,8 @@ async def list_async_commands(
             status=status,
             command_name=command_name,
         )
-        response = client.list_async_commands_async(request)
-        return response
+        response = await call("list_async_commands", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -287,8 +287,8 @@ async def add_device_group(instance_id=None, body=None):
 
     try:
         request = AddDeviceGroupRequest(instance_id=instance_id, body=body)
-        response = client.add_device_group_async(request)
-        return response
+        response = await call("add_device_group", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -307,8 +307,8 @@ async def delete_device_group(instance_id=None, group_id=None):
     """
     try:
         request = DeleteDeviceGroupRequest(instance_id=instance_id, group_id=group_id)
-        response = client.delete_device_group_async(request)
-        return response
+        response = await call("delete_device_group", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -357,8 +357,8 @@ async def list_device_groups(
             group_type=group_type,
             name=name,
         )
-        response = client.list_device_groups_async(request)
-        return response
+        response = await call("list_device_groups", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -391,8 +391,8 @@ async def show_devices_in_group(
             marker=marker,
             offset=offset,
         )
-        response = client.show_devices_in_group_async(request)
-        return response
+        response = await call("show_devices_in_group", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -416,8 +416,8 @@ async def update_device_group(instance_id=None, group_id=None, body=None):
         request = UpdateDeviceGroupRequest(
             instance_id=instance_id, group_id=group_id, body=body
         )
-        response = client.update_device_group_async(request)
-        return response
+        response = await call("update_device_group", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -436,8 +436,8 @@ async def add_device(instance_id=None, body=None):
     """
     try:
         request = AddDeviceRequest(instance_id=instance_id, body=body)
-        response = client.add_device_async(request)
-        return response
+        response = await call("add_device", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -456,8 +456,8 @@ async def delete_device(instance_id=None, device_id=None):
     """
     try:
         request = DeleteDeviceRequest(instance_id=instance_id, device_id=device_id)
-        response = client.delete_device_async(request)
-        return response
+        response = await call("delete_device", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -476,8 +476,8 @@ async def show_device(instance_id=None, device_id=None):
     """
     try:
         request = ShowDeviceRequest(instance_id=instance_id, device_id=device_id)
-        response = client.show_device_async(request)
-        return response
+        response = await call("show_device", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
@@ -500,10 +500,39 @@ async def update_device(instance_id=None, device_id=None, body=None):
         request = UpdateDeviceRequest(
             instance_id=instance_id, device_id=device_id, body=body
         )
-        response = client.update_device_async(request)
-        return response
+        response = await call("update_device", request)
+        return response.to_dict()
     except exceptions.ClientRequestException as e:
         logger.error(
             f"状态码:{e.status_code}, 请求id:{e.request_id}, 错误信息:{e.error_msg}, 错误码:{e.error_code}"
         )
         return None
+
+
+async def show_devices_in_groups(group_ids, instance_id=None, limit=None):
+    """
+    并发查询多个设备组的设备列表
+
+    :param group_ids: 设备组ID列表
+    :type group_ids: list[str]
+    :param instance_id: 实例ID
+    :type instance_id: str
+    :param limit: 每个设备组返回的设备数，取值范围1-50
+    :type limit: int
+    :return: 与 group_ids 顺序一致的结果，每项包含 group_id 以及 result 或 error
+    :rtype: list[dict]
+    """
+    results = await fan_out(
+        lambda group_id: show_devices_in_group(instance_id=instance_id, group_id=group_id, limit=limit),
+        group_ids,
+    )
+    items = []
+    for group_id, result in zip(group_ids, results):
+        if isinstance(result, BaseException):
+            logger.error(f"查询设备组 {group_id} 的设备失败: {result!r}")
+            items.append({"group_id": group_id, "result": None, "error": str(result) or type(result).__name__})
+        elif result is None:
+            items.append({"group_id": group_id, "result": None, "error": "设备组不存在或无权访问"})
+        else:
+            items.append({"group_id": group_id, "result": result, "error": None})
+    return items
@@ -0,0 +1,212 @@
+"""
+IoTDA 设备命令发件箱的读写
+
+认领使用 UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING，
+多个后台任务（包括多个进程中的）同时认领时不会拿到同一条命令
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.iotda_command import IotdaCommand
+from models.iotda_command_batch import IotdaCommandBatch
+
+# 与部分索引的条件一致，以字面量写入 SQL，预编译语句的通用计划也能使用对应的部分索引
+_DUE_CONDITION = text("jishe.iotda_command.status IN ('pending', 'sending')")
+_ACTIVE_CONDITION = text(
+    "jishe.iotda_command.status = 'sent' AND jishe.iotda_command.command_status IN ('PENDING', 'SENT', 'DELIVERED')"
+)
+# 进度接口返回的失败命令数上限
+MAX_REPORTED_FAILURES = 100
+
+
+async def create_command_batch(
+    db: AsyncSession,
+    device_ids: Sequence[str],
+    command: Dict[str, Any],
+    instance_id: Optional[str] = None,
+    created_by: Optional[int] = None,
+) -> IotdaCommandBatch:
+    """
+    创建批量命令，每台设备一条待下发的命令
+
+    Args:
+        db: 数据库会话
+        device_ids: 目标设备ID（不重复）
+        command: 命令内容
+        instance_id: IoTDA 实例ID
+        created_by: 创建者用户ID
+
+    Returns:
+        IotdaCommandBatch: 创建的批次
+    """
+    batch = IotdaCommandBatch(
+        instance_id=instance_id, command=command, total=len(device_ids), created_by=created_by
+    )
+    db.add(batch)
+    await db.flush()
+    await db.execute(
+        insert(IotdaCommand),
+        [{"batch_id": batch.id, "device_id": device_id} for device_id in device_ids],
+    )
+    await db.commit()
+    return batch
+
+
+async def claim_commands(db: AsyncSession, limit: int, lease: timedelta) -> List[Dict[str, Any]]:
+    """
+    认领到期的待下发命令，以及认领已过期（下发中进程退出）的命令
+
+    Args:
+        db: 数据库会话
+        limit: 最多认领的条数
+        lease: 认领时长，到期未记录结果的命令会被重新认领
+
+    Returns:
+        List[Dict[str, Any]]: 命令（id、device_id、attempts）及所属批次的 instance_id、command
+    """
+    now = datetime.now()
+    due = (
+        select(IotdaCommand.id)
+        .where(_DUE_CONDITION, IotdaCommand.next_attempt_at <= now)
+        .order_by(IotdaCommand.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = (await db.execute(
+        update(IotdaCommand)
+        .where(IotdaCommand.id.in_(due.scalar_subquery()))
+        .values(
+            status="sending",
+            attempts=IotdaCommand.attempts + 1,
+            next_attempt_at=now + lease,
+            updated_at=now,
+        )
+        .returning(IotdaCommand.id, IotdaCommand.batch_id, IotdaCommand.device_id, IotdaCommand.attempts)
+        .execution_options(synchronize_session=False)
+    )).mappings().all()
+    if not claimed:
+        await db.commit()
+        return []
+
+    batches = {
+        row.id: row
+        for row in (await db.execute(
+            select(IotdaCommandBatch.id, IotdaCommandBatch.instance_id, IotdaCommandBatch.command)
+            .where(IotdaCommandBatch.id.in_({row["batch_id"] for row in claimed}))
+        )).all()
+    }
+    await db.commit()
+    return [
+        {
+            **row,
+            "instance_id": batches[row["batch_id"]].instance_id,
+            "command": batches[row["batch_id"]].command,
+        }
+        for row in claimed
+    ]
+
+
+async def record_command_results(db: AsyncSession, results: Sequence[Dict[str, Any]]) -> None:
+    """
+    记录下发结果
+
+    Args:
+        db: 数据库会话
+        results: 每项包含 id 以及要更新的字段（status、next_attempt_at、command_id、command_status、error）
+    """
+    if not results:
+        return
+    now = datetime.now()
+    await db.execute(update(IotdaCommand), [{**result, "updated_at": now} for result in results])
+    await db.commit()
+
+
+async def claim_status_refresh(db: AsyncSession, limit: int, older_than: timedelta, max_age: timedelta) -> List[Dict[str, Any]]:
+    """
+    认领需要刷新 IoTDA 状态的命令（已受理、状态未结束、距上次刷新超过 older_than、创建不超过 max_age）
+
+    认领时更新 updated_at，其他任务在 older_than 内不会重复刷新
+
+    Returns:
+        List[Dict[str, Any]]: 命令的 id、device_id、command_id 及所属批次的 instance_id
+    """
+    now = datetime.now()
+    due = (
+        select(IotdaCommand.id)
+        .where(
+            _ACTIVE_CONDITION,
+            IotdaCommand.updated_at <= now - older_than,
+            IotdaCommand.created_at >= now - max_age,
+        )
+        .order_by(IotdaCommand.updated_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = (await db.execute(
+        update(IotdaCommand)
+        .where(IotdaCommand.id.in_(due.scalar_subquery()))
+        .values(updated_at=now)
+        .returning(IotdaCommand.id, IotdaCommand.device_id, IotdaCommand.command_id, IotdaCommand.batch_id)
+        .execution_options(synchronize_session=False)
+    )).mappings().all()
+    if not claimed:
+        await db.commit()
+        return []
+
+    instances = dict((await db.execute(
+        select(IotdaCommandBatch.id, IotdaCommandBatch.instance_id)
+        .where(IotdaCommandBatch.id.in_({row["batch_id"] for row in claimed}))
+    )).all())
+    await db.commit()
+    return [{**row, "instance_id": instances[row["batch_id"]]} for row in claimed]
+
+
+async def get_command_batch_progress(db: AsyncSession, batch_id: int) -> Optional[Dict[str, Any]]:
+    """
+    获取批量命令的下发进度
+
+    Args:
+        db: 数据库会话
+        batch_id: 批次ID
+
+    Returns:
+        Optional[Dict[str, Any]]: 批次不存在时返回 None；否则包含各发件箱状态的数量、
+            各 IoTDA 命令状态的数量、是否全部处理完成，以及部分失败命令的原因
+    """
+    batch = await db.get(IotdaCommandBatch, batch_id)
+    if batch is None:
+        return None
+
+    counts = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+    command_statuses: Dict[str, int] = {}
+    for row in (await db.execute(
+        select(IotdaCommand.status, IotdaCommand.command_status, func.count().label("devices"))
+        .where(IotdaCommand.batch_id == batch_id)
+        .group_by(IotdaCommand.status, IotdaCommand.command_status)
+    )).all():
+        counts[row.status] = counts.get(row.status, 0) + row.devices
+        if row.command_status:
+            command_statuses[row.command_status] = command_statuses.get(row.command_status, 0) + row.devices
+
+    failures = (await db.execute(
+        select(IotdaCommand.device_id, IotdaCommand.attempts, IotdaCommand.error)
+        .where(IotdaCommand.batch_id == batch_id, IotdaCommand.status == "failed")
+        .order_by(IotdaCommand.id)
+        .limit(MAX_REPORTED_FAILURES)
+    )).mappings().all()
+
+    return {
+        "batch_id": batch.id,
+        "instance_id": batch.instance_id,
+        "command": batch.command,
+        "total": batch.total,
+        "created_at": batch.created_at,
+        **counts,
+        "done": counts["pending"] + counts["sending"] == 0,
+        "command_statuses": command_statuses,
+        "failures": [dict(row) for row in failures],
+    }
@@ -0,0 +1,352 @@
+"""
+IoTDA 设备镜像的读写
+
+写入由 service.iotda_sync 的后台同步任务调用；查询返回与华为云对应接口相同结构的字典
+({"devices"/"device_groups": [...], "page": {"count", "marker"}})，marker 为本页最后一条记录的ID
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.iotda_device import IotdaDevice
+from models.iotda_device_group import IotdaDeviceGroup
+from models.iotda_device_group_member import IotdaDeviceGroupMember
+from models.iotda_sync_state import IotdaSyncState
+
+# 与 IoTDA 查询设备列表 (QueryDeviceSimplify) 一致的字段
+DEVICE_FIELDS = (
+    "app_id", "app_name", "device_id", "node_id", "gateway_id", "device_name", "node_type",
+    "description", "fw_version", "sw_version", "device_sdk_version", "product_id", "product_name",
+    "status", "tags",
+)
+# 与 IoTDA 查询设备组列表 (DeviceGroupResponseSummary) 一致的字段
+GROUP_FIELDS = ("group_id", "name", "description", "super_group_id", "group_type")
+# 与 IoTDA 查询设备组设备列表 (SimplifyDevice) 一致的字段
+GROUP_DEVICE_FIELDS = ("device_id", "node_id", "device_name", "product_id")
+
+
+def _page(items: List[Dict[str, Any]], count: int, key: str) -> Dict[str, Any]:
+    return {"count": count, "marker": items[-1][key] if items else None}
+
+
+async def get_sync_state(db: AsyncSession, instance_id: str) -> Optional[IotdaSyncState]:
+    """获取实例的同步状态"""
+    return await db.get(IotdaSyncState, instance_id)
+
+
+async def acquire_sync_lease(
+    db: AsyncSession, instance_id: str, now: datetime, lease: timedelta
+) -> Optional[IotdaSyncState]:
+    """
+    获取同步租约，租约未过期（其他进程正在同步）时返回 None
+
+    Args:
+        db: 数据库会话
+        instance_id: 实例ID
+        now: 当前时间
+        lease: 租约时长
+
+    Returns:
+        Optional[IotdaSyncState]: 获取成功时返回同步状态
+    """
+    await db.execute(
+        pg_insert(IotdaSyncState)
+        .values(instance_id=instance_id)
+        .on_conflict_do_nothing(index_elements=[IotdaSyncState.instance_id])
+    )
+    state = (await db.execute(
+        update(IotdaSyncState)
+        .where(
+            IotdaSyncState.instance_id == instance_id,
+            or_(IotdaSyncState.lease_until.is_(None), IotdaSyncState.lease_until < now),
+        )
+        .values(lease_until=now + lease)
+        .returning(IotdaSyncState)
+    )).scalar_one_or_none()
+    await db.commit()
+    return state
+
+
+async def release_sync_lease(db: AsyncSession, instance_id: str, **values: Any) -> None:
+    """释放同步租约并更新同步状态（同步时间、水位、错误信息）"""
+    await db.execute(
+        update(IotdaSyncState)
+        .where(IotdaSyncState.instance_id == instance_id)
+        .values(lease_until=None, **values)
+    )
+    await db.commit()
+
+
+async def upsert_devices(
+    db: AsyncSession, instance_id: str, devices: Sequence[Dict[str, Any]], synced_at: datetime
+) -> None:
+    """写入一页设备（IoTDA 查询设备列表返回的字典）"""
+    if not devices:
+        return
+    rows = [
+        {"instance_id": instance_id, "synced_at": synced_at, **{field: device.get(field) for field in DEVICE_FIELDS}}
+        for device in devices
+    ]
+    stmt = pg_insert(IotdaDevice).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[IotdaDevice.instance_id, IotdaDevice.device_id],
+        set_={field: stmt.excluded[field] for field in (*DEVICE_FIELDS, "synced_at") if field != "device_id"},
+    ))
+
+
+async def upsert_device_groups(
+    db: AsyncSession, instance_id: str, groups: Sequence[Dict[str, Any]], synced_at: datetime
+) -> None:
+    """写入一页设备组（IoTDA 查询设备组列表返回的字典）"""
+    if not groups:
+        return
+    rows = [
+        {"instance_id": instance_id, "synced_at": synced_at, **{field: group.get(field) for field in GROUP_FIELDS}}
+        for group in groups
+    ]
+    stmt = pg_insert(IotdaDeviceGroup).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[IotdaDeviceGroup.instance_id, IotdaDeviceGroup.group_id],
+        set_={field: stmt.excluded[field] for field in (*GROUP_FIELDS, "synced_at") if field != "group_id"},
+    ))
+
+
+async def upsert_group_members(
+    db: AsyncSession, instance_id: str, group_id: str, device_ids: Sequence[str], synced_at: datetime
+) -> None:
+    """写入设备组的成员"""
+    if not device_ids:
+        return
+    stmt = pg_insert(IotdaDeviceGroupMember).values([
+        {"instance_id": instance_id, "group_id": group_id, "device_id": device_id, "synced_at": synced_at}
+        for device_id in device_ids
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[
+            IotdaDeviceGroupMember.instance_id, IotdaDeviceGroupMember.group_id, IotdaDeviceGroupMember.device_id
+        ],
+        set_={"synced_at": stmt.excluded.synced_at},
+    ))
+
+
+async def delete_stale(db: AsyncSession, instance_id: str, synced_before: datetime) -> Dict[str, int]:
+    """
+    删除全量同步中未再出现的设备、设备组与成员关系
+
+    Args:
+        db: 数据库会话
+        instance_id: 实例ID
+        synced_before: 本次全量同步的开始时间，之前同步的记录在 IoTDA 中已不存在
+
+    Returns:
+        Dict[str, int]: 各表删除的行数
+    """
+    deleted = {}
+    for name, model in (
+        ("devices", IotdaDevice),
+        ("device_groups", IotdaDeviceGroup),
+        ("group_members", IotdaDeviceGroupMember),
+    ):
+        result = await db.execute(
+            delete(model).where(model.instance_id == instance_id, model.synced_at < synced_before)
+        )
+        deleted[name] = result.rowcount
+    return deleted
+
+
+async def delete_device(db: AsyncSession, instance_id: str, device_id: str) -> None:
+    """从镜像中删除设备及其设备组成员关系（设备在 IoTDA 中删除后立即调用）"""
+    await db.execute(delete(IotdaDeviceGroupMember).where(
+        IotdaDeviceGroupMember.instance_id == instance_id, IotdaDeviceGroupMember.device_id == device_id
+    ))
+    await db.execute(delete(IotdaDevice).where(
+        IotdaDevice.instance_id == instance_id, IotdaDevice.device_id == device_id
+    ))
+    await db.commit()
+
+
+async def list_devices(
+    db: AsyncSession,
+    instance_id: str,
+    product_id: Optional[str] = None,
+    gateway_id: Optional[str] = None,
+    node_id: Optional[str] = None,
+    device_name: Optional[str] = None,
+    app_id: Optional[str] = None,
+    limit: int = 10,
+    marker: Optional[str] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    从镜像查询设备列表
+
+    Args:
+        db: 数据库会话
+        instance_id: 实例ID
+        product_id, gateway_id, node_id, device_name, app_id: 过滤条件（精确匹配）
+        limit: 每页条数
+        marker: 上一页最后一个设备ID
+        offset: 从 marker 之后跳过的条数
+
+    Returns:
+        Dict[str, Any]: {"devices": [...], "page": {"count": 满足条件的设备总数, "marker": 本页最后一个设备ID}}
+    """
+    filters = {
+        "product_id": product_id,
+        "gateway_id": gateway_id,
+        "node_id": node_id,
+        "device_name": device_name,
+        "app_id": app_id,
+    }
+    # 总数在 marker 过滤之前用窗口函数统计，一次查询同时返回本页与总数
+    matched = (
+        select(IotdaDevice, func.count().over().label("total"))
+        .where(IotdaDevice.instance_id == instance_id)
+        .where(*(getattr(IotdaDevice, field) == value for field, value in filters.items() if value is not None))
+        .subquery()
+    )
+    stmt = select(matched).order_by(matched.c.device_id).offset(offset).limit(limit)
+    if marker:
+        stmt = stmt.where(matched.c.device_id > marker)
+    rows = (await db.execute(stmt)).mappings().all()
+
+    devices = [{field: row[field] for field in DEVICE_FIELDS} for row in rows]
+    return {"devices": devices, "page": _page(devices, rows[0]["total"] if rows else 0, "device_id")}
+
+
+async def show_device(db: AsyncSession, instance_id: str, device_id: str) -> Optional[Dict[str, Any]]:
+    """从镜像查询单个设备，不存在时返回 None"""
+    device = await db.get(IotdaDevice, (instance_id, device_id))
+    if device is None:
+        return None
+    return {field: getattr(device, field) for field in DEVICE_FIELDS}
+
+
+async def list_device_groups(
+    db: AsyncSession,
+    instance_id: str,
+    name: Optional[str] = None,
+    group_type: Optional[str] = None,
+    limit: int = 10,
+    marker: Optional[str] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    从镜像查询设备组列表
+
+    Returns:
+        Dict[str, Any]: {"device_groups": [...], "page": {"count", "marker"}}
+    """
+    matched = select(IotdaDeviceGroup, func.count().over().label("total")).where(
+        IotdaDeviceGroup.instance_id == instance_id
+    )
+    if name is not None:
+        matched = matched.where(IotdaDeviceGroup.name == name)
+    if group_type is not None:
+        matched = matched.where(IotdaDeviceGroup.group_type == group_type)
+    matched = matched.subquery()
+    stmt = select(matched).order_by(matched.c.group_id).offset(offset).limit(limit)
+    if marker:
+        stmt = stmt.where(matched.c.group_id > marker)
+    rows = (await db.execute(stmt)).mappings().all()
+
+    groups = [{field: row[field] for field in GROUP_FIELDS} for row in rows]
+    return {"device_groups": groups, "page": _page(groups, rows[0]["total"] if rows else 0, "group_id")}
+
+
+def _group_devices_query(instance_id: str, group_ids: Sequence[str]):
+    """设备组成员及其设备信息，附带每个设备组内的序号与成员总数"""
+    member = IotdaDeviceGroupMember
+    return (
+        select(
+            member.group_id,
+            member.device_id,
+            IotdaDevice.node_id,
+            IotdaDevice.device_name,
+            IotdaDevice.product_id,
+            func.row_number().over(partition_by=member.group_id, order_by=member.device_id).label("position"),
+            func.count().over(partition_by=member.group_id).label("total"),
+        )
+        .select_from(member)
+        # 成员关系可能先于设备本身同步到镜像，设备信息缺失时只返回设备ID
+        .outerjoin(
+            IotdaDevice,
+            (IotdaDevice.instance_id == member.instance_id) & (IotdaDevice.device_id == member.device_id),
+        )
+        .where(member.instance_id == instance_id, member.group_id.in_(group_ids))
+    )
+
+
+async def _existing_groups(db: AsyncSession, instance_id: str, group_ids: Sequence[str]) -> set:
+    return set((await db.scalars(
+        select(IotdaDeviceGroup.group_id).where(
+            IotdaDeviceGroup.instance_id == instance_id, IotdaDeviceGroup.group_id.in_(group_ids)
+        )
+    )).all())
+
+
+async def show_devices_in_group(
+    db: AsyncSession,
+    instance_id: str,
+    group_id: str,
+    limit: int = 10,
+    marker: Optional[str] = None,
+    offset: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    从镜像查询设备组的设备列表，设备组不存在时返回 None
+
+    Returns:
+        Optional[Dict[str, Any]]: {"devices": [...], "page": {"count", "marker"}}
+    """
+    matched = _group_devices_query(instance_id, [group_id]).subquery()
+    stmt = select(matched).order_by(matched.c.device_id).offset(offset).limit(limit)
+    if marker:
+        stmt = stmt.where(matched.c.device_id > marker)
+    rows = (await db.execute(stmt)).mappings().all()
+    if not rows and not await _existing_groups(db, instance_id, [group_id]):
+        return None
+
+    devices = [{field: row[field] for field in GROUP_DEVICE_FIELDS} for row in rows]
+    return {"devices": devices, "page": _page(devices, rows[0]["total"] if rows else 0, "device_id")}
+
+
+async def show_devices_in_groups(
+    db: AsyncSession, instance_id: str, group_ids: Sequence[str], limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    从镜像查询多个设备组的设备列表（每组前 limit 个设备）
+
+    Returns:
+        List[Dict[str, Any]]: 与 group_ids 顺序一致，每项包含 group_id 以及 result 或 error
+    """
+    matched = _group_devices_query(instance_id, group_ids).subquery()
+    rows = (await db.execute(
+        select(matched)
+        .where(matched.c.position <= limit)
+        .order_by(matched.c.group_id, matched.c.position)
+    )).mappings().all()
+    existing = await _existing_groups(db, instance_id, group_ids)
+
+    devices: Dict[str, List[Dict[str, Any]]] = {}
+    totals: Dict[str, int] = {}
+    for row in rows:
+        devices.setdefault(row["group_id"], []).append({field: row[field] for field in GROUP_DEVICE_FIELDS})
+        totals[row["group_id"]] = row["total"]
+
+    items = []
+    for group_id in group_ids:
+        if group_id not in existing:
+            items.append({"group_id": group_id, "result": None, "error": "设备组不存在或无权访问"})
+            continue
+        group_devices = devices.get(group_id, [])
+        items.append({
+            "group_id": group_id,
+            "result": {"devices": group_devices, "page": _page(group_devices, totals.get(group_id, 0), "device_id")},
+            "error": None,
+        })
+    return items
@@ -1,6 +1,6 @@
-from typing import List
+from typing import Any, List, Optional, Sequence
 
-from sqlalchemy import select, func, and_, distinct
+from sqlalchemy import Select, select, func, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
@@ -10,6 +10,7 @@ from models.drone import Drone
 from models.error import Error
 from schemas.patrol import PatrolInfo, RoadConditionInfo, StatusSummaryResponse, ErrorUpdateResponse
 from loguru import logger
+from utils.pagination import keyset_paginate
 
 
 def format_timedelta(td: timedelta) -> str:
@@ -21,12 +22,18 @@ def format_timedelta(td: timedelta) -> str:
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
-async def get_patrol_list(db: AsyncSession) -> list[PatrolInfo]:
+async def get_patrol_list(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+) -> list[PatrolInfo]:
     """
     获取巡逻列表信息
     
     Args:
         db: 数据库会话
+        limit: 每页条数，为空时返回全部；分页时多返回一条用于判断是否还有下一页
+        after: 上一页最后一条的 (巡查记录ID,)，按巡查记录ID键集分页
         
     Returns:
         list[PatrolInfo]: 巡逻信息列表
@@ -44,6 +51,8 @@ async def get_patrol_list(db: AsyncSession) -> list[PatrolInfo]:
         )
         .join(Patrol, Patrol.drone_id == Drone.id)
     )
+    if limit is not None:
+        query = keyset_paginate(query, [Patrol.id], after, limit)
 
     # 执行查询
     result = await db.execute(query)
@@ -94,55 +103,55 @@ async def get_patrol_list(db: AsyncSession) -> list[PatrolInfo]:
     return patrols
 
 
-async def get_road_conditions(db: AsyncSession) -> list[RoadConditionInfo]:
+def road_conditions_query() -> Select:
     """
-    获取道路状况信息
-    
-    Args:
-        db: 数据库会话
-        
+    构建每架无人机最新一条巡查记录的查询
+
     Returns:
-        list[RoadConditionInfo]: 道路状况信息列表
+        Select: 按无人机编号排序的查询
     """
-    # 构建子查询，获取每个无人机最新的记录
-    subquery = (
-        select(
-            Patrol.drone_id,
-            func.max(Patrol.update_time).label('max_time')
-        )
-        .group_by(Patrol.drone_id)
-        .subquery()
+    # 逐个无人机通过 LATERAL 子查询取最新的一条巡查记录，
+    # 配合 (drone_id, update_time DESC, id DESC) 索引每架无人机只需一次索引探测，
+    # 耗时与无人机数量成正比，不随巡查历史增长
+    latest = (
+        select(Patrol.address, Patrol.update_time, Patrol.error_id)
+        .where(Patrol.drone_id == Drone.id, Patrol.update_time.is_not(None))
+        .order_by(Patrol.update_time.desc(), Patrol.id.desc())
+        .limit(1)
+        .lateral("latest")
     )
 
-    # 构建主查询，使用DISTINCT确保数据不重复
-    query = (
+    return (
         select(
-            Patrol.drone_id,
-            Patrol.address,  # 添加address字段
-            Patrol.update_time,
-            Patrol.error_id,
+            Drone.id.label("drone_id"),
+            latest.c.address,
+            latest.c.update_time,
+            latest.c.error_id,
             Error.error_content
         )
-        .join(subquery,
-              and_(
-                  Patrol.drone_id == subquery.c.drone_id,
-                  Patrol.update_time == subquery.c.max_time
-              )
-              )
-        .outerjoin(Error, Patrol.error_id == Error.error_id)  # 修改连接条件，使用error_id
-        .distinct(Patrol.drone_id)  # 使用distinct确保每个无人机只返回一条记录
-        .order_by(Patrol.drone_id)
+        .select_from(Drone)
+        .join(latest, true())
+        .outerjoin(Error, latest.c.error_id == Error.error_id)
+        .order_by(Drone.id)
     )
 
-    # 打印SQL语句用于调试
-    compiled_sql = str(query.compile(compile_kwargs={"literal_binds": True}))
-    logger.debug(f"执行的SQL: {compiled_sql}")
+
+async def get_road_conditions(db: AsyncSession) -> list[RoadConditionInfo]:
+    """
+    获取道路状况信息
+    
+    Args:
+        db: 数据库会话
+        
+    Returns:
+        list[RoadConditionInfo]: 道路状况信息列表
+    """
+    query = road_conditions_query()
 
     try:
         # 执行查询
         result = await db.execute(query)
         rows = result.all()
-        logger.debug(f"数据库查询返回的结果: {rows}")
 
         # 处理数据
         conditions = []
@@ -155,8 +164,6 @@ async def get_road_conditions(db: AsyncSession) -> list[RoadConditionInfo]:
             if row.error_id is None:
                 status = "正常"
             else:
-                # 打印错误信息用于调试
-                logger.info(f"Error ID: {row.error_id}, Error Content: {row.error_content}")
                 status = row.error_content if row.error_content else "未知错误"
 
             conditions.append(RoadConditionInfo(
@@ -165,11 +172,7 @@ async def get_road_conditions(db: AsyncSession) -> list[RoadConditionInfo]:
                 status=status
             ))
 
-        # 打印巡检状态信息
-        logger.debug("巡检状态信息:")
-        for condition in conditions:
-            logger.debug(f"巡查路段: {condition.id}, 时间: {condition.time}, 状态: {condition.status}")
-
+        logger.debug(f"获取道路状况: {len(conditions)} 架无人机")
         return conditions
     except Exception as e:
         logger.error(f"获取道路状况失败: {str(e)}")
@@ -187,35 +190,24 @@ async def get_status_summary(db: AsyncSession) -> StatusSummaryResponse:
         StatusSummaryResponse: 状态统计信息
     """
     try:
-        # 获取无人机总数
-        total_query = select(func.count(Drone.id))
-        total_result = await db.execute(total_query)
-        total = total_result.scalar()
-
-        # 获取飞行中的无人机数量
-        flying_query = select(func.count(Drone.id)).where(Drone.states == '1')
-        flying_result = await db.execute(flying_query)
-        flying = flying_result.scalar()
-
-        # 获取巡检记录总数
-        inspecting_query = select(func.count(Patrol.id))
-        inspecting_result = await db.execute(inspecting_query)
-        inspecting = inspecting_result.scalar()
-
-        # 获取错误总数
-        issues_found_query = select(func.count(Error.error_id))
-        issues_found_result = await db.execute(issues_found_query)
-        issues_found = issues_found_result.scalar()
-
-        # 获取待处理错误数量
-        pending_issues_query = select(func.count(Error.error_id)).where(Error.states == '0')
-        pending_issues_result = await db.execute(pending_issues_query)
-        pending_issues = pending_issues_result.scalar()
-
-        # 获取处理中的错误数量
-        solving_issues_query = select(func.count(Error.error_id)).where(Error.states == '1')
-        solving_issues_result = await db.execute(solving_issues_query)
-        solving_issues = solving_issues_result.scalar()
+        # 三张表各聚合一次，FILTER 在同一次扫描中统计子集，合并为一条SQL一次往返
+        drone_stats = select(
+            func.count().label("total"),
+            func.count().filter(Drone.states == '1').label("flying"),
+        ).select_from(Drone).subquery()
+        patrol_stats = select(
+            func.count().label("inspecting"),
+        ).select_from(Patrol).subquery()
+        error_stats = select(
+            func.count().label("issues_found"),
+            func.count().filter(Error.states == '0').label("pending_issues"),
+            func.count().filter(Error.states == '1').label("solving_issues"),
+        ).select_from(Error).subquery()
+
+        query = select(drone_stats, patrol_stats, error_stats)
+        row = (await db.execute(query)).one()
+        total, flying, inspecting = row.total, row.flying, row.inspecting
+        issues_found, pending_issues, solving_issues = row.issues_found, row.pending_issues, row.solving_issues
 
         return StatusSummaryResponse(
             total=total,
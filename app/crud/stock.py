@@ -1,14 +1,27 @@
-from typing import Optional, List
+from collections import defaultdict
+from typing import Any, Dict, Optional, List, Sequence, Tuple, TypeVar
 from datetime import datetime
-from sqlalchemy import select, delete, update
+from sqlalchemy import func, insert, select, delete, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from loguru import logger
 from fastapi import HTTPException, status
 
+from core.config import settings
 from models.stock import Stock
-from schemas.stock import StockUpdate, StockStatisticsResponse, StockBase
+from schemas.stock import (
+    StockUpdate,
+    StockStatisticsResponse,
+    StockBase,
+    StockBulkLine,
+    StockBulkLineResult,
+    StockBulkResponse,
+)
 from models.goods import Goods
+from models.warehouse import Warehouse
+from utils.pagination import keyset_paginate
+from core.data_version import bump_data_version
 
 
 async def check_stock_exists(db: AsyncSession, warehouse_id: int, goods_id: int) -> Optional[Stock]:
@@ -70,6 +83,7 @@ async def create_stock(db: AsyncSession, stock: StockBase) -> Stock:
         )
         db.add(db_stock)
         await db.commit()
+        bump_data_version("stock")
         await db.refresh(db_stock)
         
         # 增加last_add_time字段以便与Schema匹配
@@ -78,6 +92,16 @@ async def create_stock(db: AsyncSession, stock: StockBase) -> Stock:
         return db_stock
     except HTTPException:
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        if "uq_stock_warehouse_id_goods_id" not in str(e.orig):
+            logger.error(f"创建库存记录失败: {str(e)}")
+            raise
+        # 并发创建同一组合时由唯一约束拦截
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"仓库ID {stock.warehouse_id} 和商品ID {stock.goods_id} 的库存记录已存在，请使用更新接口"
+        )
     except SQLAlchemyError as e:
         logger.error(f"创建库存记录失败: {str(e)}")
         await db.rollback()
@@ -107,13 +131,20 @@ async def get_stock(db: AsyncSession, stock_id: int) -> Optional[Stock]:
         raise
 
 
-async def get_stocks_by_warehouse(db: AsyncSession, warehouse_id: int):
+async def get_stocks_by_warehouse(
+    db: AsyncSession,
+    warehouse_id: int,
+    limit: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+):
     """
-    获取指定仓库的所有库存记录
+    获取指定仓库的库存记录
     
     Args:
         db: 数据库会话
         warehouse_id: 仓库ID
+        limit: 每页条数，为空时返回全部；分页时多返回一条用于判断是否还有下一页
+        after: 上一页最后一条的 (库存ID,)，按库存ID键集分页
         
     Returns:
         List[Stock]: 库存记录列表
@@ -125,6 +156,8 @@ async def get_stocks_by_warehouse(db: AsyncSession, warehouse_id: int):
             .join(Goods, Stock.goods_id == Goods.id)
             .where(Stock.warehouse_id == warehouse_id)
         )
+        if limit is not None:
+            query = keyset_paginate(query, [Stock.id], after, limit)
         result = await db.execute(query)
         rows = result.all()  # 每项是 (Stock, Goods) 的元组
 
@@ -146,6 +179,47 @@ async def get_stocks_by_warehouse(db: AsyncSession, warehouse_id: int):
         raise
 
 
+async def _apply_stock_update(db: AsyncSession, condition: Any, stock: StockUpdate) -> Optional[Stock]:
+    """
+    用一条 UPDATE ... RETURNING 原子地更新满足条件的库存记录
+
+    只提供 last_add_count 时在数据库中执行 all_count = all_count + last_add_count，
+    并在同一条语句中校验结果不小于0，并发调整同一库存不会丢失更新；
+    同时提供 all_count 时按给定值直接设置总库存量
+
+    Raises:
+        HTTPException: 调整后库存小于0时返回 409
+    """
+    update_data = {field: value for field, value in stock.dict(exclude_unset=True).items() if value is not None}
+    stmt = update(Stock).where(condition)
+
+    if "last_add_count" in update_data:
+        update_data["last_add_date"] = datetime.now()
+        if "all_count" not in update_data:
+            delta = update_data["last_add_count"]
+            update_data["all_count"] = Stock.all_count + delta
+            stmt = stmt.where(Stock.all_count + delta >= 0)
+
+    if not update_data:
+        return (await db.execute(select(Stock).where(condition))).scalar_one_or_none()
+
+    result = await db.execute(stmt.values(**update_data).returning(Stock))
+    db_stock = result.scalar_one_or_none()
+    if db_stock is None:
+        await db.rollback()
+        # 没有更新任何行：区分记录不存在与库存不足
+        if await db.scalar(select(Stock.id).where(condition)) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="库存不足"
+            )
+        return None
+
+    await db.commit()
+    bump_data_version("stock")
+    return db_stock
+
+
 async def update_stock(db: AsyncSession, stock_id: int, stock: StockUpdate) -> Optional[Stock]:
     """
     更新库存记录
@@ -153,52 +227,55 @@ async def update_stock(db: AsyncSession, stock_id: int, stock: StockUpdate) -> O
     Args:
         db: 数据库会话
         stock_id: 库存ID
-        stock: 库存更新模型
+        stock: 库存更新模型，last_add_count 为库存调整量（可以为负数）
         
     Returns:
         Stock: 更新后的库存对象或None
+
+    Raises:
+        HTTPException: 调整后库存小于0时返回 409
     """
     try:
-        db_stock = await get_stock(db, stock_id)
-        if not db_stock:
-            return None
-        
-        update_data = stock.dict(exclude_unset=True)
-        
-        # 检查是否提供了last_add_count，如果有则更新all_count
-        if "last_add_count" in update_data:
-            # 提取last_add_count值
-            last_add_count = update_data["last_add_count"]
-            
-            # 计算新的总库存量
-            new_all_count = db_stock.all_count + last_add_count
-            
-            # 确保total_count不小于0
-            if new_all_count < 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="库存不足"
-                )
-            
-            # 更新all_count
-            # update_data["all_count"] = new_all_count
-            
-            # 更新last_add_date
-            update_data["last_add_date"] = datetime.now()
-        
-        for field, value in update_data.items():
-            setattr(db_stock, field, value)
-        
-        await db.commit()
-        await db.refresh(db_stock)
-        
-        return db_stock
+        return await _apply_stock_update(db, Stock.id == stock_id, stock)
     except SQLAlchemyError as e:
         logger.error(f"更新库存记录(ID:{stock_id})失败: {str(e)}")
         await db.rollback()
         raise
 
 
+async def update_stock_by_warehouse_goods(
+    db: AsyncSession,
+    warehouse_id: int,
+    goods_id: int,
+    stock: StockUpdate,
+) -> Optional[Stock]:
+    """
+    根据仓库ID和商品ID更新库存记录
+    
+    Args:
+        db: 数据库会话
+        warehouse_id: 仓库ID
+        goods_id: 商品ID
+        stock: 库存更新模型，last_add_count 为库存调整量（可以为负数）
+        
+    Returns:
+        Stock: 更新后的库存对象或None
+
+    Raises:
+        HTTPException: 调整后库存小于0时返回 409
+    """
+    try:
+        return await _apply_stock_update(
+            db,
+            (Stock.warehouse_id == warehouse_id) & (Stock.goods_id == goods_id),
+            stock,
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"更新库存记录(仓库ID:{warehouse_id}, 商品ID:{goods_id})失败: {str(e)}")
+        await db.rollback()
+        raise
+
+
 async def delete_stock(db: AsyncSession, stock_id: int) -> bool:
     """
     删除库存记录
@@ -220,6 +297,7 @@ async def delete_stock(db: AsyncSession, stock_id: int) -> bool:
         
         await db.delete(db_stock)
         await db.commit()
+        bump_data_version("stock")
         return True
     except SQLAlchemyError as e:
         logger.error(f"删除库存记录(ID:{stock_id})失败: {str(e)}")
@@ -271,3 +349,163 @@ async def get_stock_statistics_by_warehouse(
         existingData=existing_data,
         newData=new_data
     )
+
+
+T = TypeVar("T")
+
+# 按名称创建货物时使用的事务级咨询锁键
+_GOODS_NAME_LOCK_KEY = 0x6A697368
+
+
+def _chunks(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def _existing_ids(db: AsyncSession, column: Any, ids: Sequence[int]) -> set:
+    """分批查询存在的ID"""
+    found = set()
+    for chunk in _chunks(sorted(ids), settings.STOCK_BULK_BATCH_SIZE):
+        found.update((await db.scalars(select(column).where(column.in_(chunk)))).all())
+    return found
+
+
+async def _upsert_goods_by_name(db: AsyncSession, names: Sequence[str]) -> Tuple[Dict[str, int], int]:
+    """
+    按名称查找货物，不存在的批量创建
+
+    货物名称没有唯一约束，用事务级咨询锁串行化按名称创建货物，避免并发导入重复创建
+
+    Returns:
+        Tuple[Dict[str, int], int]: 名称 -> 货物ID，新创建的货物数
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(_GOODS_NAME_LOCK_KEY)))
+    goods_ids: Dict[str, int] = {}
+    for chunk in _chunks(sorted(names), settings.STOCK_BULK_BATCH_SIZE):
+        rows = await db.execute(
+            select(Goods.goods_name, func.min(Goods.id))
+            .where(Goods.goods_name.in_(chunk))
+            .group_by(Goods.goods_name)
+        )
+        goods_ids.update({name: goods_id for name, goods_id in rows})
+
+    missing = sorted(set(names) - goods_ids.keys())
+    for chunk in _chunks(missing, settings.STOCK_BULK_BATCH_SIZE):
+        rows = await db.execute(
+            insert(Goods).values([{"goods_name": name} for name in chunk]).returning(Goods.goods_name, Goods.id)
+        )
+        goods_ids.update({name: goods_id for name, goods_id in rows})
+    return goods_ids, len(missing)
+
+
+async def bulk_apply_stock_deltas(db: AsyncSession, lines: Sequence[StockBulkLine]) -> StockBulkResponse:
+    """
+    批量入库：在一个事务中按行调整库存
+
+    - 仓库或货物ID不存在的行直接失败；只提供 goods_name 的行按名称匹配货物，不存在时自动创建
+    - 涉及的已有库存记录按 (仓库ID, 货物ID) 顺序加行锁后逐行累加调整量，
+      某一行会使库存小于0时该行失败，不影响其他行
+    - 每个 (仓库ID, 货物ID) 的净调整量通过分批的 INSERT ... ON CONFLICT DO UPDATE 一次写入，最后只提交一次
+
+    Args:
+        db: 数据库会话
+        lines: 入库明细
+
+    Returns:
+        StockBulkResponse: 与明细顺序一致的逐行结果
+    """
+    results: List[Optional[StockBulkLineResult]] = [None] * len(lines)
+
+    def fail(index: int, detail: str) -> None:
+        results[index] = StockBulkLineResult(line=index + 1, status="error", detail=detail)
+
+    try:
+        valid_warehouses = await _existing_ids(db, Warehouse.id, list({line.warehouse_id for line in lines}))
+        valid_goods = await _existing_ids(
+            db, Goods.id, list({line.goods_id for line in lines if line.goods_id is not None})
+        )
+
+        pending: List[Tuple[int, StockBulkLine]] = []
+        for index, line in enumerate(lines):
+            if line.warehouse_id not in valid_warehouses:
+                fail(index, f"仓库ID {line.warehouse_id} 不存在")
+            elif line.goods_id is not None and line.goods_id not in valid_goods:
+                fail(index, f"货物ID {line.goods_id} 不存在")
+            else:
+                pending.append((index, line))
+
+        names = {line.goods_name.strip() for _, line in pending if line.goods_id is None}
+        goods_by_name, created_goods = await _upsert_goods_by_name(db, list(names)) if names else ({}, 0)
+
+        keyed: List[Tuple[int, int, Tuple[int, int]]] = []
+        for index, line in pending:
+            goods_id = line.goods_id if line.goods_id is not None else goods_by_name[line.goods_name.strip()]
+            keyed.append((index, line.delta, (line.warehouse_id, goods_id)))
+
+        # 锁定已有的库存记录，固定加锁顺序避免并发导入之间死锁
+        counts: Dict[Tuple[int, int], int] = {}
+        for chunk in _chunks(sorted({key for _, _, key in keyed}), settings.STOCK_BULK_BATCH_SIZE):
+            rows = await db.execute(
+                select(Stock.warehouse_id, Stock.goods_id, Stock.all_count)
+                .where(tuple_(Stock.warehouse_id, Stock.goods_id).in_(chunk))
+                .order_by(Stock.warehouse_id, Stock.goods_id)
+                .with_for_update()
+            )
+            counts.update({(warehouse_id, goods_id): all_count for warehouse_id, goods_id, all_count in rows})
+
+        net: Dict[Tuple[int, int], int] = defaultdict(int)
+        accepted: List[Tuple[int, Tuple[int, int]]] = []
+        for index, delta, key in keyed:
+            current = counts.get(key, 0)
+            if current + delta < 0:
+                fail(index, f"库存不足: 当前 {current}，调整 {delta}")
+                continue
+            counts[key] = current + delta
+            net[key] += delta
+            accepted.append((index, key))
+
+        final: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        if net:
+            now = datetime.now()
+            stmt = pg_insert(Stock)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Stock.warehouse_id, Stock.goods_id],
+                set_={
+                    "all_count": Stock.all_count + stmt.excluded.all_count,
+                    "last_add_count": stmt.excluded.last_add_count,
+                    "last_add_date": stmt.excluded.last_add_date,
+                },
+            ).returning(Stock.warehouse_id, Stock.goods_id, Stock.id, Stock.all_count)
+            rows = [
+                {"warehouse_id": warehouse_id, "goods_id": goods_id,
+                 "all_count": delta, "last_add_count": delta, "last_add_date": now}
+                for (warehouse_id, goods_id), delta in net.items()
+            ]
+            for chunk in _chunks(rows, settings.STOCK_BULK_BATCH_SIZE):
+                result = await db.execute(stmt.values(list(chunk)))
+                final.update({
+                    (warehouse_id, goods_id): (stock_id, all_count)
+                    for warehouse_id, goods_id, stock_id, all_count in result
+                })
+
+        await db.commit()
+        if created_goods:
+            bump_data_version("goods")
+        bump_data_version("stock")
+    except SQLAlchemyError as e:
+        logger.error(f"批量入库失败: {str(e)}")
+        await db.rollback()
+        raise
+
+    for index, key in accepted:
+        stock_id, all_count = final[key]
+        results[index] = StockBulkLineResult(
+            line=index + 1, status="ok", stock_id=stock_id, goods_id=key[1], all_count=all_count
+        )
+    succeeded = len(accepted)
+    return StockBulkResponse(
+        total=len(lines),
+        succeeded=succeeded,
+        failed=len(lines) - succeeded,
+        created_goods=created_goods,
+        results=results,
+    )
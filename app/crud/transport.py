@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.transport import Transport
 from schemas.transport import TransportCreate, TransportUpdate
+from core.data_version import bump_data_version
+from utils.pagination import keyset_paginate
 
 
 async def get_transport(db: AsyncSession, transport_id: int) -> Optional[Transport]:
@@ -21,19 +23,27 @@ async def get_transport(db: AsyncSession, transport_id: int) -> Optional[Transpo
     return result.scalar_one_or_none()
 
 
-async def get_transports(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Transport]:
+async def get_transports(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None,
+) -> List[Transport]:
     """
-    从数据库异步获取运输记录列表（支持分页）。
+    从数据库异步获取运输记录列表（按 ID 键集分页）。
 
     Args:
         db: SQLAlchemy AsyncSession 对象。
-        skip: 跳过的记录数。
-        limit: 返回的最大记录数。
+        skip: 跳过的记录数（已弃用，仅在未使用游标时生效）。
+        limit: 每页记录数，多返回一条用于判断是否还有下一页。
+        after: 上一页最后一条记录的 (id,)。
 
     Returns:
         Transport SQLAlchemy 对象的列表。
     """
-    stmt = select(Transport).offset(skip).limit(limit)
+    stmt = keyset_paginate(select(Transport), [Transport.id], after, limit)
+    if skip and not after:
+        stmt = stmt.offset(skip)
     result = await db.execute(stmt)
     return result.scalars().all()
 
@@ -52,6 +62,7 @@ async def create_transport(db: AsyncSession, transport: TransportCreate) -> Tran
     db_transport = Transport(**transport.model_dump())
     db.add(db_transport)
     await db.commit()
+    bump_data_version("transport")
     await db.refresh(db_transport)
     return db_transport
 
@@ -79,6 +90,7 @@ async def update_transport(
 
     db.add(db_obj)
     await db.commit()
+    bump_data_version("transport")
     await db.refresh(db_obj)
     return db_obj
 
@@ -99,5 +111,6 @@ async def delete_transport(db: AsyncSession, transport_id: int) -> Optional[Tran
     if db_obj:
         await db.delete(db_obj)
         await db.commit()
+        bump_data_version("transport")
         return db_obj
     return None
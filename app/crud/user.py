@@ -1,5 +1,6 @@
-from typing import Optional, List, Dict, Any, Union
-from sqlalchemy import select, delete, update
+from typing import Optional, List, Dict, Any, Sequence, Union
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
@@ -9,9 +10,12 @@ from models.user import User
 from models.user_role import UserRole
 from models.role import Role
 from models.error import Error
-from core.password import verify_password, get_password_hash
+from core.password import verify_password_async, get_password_hash_async
+from core.principal_cache import invalidate_principal
+from core.data_version import bump_data_version
 from schemas.user import UserCreate, UserUpdate, UserResponse
 from sqlalchemy import and_
+from utils.pagination import keyset_paginate
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
@@ -69,13 +73,102 @@ async def get_user_roles(db: AsyncSession, user_id: int) -> List[Role]:
         query = select(Role).join(UserRole).where(UserRole.user_id == user_id)
         result = await db.execute(query)
         roles = list(result.scalars().all())
-        print(f"当前用户角色列表: {[r.role_id for r in roles]}")
+        logger.debug(f"用户(ID:{user_id})角色列表: {[r.role_id for r in roles]}")
         return roles
     except SQLAlchemyError as e:
         logger.error(f"获取用户(ID:{user_id})角色失败: {str(e)}")
         raise
 
 
+def _users_with_roles_query():
+    """
+    用户及其角色ID的聚合查询
+
+    通过 LEFT JOIN user_role 并 array_agg 角色ID，一条SQL取出用户及全部角色，
+    role 取最小的角色ID（与角色检查中超级管理员优先的约定一致），没有角色时为 None
+    """
+    role_ids = func.array_remove(
+        func.array_agg(aggregate_order_by(UserRole.role_id, UserRole.role_id.asc())), None
+    )
+    return (
+        select(
+            User.id,
+            User.username,
+            User.name,
+            User.email,
+            User.phone,
+            User.createtime,
+            role_ids.label("role_ids"),
+        )
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .group_by(User.id)
+    )
+
+
+def _user_row_to_dict(row) -> Dict[str, Any]:
+    """将聚合查询的一行转换为响应字典，不构造ORM对象"""
+    role_ids = row.role_ids or []
+    return {
+        "id": row.id,
+        "username": row.username,
+        "name": row.name,
+        "email": row.email,
+        "phone": row.phone,
+        "createtime": row.createtime,
+        "role": role_ids[0] if role_ids else None,
+        "role_ids": role_ids,
+    }
+
+
+async def list_users_with_roles(
+    db: AsyncSession,
+    limit: int,
+    after: Optional[Sequence[Any]] = None,
+    skip: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    按用户ID分页获取用户及其角色，每页只执行一条SQL
+
+    Args:
+        db: 数据库会话
+        limit: 每页条数，多返回一条用于判断是否还有下一页
+        after: 上一页最后一条的 (用户ID,)
+        skip: 跳过的记录数（已弃用，仅在未使用游标时生效）
+
+    Returns:
+        List[Dict[str, Any]]: 用户字典列表，包含 role（主角色ID）与 role_ids（全部角色ID）
+    """
+    try:
+        query = keyset_paginate(_users_with_roles_query(), [User.id], after, limit)
+        if skip and not after:
+            query = query.offset(skip)
+        result = await db.execute(query)
+        return [_user_row_to_dict(row) for row in result]
+    except SQLAlchemyError as e:
+        logger.error(f"查询用户列表失败: {str(e)}")
+        raise
+
+
+async def get_user_with_roles(db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    获取单个用户及其角色，只执行一条SQL
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+
+    Returns:
+        Optional[Dict[str, Any]]: 用户字典，用户不存在时为 None
+    """
+    try:
+        result = await db.execute(_users_with_roles_query().where(User.id == user_id))
+        row = result.first()
+        return _user_row_to_dict(row) if row else None
+    except SQLAlchemyError as e:
+        logger.error(f"查询用户(ID:{user_id})失败: {str(e)}")
+        raise
+
+
 async def create_user(db: AsyncSession, user_create: UserCreate, role_id: int = 1) -> UserResponse:
     """
     创建新用户
@@ -98,7 +191,7 @@ async def create_user(db: AsyncSession, user_create: UserCreate, role_id: int =
         # 创建用户数据
         user_data = {
             "username": user_create.username,
-            "password": get_password_hash(user_create.password),
+            "password": await get_password_hash_async(user_create.password),
             "email": user_create.email or "default@example.com",
             "name": user_create.name or user_create.username,
             "phone": user_create.phone or "未设置"
@@ -115,6 +208,7 @@ async def create_user(db: AsyncSession, user_create: UserCreate, role_id: int =
         db.add(user_role)
         
         await db.commit()
+        bump_data_version("user", "user_role", "error")
         await db.refresh(db_user)
         logger.info(f"用户创建成功: {db_user.username} (ID: {db_user.id})")
         setattr(db_user, 'role', role_id)
@@ -159,7 +253,11 @@ async def update_user(
         
         # 如果更新包含密码，需要进行哈希处理
         if "password" in update_data:
-            update_data["password"] = get_password_hash(update_data["password"])
+            update_data["password"] = await get_password_hash_async(update_data["password"])
+
+        # 角色变更时记录变更时间，此前签发的令牌中的角色声明随之失效
+        if role_ids is not None:
+            update_data["roles_changed_at"] = func.now()
         
         # 更新用户信息
         if update_data:
@@ -183,6 +281,8 @@ async def update_user(
                 db.add(user_role)
         
         await db.commit()
+        bump_data_version("user", "user_role", "error")
+        invalidate_principal(user_id)
         updated_user = await get_user_by_id(db, user_id)
         # # 如果提供了角色并且列表不为空，给用户对象添加第一个角色的 role 字段
         # if role_ids is not None and len(role_ids) > 0:
@@ -231,6 +331,8 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
             .where(User.id == user_id)
         )
         await db.commit()
+        bump_data_version("user", "user_role", "error")
+        invalidate_principal(user_id)
         logger.info(f"用户删除成功: {user.username} (ID: {user_id})")
         return True
     except SQLAlchemyError as e:
@@ -258,7 +360,7 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
             return None
         
         # 验证密码
-        if not verify_password(password, user.password):
+        if not await verify_password_async(password, user.password):
             logger.warning(f"认证失败: 用户'{username}'密码错误")
             return None
         
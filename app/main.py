@@ -1,6 +1,8 @@
 from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+import os
 import sys
 
 from core.config import settings
@@ -45,12 +47,18 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["*"]  # 允许前端访问所有响应头
+        # 携带凭据的请求中浏览器不认可通配符，需显式列出分页游标等自定义响应头
+        expose_headers=["*", "X-Next-Cursor", "Retry-After", "X-Data-Freshness"]
     )
 
 # 导入路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# 头像存储在本地目录时由应用提供访问
+if settings.AVATAR_STORAGE == "local":
+    os.makedirs(settings.AVATAR_LOCAL_DIR, exist_ok=True)
+    app.mount("/static", StaticFiles(directory=settings.AVATAR_LOCAL_DIR), name="static")
+
 
 @app.get("/")
 async def root():
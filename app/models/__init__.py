@@ -10,6 +10,15 @@ from models.user import User
 from models.user_role import UserRole
 from models.rooms import Rooms
 from models.stream_config import StreamConfig
+from models.geocode_cache import GeocodeCache
+from models.chat_history import ChatHistory
+from models.user_log import UserLog
+from models.iotda_device import IotdaDevice
+from models.iotda_device_group import IotdaDeviceGroup
+from models.iotda_device_group_member import IotdaDeviceGroupMember
+from models.iotda_sync_state import IotdaSyncState
+from models.iotda_command_batch import IotdaCommandBatch
+from models.iotda_command import IotdaCommand
 
 __all__ = [
     "Drone",
@@ -22,5 +31,14 @@ __all__ = [
     "User",
     "UserRole",
     "Rooms",
-    "StreamConfig"
+    "StreamConfig",
+    "GeocodeCache",
+    "ChatHistory",
+    "UserLog",
+    "IotdaDevice",
+    "IotdaDeviceGroup",
+    "IotdaDeviceGroupMember",
+    "IotdaSyncState",
+    "IotdaCommandBatch",
+    "IotdaCommand",
 ]
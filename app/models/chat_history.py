@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class ChatHistory(Base):
+    """
+    聊天记录数据库模型
+
+    表名: jishe.chat_history
+    字段:
+    - id: 自增主键，同一用户内按写入顺序递增
+    - user_id: 用户ID
+    - role: 消息角色 (user / assistant)
+    - content: 消息内容
+    - created_at: 消息时间
+    """
+    __tablename__ = "chat_history"
+    __table_args__ = (
+        Index("ix_chat_history_user_id_id", "user_id", "id"),
+        {"schema": "jishe"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
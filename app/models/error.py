@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy import Column, Index, String, Text, DateTime, Integer
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import func
@@ -19,7 +19,12 @@ class Error(Base):
     - states: 问题状态: 0->待解决, 1->正在解决
     """
     __tablename__ = "error"
-    __table_args__ = {"schema": "jishe"}
+    __table_args__ = (
+        # migrations/005_secondary_indexes.sql
+        Index("ix_error_user_id_error_id", "user_id", "error_id"),
+        Index("ix_error_states", "states"),
+        {"schema": "jishe"},
+    )
     
     # 重命名主键，以匹配数据库
     id = None  # 移除基类中的id
@@ -38,3 +43,11 @@ class Error(Base):
     @declared_attr.directive
     def created_at(cls) -> Mapped[datetime]:
         return mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# 问题列表按发现时间倒序的游标分页 (migrations/005_secondary_indexes.sql)
+Index(
+    "ix_error_found_time_error_id",
+    Error.error_found_time.desc(),
+    Error.error_id.desc(),
+)
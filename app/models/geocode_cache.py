@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Float, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class GeocodeCache(Base):
+    """
+    地理编码缓存数据库模型
+
+    表名: jishe.geocode_cache
+    字段:
+    - cache_key: 规范化后的 地址|城市
+    - address: 原始地址
+    - city: 城市
+    - longitude: 经度
+    - latitude: 纬度
+    - updated_at: 最近一次更新时间
+    """
+    __tablename__ = "geocode_cache"
+    __table_args__ = {"schema": "jishe"}
+
+    cache_key: Mapped[str] = mapped_column(String(512), primary_key=True)
+    address: Mapped[str] = mapped_column(String(255), nullable=False)
+    city: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.base import Base
@@ -14,7 +14,10 @@ class Goods(Base):
     - goods_name: 货物种类名称
     """
     __tablename__ = "goods"
-    __table_args__ = {"schema": "jishe"}
+    __table_args__ = (
+        Index("ix_goods_goods_name", "goods_name"),
+        {"schema": "jishe"},
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     goods_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaCommand(Base):
+    """
+    IoTDA 设备命令发件箱数据库模型，每行是批量命令中发往一台设备的命令
+
+    表名: jishe.iotda_command
+    字段:
+    - id: 自增ID
+    - batch_id: 批次ID
+    - device_id: 设备ID
+    - status: 发件箱状态: pending->等待下发, sending->下发中, sent->IoTDA 已受理, failed->下发失败
+    - attempts: 已尝试下发的次数
+    - next_attempt_at: pending 时为下次尝试时间；sending 时为认领到期时间，到期未完成（如进程退出）时重新下发
+    - command_id: IoTDA 返回的命令ID
+    - command_status: IoTDA 命令状态 (PENDING/SENT/DELIVERED/SUCCESSFUL/FAILED/TIMEOUT/EXPIRED)
+    - error: 最近一次下发失败的原因
+    - created_at: 创建时间
+    - updated_at: 最近一次更新时间
+    """
+    __tablename__ = "iotda_command"
+    __table_args__ = (
+        UniqueConstraint("batch_id", "device_id", name="uq_iotda_command_batch_id_device_id"),
+        Index(
+            "ix_iotda_command_next_attempt_at", "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+        Index(
+            "ix_iotda_command_status_refresh", "updated_at",
+            postgresql_where=text("status = 'sent' AND command_status IN ('PENDING', 'SENT', 'DELIVERED')"),
+        ),
+        {"schema": "jishe"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    batch_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("jishe.iotda_command_batch.id", ondelete="CASCADE"), nullable=False
+    )
+    device_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    command_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    command_status: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
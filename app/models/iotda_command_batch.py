@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaCommandBatch(Base):
+    """
+    IoTDA 批量设备命令数据库模型
+
+    表名: jishe.iotda_command_batch
+    字段:
+    - id: 批次ID
+    - instance_id: IoTDA 实例ID
+    - command: 命令内容（AsyncDeviceCommandRequest: service_id、command_name、paras、expire_time、send_strategy）
+    - total: 目标设备数
+    - created_by: 创建者用户ID
+    - created_at: 创建时间
+    """
+    __tablename__ = "iotda_command_batch"
+    __table_args__ = {"schema": "jishe"}
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    instance_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    command: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    total: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_by: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from sqlalchemy import DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaDevice(Base):
+    """
+    IoTDA 设备镜像数据库模型，由后台同步任务从华为云 IoTDA 同步
+
+    表名: jishe.iotda_device
+    字段:
+    - instance_id: IoTDA 实例ID，默认实例为空字符串
+    - device_id: 设备ID
+    - 其余字段与 IoTDA 查询设备列表接口返回的字段一致
+    - synced_at: 最近一次从 IoTDA 同步的时间
+    """
+    __tablename__ = "iotda_device"
+    __table_args__ = (
+        Index("ix_iotda_device_device_name", "instance_id", "device_name"),
+        Index("ix_iotda_device_product_id", "instance_id", "product_id"),
+        {"schema": "jishe"},
+    )
+
+    instance_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    device_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    app_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    app_name: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    node_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    gateway_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    device_name: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    node_type: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    fw_version: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    sw_version: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    device_sdk_version: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    product_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    product_name: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    status: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    tags: Mapped[Optional[List[Any]]] = mapped_column(JSONB, nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaDeviceGroup(Base):
+    """
+    IoTDA 设备组镜像数据库模型
+
+    表名: jishe.iotda_device_group
+    字段:
+    - instance_id: IoTDA 实例ID，默认实例为空字符串
+    - group_id: 设备组ID
+    - name: 设备组名称
+    - description: 设备组描述
+    - super_group_id: 父设备组ID
+    - group_type: 设备组类型（静态/动态）
+    - synced_at: 最近一次从 IoTDA 同步的时间
+    """
+    __tablename__ = "iotda_device_group"
+    __table_args__ = {"schema": "jishe"}
+
+    instance_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    group_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    super_group_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    group_type: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
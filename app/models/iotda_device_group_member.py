@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaDeviceGroupMember(Base):
+    """
+    IoTDA 设备组成员镜像数据库模型
+
+    表名: jishe.iotda_device_group_member
+    字段:
+    - instance_id: IoTDA 实例ID，默认实例为空字符串
+    - group_id: 设备组ID
+    - device_id: 设备ID
+    - synced_at: 最近一次从 IoTDA 同步的时间
+    """
+    __tablename__ = "iotda_device_group_member"
+    __table_args__ = (
+        Index("ix_iotda_device_group_member_device_id", "instance_id", "device_id"),
+        {"schema": "jishe"},
+    )
+
+    instance_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    group_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    device_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
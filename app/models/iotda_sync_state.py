@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class IotdaSyncState(Base):
+    """
+    IoTDA 设备镜像同步状态数据库模型
+
+    表名: jishe.iotda_sync_state
+    字段:
+    - instance_id: IoTDA 实例ID，默认实例为空字符串
+    - device_watermark: 增量同步的设备注册时间下限（IoTDA 格式 yyyyMMdd'T'HHmmss'Z'）
+    - last_incremental_sync_at: 最近一次增量同步完成时间
+    - last_full_sync_at: 最近一次全量同步完成时间，镜像数据的新鲜度以此为准
+    - lease_until: 同步租约到期时间，多进程部署时同一时间只有一个进程执行同步
+    - last_error: 最近一次同步失败的原因，同步成功后清空
+    """
+    __tablename__ = "iotda_sync_state"
+    __table_args__ = {"schema": "jishe"}
+
+    instance_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    device_watermark: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    last_incremental_sync_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_full_sync_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
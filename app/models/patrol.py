@@ -1,5 +1,5 @@
 from datetime import datetime, time
-from sqlalchemy import Column, ForeignKey, String, DateTime, Time, Integer
+from sqlalchemy import Column, ForeignKey, Index, String, DateTime, Time, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.base import Base
@@ -30,4 +30,13 @@ class Patrol(Base):
     update_time: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default="CURRENT_TIMESTAMP")
     error_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     # 关系
-    drone = relationship("Drone", back_populates="patrols") 
\ No newline at end of file
+    drone = relationship("Drone", back_populates="patrols")
+
+
+# 道路状况按无人机取最新一条巡查记录 (migrations/004_patrol_latest_index.sql)
+Index(
+    "ix_patrol_drone_id_update_time",
+    Patrol.drone_id,
+    Patrol.update_time.desc(),
+    Patrol.id.desc(),
+)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, DateTime, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.base import Base
@@ -19,7 +19,12 @@ class Stock(Base):
     - last_add_date: 新增库存时间
     """
     __tablename__ = "stock"
-    __table_args__ = {"schema": "jishe"}
+    __table_args__ = (
+        # 每个仓库的每种商品只有一条库存记录 (migrations/005_secondary_indexes.sql)
+        UniqueConstraint("warehouse_id", "goods_id", name="uq_stock_warehouse_id_goods_id"),
+        Index("ix_stock_goods_id", "goods_id"),
+        {"schema": "jishe"},
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     warehouse_id: Mapped[int] = mapped_column(ForeignKey("jishe.warehouse.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, func
+from sqlalchemy import Column, Index, Integer, String, Boolean, DateTime, func
 from sqlalchemy.orm import relationship
 
 from db.base import Base
@@ -19,9 +19,13 @@ class User(Base):
     - name: 用户姓名
     - phone: 用户电话号码
     - createtime: 账户创建时间
+    - roles_changed_at: 最近一次角色变更时间，用于撤销旧令牌中的角色声明
     """
     __tablename__ = "user"
-    __table_args__ = {"schema": "jishe"}
+    __table_args__ = (
+        Index("ix_user_username", "username"),
+        {"schema": "jishe"},
+    )
     
     id = Column(Integer, primary_key=True, index=True, comment="用户唯一标识")
     username = Column(String(50), nullable=False, comment="用户名")
@@ -33,5 +37,6 @@ class User(Base):
     phone = Column(String(15), comment="用户电话号码")
     createtime = Column(DateTime, nullable=False, server_default=func.now(), comment="账户创建时间")
     avatar_url = Column(String(255), nullable=False, default='', comment="头像url")
+    roles_changed_at = Column(DateTime(timezone=True), nullable=True, comment="最近一次角色变更时间")
     # 关系
     roles = relationship("UserRole", back_populates="user")
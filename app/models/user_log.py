@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Identity, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class UserLog(Base):
+    """
+    用户操作日志数据库模型
+
+    表名: jishe.user_log（按 time 按月分区）
+    字段:
+    - id: 自增ID，同一时间的多条日志以此区分先后
+    - user_id: 用户ID
+    - time: 操作时间
+    - action: 活动类型
+    - status: 操作状态
+    """
+    __tablename__ = "user_log"
+    __table_args__ = (
+        Index("ix_user_log_time", "time"),
+        {"schema": "jishe", "postgresql_partition_by": "RANGE (time)"},
+    )
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    time: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    action: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, DateTime, Index
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import func
@@ -17,7 +17,11 @@ class UserRole(Base):
     - role_id: 角色唯一标识
     """
     __tablename__ = "user_role"
-    __table_args__ = {"schema": "jishe"}
+    __table_args__ = (
+        # user_id 已是主键前缀，补充按角色查询的索引
+        Index("ix_user_role_role_id", "role_id"),
+        {"schema": "jishe"},
+    )
     
     # 复合主键，覆盖基类中的id
     id = None  # 移除基类中的id
@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class GeocodeAddress(BaseModel):
+    """
+    待解析的地址
+    """
+    address: str = Field(..., min_length=1, max_length=255, description="详细地址", examples=["北京市朝阳区阜通东大街6号"])
+    city: Optional[str] = Field(None, max_length=64, description="所在城市，可提高解析准确度", examples=["北京"])
+
+
+class BatchGeocodeRequest(BaseModel):
+    """
+    批量地理编码请求
+    """
+    addresses: List[GeocodeAddress] = Field(..., min_length=1, description="地址列表")
+
+
+class GeocodeResult(BaseModel):
+    """
+    单个地址的地理编码结果
+    """
+    address: str = Field(..., description="详细地址")
+    city: Optional[str] = Field(None, description="所在城市")
+    found: bool = Field(..., description="是否解析成功")
+    longitude: Optional[float] = Field(None, description="经度")
+    latitude: Optional[float] = Field(None, description="纬度")
+
+
+class BatchGeocodeResponse(BaseModel):
+    """
+    批量地理编码响应，results 与请求中的 addresses 顺序一致
+    """
+    results: List[GeocodeResult]
+
+
+class DistanceMatrixRequest(BaseModel):
+    """
+    距离矩阵请求
+    """
+    origins: List[str] = Field(..., min_length=1, description="起点坐标列表，格式 '经度,纬度'", examples=[["116.481028,39.989643"]])
+    destinations: List[str] = Field(..., min_length=1, description="终点坐标列表，格式 '经度,纬度'", examples=[["114.465302,40.004717"]])
+    type: int = Field(1, description="距离类型: 0 直线距离, 1 驾车导航距离, 3 步行距离")
+
+
+class DistanceMatrixCell(BaseModel):
+    """
+    距离矩阵中的单元
+    """
+    distance_meters: Optional[int] = Field(None, description="距离（米）")
+    duration_seconds: Optional[int] = Field(None, description="预计耗时（秒），直线距离时为0")
+    error: Optional[str] = Field(None, description="无法计算时的错误信息")
+
+
+class DistanceMatrixResponse(BaseModel):
+    """
+    距离矩阵响应，rows[i][j] 为 origins[i] 到 destinations[j] 的结果
+    """
+    origins: List[str] = Field(..., description="规范化后的起点坐标")
+    destinations: List[str] = Field(..., description="规范化后的终点坐标")
+    rows: List[List[DistanceMatrixCell]]
+    unique_legs: int = Field(..., description="去重后的起终点对数量")
+    cached_legs: int = Field(..., description="命中缓存的起终点对数量")
+    upstream_calls: int = Field(..., description="本次请求调用高德API的次数")
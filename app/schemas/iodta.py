@@ -1,5 +1,5 @@
 import pydantic
-from typing import Optional, Any
+from typing import List, Optional, Any
 
 
 class CreateOrDeleteDeviceInGroup(pydantic.BaseModel):
@@ -19,6 +19,37 @@ class CreateOrDeleteDeviceInGroup(pydantic.BaseModel):
     )
 
 
+class ShowDevicesInGroups(pydantic.BaseModel):
+    """并发查询多个设备组的设备列表"""
+
+    instance_id: Optional[str] = None  # 实例ID
+    group_ids: List[str] = pydantic.Field(..., min_length=1, max_length=100)  # 设备组ID列表
+    limit: Optional[int] = pydantic.Field(None, ge=1, le=50)  # 每个设备组返回的设备数
+
+
+class BatchCommandBody(pydantic.BaseModel):
+    """批量命令的命令内容，字段与 AsyncDeviceCommandRequest 一致"""
+
+    service_id: Optional[str] = None  # 设备命令所属的设备服务ID，在设备关联的产品模型中定义
+    command_name: Optional[str] = None  # 设备命令名称，在设备关联的产品模型中定义
+    paras: Any  # 设备执行的命令，Json格式
+    expire_time: Optional[int] = pydantic.Field(None, ge=0)  # 物联网平台缓存命令的时长，单位秒
+    send_strategy: str = "immediately"  # 下发策略: immediately->立即下发, delay->设备上报数据后下发
+
+
+class CreateBatchCommand(pydantic.BaseModel):
+    """向多台设备下发同一条异步命令"""
+
+    instance_id: Optional[str] = None  # 实例ID
+    device_ids: List[str] = pydantic.Field(..., min_length=1)  # 目标设备ID列表，重复的设备只下发一次
+    body: BatchCommandBody  # 命令内容
+
+    @pydantic.field_validator("device_ids")
+    @classmethod
+    def unique_device_ids(cls, device_ids: List[str]) -> List[str]:
+        return list(dict.fromkeys(device_ids))
+
+
 class AddApplication(pydantic.BaseModel):
     """创建资源空间"""
 
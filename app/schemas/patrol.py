@@ -57,6 +57,7 @@ class PatrolInfo(BaseModel):
 class PatrolListResponse(BaseModel):
     """巡逻列表响应模型"""
     patrols: List[PatrolInfo]
+    next_cursor: Optional[str] = Field(None, description="下一页的游标，没有更多数据时为空")
 
 
 class RoadConditionInfo(BaseModel):
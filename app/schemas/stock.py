@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 # 共享属性
@@ -54,4 +54,42 @@ class StockResponse(StockBase):
 class StockStatisticsResponse(BaseModel):
     categories: List[str]
     existingData: List[int]
-    newData: List[int] 
\ No newline at end of file
+    newData: List[int]
+
+
+class StockBulkLine(BaseModel):
+    """批量入库的一行：仓库 + 商品（ID或名称）+ 库存调整量"""
+    warehouse_id: int = Field(..., description="仓库唯一标识")
+    goods_id: Optional[int] = Field(None, description="货物种类唯一标识，与 goods_name 二选一")
+    goods_name: Optional[str] = Field(None, description="货物名称，不存在时自动创建", max_length=255)
+    delta: int = Field(..., description="库存调整量（可以为负数表示减少库存）")
+
+    @model_validator(mode="after")
+    def check_goods(self):
+        if self.goods_id is None and not (self.goods_name and self.goods_name.strip()):
+            raise ValueError("goods_id 与 goods_name 至少提供一个")
+        return self
+
+
+class StockBulkRequest(BaseModel):
+    """批量入库请求"""
+    lines: List[StockBulkLine] = Field(..., min_length=1, description="入库明细")
+
+
+class StockBulkLineResult(BaseModel):
+    """单行的处理结果，line 为请求中的行号（从1开始）"""
+    line: int
+    status: Literal["ok", "error"]
+    stock_id: Optional[int] = Field(None, description="库存唯一标识")
+    goods_id: Optional[int] = Field(None, description="货物种类唯一标识")
+    all_count: Optional[int] = Field(None, description="本次导入完成后的总库存量")
+    detail: Optional[str] = Field(None, description="失败原因")
+
+
+class StockBulkResponse(BaseModel):
+    """批量入库响应，results 与请求中的行顺序一致"""
+    total: int
+    succeeded: int
+    failed: int
+    created_goods: int = Field(..., description="自动创建的货物种类数")
+    results: List[StockBulkLineResult]
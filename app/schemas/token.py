@@ -26,6 +26,7 @@ class TokenPayload(BaseModel):
     """
     sub: Optional[str] = None
     exp: int  # 过期时间戳
+    iat: Optional[int] = None  # 签发时间戳
     roles: Optional[List[int]] = None  # 用户角色ID列表
     
     model_config = {
@@ -33,6 +34,7 @@ class TokenPayload(BaseModel):
             "example": {
                 "sub": "1",
                 "exp": 1639858800,
+                "iat": 1639857000,
                 "roles": [1]
             }
         }
@@ -1,6 +1,6 @@
 import datetime
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class TransportBase(BaseModel):
@@ -52,4 +52,54 @@ class TransportRead(TransportBase):
 
 
 class TransportId(BaseModel):
-    id: int = Field(..., description="唯一ID", examples=[1])
\ No newline at end of file
+    id: int = Field(..., description="唯一ID", examples=[1])
+
+class RoutePoint(BaseModel):
+    """
+    路线中的坐标点
+    """
+    longitude: float = Field(..., ge=-180, le=180, description="经度", examples=[116.481028])
+    latitude: float = Field(..., ge=-90, le=90, description="纬度", examples=[39.989643])
+
+
+class RouteStop(RoutePoint):
+    """
+    配送站点
+    """
+    name: Optional[str] = Field(None, description="站点名称")
+    demand: float = Field(0, ge=0, description="该站点的配送量，与运输线路的货物量使用相同单位")
+
+
+class RouteOptimizeRequest(BaseModel):
+    """
+    运输线路优化请求
+    """
+    depot: RoutePoint = Field(..., description="出发仓库坐标")
+    stops: List[RouteStop] = Field(..., min_length=1, description="配送站点列表")
+    distance_source: str = Field("auto", description="距离来源: auto / gaode / haversine")
+    return_to_depot: bool = Field(True, description="最后一趟结束后是否返回仓库")
+    apply: bool = Field(True, description="是否将预估时长写回运输线路")
+
+
+class RouteTrip(BaseModel):
+    """
+    一趟配送（从仓库出发，装载量不超过运输线路的货物量）
+    """
+    stops: List[int] = Field(..., description="按配送顺序排列的站点下标（对应请求中的 stops）")
+    distance_meters: float = Field(..., description="本趟距离（米）")
+    duration_seconds: float = Field(..., description="本趟预计耗时（秒），含站点停留时间")
+    load: float = Field(..., description="本趟装载量")
+
+
+class RouteOptimizeResponse(BaseModel):
+    """
+    运输线路优化结果
+    """
+    transport_id: int = Field(..., description="运输线路ID")
+    distance_source: str = Field(..., description="实际使用的距离来源")
+    trips: List[RouteTrip]
+    total_distance_meters: float = Field(..., description="总距离（米）")
+    total_duration_seconds: float = Field(..., description="总耗时（秒）")
+    baseline_distance_meters: float = Field(..., description="最近邻初始解的总距离（米），用于对比优化效果")
+    estimated_duration: datetime.timedelta = Field(..., description="预估时长")
+    applied: bool = Field(..., description="预估时长是否已写回运输线路")
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Any, List, Optional, Tuple
 from pydantic import BaseModel, Field, field_serializer
 from datetime import datetime, time
 
@@ -126,4 +126,42 @@ class PasswordChange(BaseModel):
 
 class UpdateUserPayload(BaseModel):
     user_in: UserUpdate
-    role_ids: Optional[List[int]] = None
\ No newline at end of file
+    role_ids: Optional[List[int]] = None
+
+class Principal(BaseModel):
+    """
+    认证用户快照
+
+    get_current_user 返回的只读用户信息，不持有数据库会话，可以在并发请求之间共享缓存；
+    需要修改用户或读取其他关联数据时请通过 crud 重新查询
+    """
+    id: int
+    username: str
+    name: Optional[str] = None
+    email: str
+    phone: Optional[str] = None
+    avatar_url: Optional[str] = None
+    is_active: bool = True
+    is_superuser: bool = False
+    createtime: datetime
+    role_ids: Tuple[int, ...] = ()
+    roles_changed_at: Optional[datetime] = None
+
+    model_config = {"frozen": True}
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        """从已加载 roles 的 User 对象创建快照"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            name=user.name,
+            email=user.email,
+            phone=user.phone,
+            avatar_url=user.avatar_url,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            createtime=user.createtime,
+            role_ids=tuple(user_role.role_id for user_role in user.roles),
+            roles_changed_at=user.roles_changed_at,
+        )
@@ -0,0 +1,180 @@
+"""
+IoTDA 调用吞吐量与容错基准测试
+
+通过 service/iotda_service.py 的调用网关（与线上相同的线程池、超时与重试）访问 IoTDA 模拟服务
+(scripts/fake_iotda.py)，测试三种场景:
+- list: 按 marker 分页遍历全部设备（镜像全量同步的主要开销）
+- fanout: 并发查询全部设备组的成员 (show_devices_in_groups)
+- commands: 并发向每台设备下发一条异步命令
+
+默认在本进程的后台线程中启动模拟服务，可通过注入参数模拟延迟、限流与故障；
+指定 --endpoint 时改为访问已运行的模拟服务（此时注入参数通过其 PUT /_fake/config 修改）。
+
+用法:
+python -m scripts.bench_iotda
+python -m scripts.bench_iotda --mode commands --devices 2000 --concurrency 32 --latency-ms 40 --jitter-ms 20
+python -m scripts.bench_iotda --mode list --devices 5000 --throttle-qps 50 --error-rate 0.05
+python -m scripts.bench_iotda --endpoint http://127.0.0.1:18080 --mode fanout
+
+IOTDA_MAX_WORKERS、IOTDA_MAX_RETRIES、IOTDA_CALL_TIMEOUT_SECONDS 等网关参数按 .env 或环境变量生效。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from huaweicloudsdkiotda.v5 import AsyncDeviceCommandRequest
+
+from core.config import settings
+from crud import iodta
+from scripts.fake_iotda import (
+    add_fault_arguments,
+    configs_from_args,
+    create_fake_iotda_app,
+    start_fake_iotda_in_thread,
+)
+from service.iotda_service import fan_out, get_iotda_stats, shutdown_iotda_gateway
+
+PAGE_SIZE = 50
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """记录每次调用的耗时与结果（crud 函数在 4xx 时返回 None，在重试用尽的 5xx 与超时时抛出异常）"""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.failures = 0
+
+    async def run(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Optional[Any]:
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            result = None
+        self.latencies.append(time.perf_counter() - start)
+        if result is None:
+            self.failures += 1
+        return result
+
+    def summarize(self, name: str, elapsed: float, extra: str = "") -> None:
+        total = len(self.latencies)
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        print(
+            f"{name:<14} 调用={total:<6} 失败={self.failures:<5} 耗时={elapsed:6.2f}s 吞吐={total / elapsed:8.1f}/s "
+            f"p50={percentile(latencies_ms, 50):7.1f}ms p95={percentile(latencies_ms, 95):7.1f}ms "
+            f"p99={percentile(latencies_ms, 99):7.1f}ms {extra}"
+        )
+
+
+async def bench_list(recorder: Recorder) -> str:
+    """按 marker 分页遍历全部设备"""
+    devices = 0
+    marker = None
+    while True:
+        page = await recorder.run(iodta.list_devices, limit=PAGE_SIZE, marker=marker)
+        if page is None:
+            return f"设备={devices}（遍历中断）"
+        devices += len(page["devices"])
+        marker = page["page"]["marker"]
+        if len(page["devices"]) < PAGE_SIZE or not marker:
+            return f"设备={devices}"
+
+
+async def list_all(func: Callable[..., Awaitable[Any]], key: str, **kwargs: Any) -> List[Any]:
+    """不计入统计地遍历全部记录，用于准备测试参数"""
+    items: List[Any] = []
+    marker = None
+    while True:
+        page = await func(limit=PAGE_SIZE, marker=marker, **kwargs)
+        if page is None:
+            raise SystemExit(f"查询 {key} 失败，请检查模拟服务")
+        items.extend(page[key])
+        marker = page["page"]["marker"]
+        if len(page[key]) < PAGE_SIZE or not marker:
+            return items
+
+
+async def bench_fanout(recorder: Recorder, group_ids: List[str]) -> str:
+    """并发查询全部设备组的成员"""
+    results = await recorder.run(iodta.show_devices_in_groups, group_ids, limit=PAGE_SIZE)
+    failed = sum(1 for result in results or [] if result["error"])
+    return f"设备组={len(group_ids)} 查询失败的设备组={failed}"
+
+
+async def bench_commands(recorder: Recorder, device_ids: List[str], concurrency: int) -> str:
+    """并发向每台设备下发一条异步命令"""
+    async def send(device_id: str) -> Optional[Any]:
+        body = AsyncDeviceCommandRequest(command_name="bench", paras={"value": 1})
+        return await recorder.run(iodta.create_async_command, device_id=device_id, body=body)
+
+    await fan_out(send, device_ids, concurrency=concurrency)
+    return f"设备={len(device_ids)}"
+
+
+async def bench(args: argparse.Namespace, name: str) -> None:
+    # 准备参数的查询不计入统计
+    if args.mode == "fanout":
+        group_ids = [group["group_id"] for group in await list_all(iodta.list_device_groups, "device_groups")]
+    elif args.mode == "commands":
+        device_ids = [device["device_id"] for device in await list_all(iodta.list_devices, "devices")]
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    if args.mode == "list":
+        extra = await bench_list(recorder)
+    elif args.mode == "fanout":
+        extra = await bench_fanout(recorder, group_ids)
+    else:
+        extra = await bench_commands(recorder, device_ids, args.concurrency)
+    recorder.summarize(name, time.perf_counter() - start, extra)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IoTDA 调用吞吐量与容错基准测试")
+    parser.add_argument("--mode", choices=["list", "fanout", "commands"], default="list")
+    parser.add_argument("--rounds", type=int, default=3, help="轮数")
+    parser.add_argument("--concurrency", type=int, default=16, help="commands 模式的并发下发数")
+    parser.add_argument("--endpoint", help="已运行的模拟服务地址，如 http://127.0.0.1:18080")
+    parser.add_argument("--port", type=int, default=18080, help="本进程内启动模拟服务的端口")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    fake = None
+    if args.endpoint:
+        settings.IOTDA_ENDPOINT = args.endpoint
+    else:
+        app = create_fake_iotda_app(*configs_from_args(args))
+        fake = app.state.fake
+        server = start_fake_iotda_in_thread(app, port=args.port)
+        settings.IOTDA_ENDPOINT = f"http://127.0.0.1:{args.port}"
+
+    try:
+        for round_index in range(args.rounds):
+            asyncio.run(bench(args, f"第{round_index + 1}轮 {args.mode}"))
+        print(f"网关统计: {get_iotda_stats()}")
+        if fake is not None:
+            print(f"模拟服务统计: {dict(fake.stats)}")
+    finally:
+        shutdown_iotda_gateway()
+        if server is not None:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
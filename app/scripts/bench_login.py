@@ -0,0 +1,156 @@
+"""
+登录吞吐量与事件循环延迟基准测试
+
+对比在事件循环中直接执行 bcrypt 与通过哈希工作池执行时的表现：
+并发发起若干次密码验证（模拟登录高峰），同时运行一个探针协程，
+每隔固定间隔休眠一次，统计实际唤醒时间相对预期的延迟。
+
+用法:
+python -m scripts.bench_login --concurrency 50 --rounds 4
+python -m scripts.bench_login --url http://127.0.0.1:8000 --username admin --password 123456 --role-name 超级管理员
+
+指定 --url 时对运行中的服务发起真实登录请求，并用根路径 GET / 的响应时间作为服务端事件循环延迟的近似值。
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.password import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+    shutdown_password_executor,
+)
+
+PROBE_INTERVAL = 0.01
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, total: int, elapsed: float, lags: List[float], extra: str = "") -> None:
+    """输出一组测试结果"""
+    lags_ms = [lag * 1000 for lag in lags]
+    print(
+        f"{name:<12} 次数={total:<5} 耗时={elapsed:6.2f}s 吞吐={total / elapsed:7.1f}/s "
+        f"延迟p50={percentile(lags_ms, 50):7.1f}ms p99={percentile(lags_ms, 99):7.1f}ms "
+        f"max={max(lags_ms, default=0.0):7.1f}ms {extra}"
+    )
+
+
+async def probe_loop(lags: List[float], stop: asyncio.Event) -> None:
+    """周期性休眠并记录事件循环的唤醒延迟"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_storm(login: Callable[[], Awaitable[bool]], concurrency: int, rounds: int):
+    """并发执行登录并同时测量事件循环延迟"""
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(login() for _ in range(concurrency)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return elapsed, lags
+
+
+async def bench_local(concurrency: int, rounds: int) -> None:
+    """在进程内对比同步与工作池两种哈希方式"""
+    password = "bench-password"
+    hashed = get_password_hash(password)
+    total = concurrency * rounds
+
+    async def login_sync() -> bool:
+        return verify_password(password, hashed)
+
+    async def login_pool() -> bool:
+        return await verify_password_async(password, hashed)
+
+    elapsed, lags = await run_storm(login_sync, concurrency, rounds)
+    summarize("sync", total, elapsed, lags)
+
+    elapsed, lags = await run_storm(login_pool, concurrency, rounds)
+    summarize("pool", total, elapsed, lags)
+    shutdown_password_executor()
+
+
+async def bench_remote(args: argparse.Namespace) -> None:
+    """对运行中的服务发起真实登录请求"""
+    import aiohttp
+
+    total = args.concurrency * args.rounds
+    statuses: Dict[int, int] = {}
+    payload = {"username": args.username, "password": args.password, "role_name": args.role_name}
+
+    async with aiohttp.ClientSession(base_url=args.url) as session:
+        async def login() -> bool:
+            async with session.post("/api/v1/auth/login", json=payload) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+                return resp.status == 200
+
+        # 用 GET / 的响应时间近似服务端事件循环延迟
+        probe_times: List[float] = []
+        stop = asyncio.Event()
+
+        async def probe() -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                async with session.get("/") as resp:
+                    await resp.read()
+                probe_times.append(time.perf_counter() - start)
+                await asyncio.sleep(PROBE_INTERVAL)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            await asyncio.gather(*(login() for _ in range(args.concurrency)), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    summarize("remote", total, elapsed, probe_times, extra=f"状态码={statuses}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="登录吞吐量与事件循环延迟基准测试")
+    parser.add_argument("--concurrency", type=int, default=50, help="每轮并发登录数")
+    parser.add_argument("--rounds", type=int, default=4, help="轮数")
+    parser.add_argument("--url", help="运行中服务的地址，如 http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--role-name", default="超级管理员")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_remote(args))
+    else:
+        asyncio.run(bench_local(args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+道路状况查询基准测试
+
+在独立的 schema 中生成指定数量的无人机与巡查记录，对比两种"每架无人机最新巡查记录"查询的耗时：
+- group_by: 原实现，GROUP BY max(update_time) 子查询再连接回 patrol 表，需要扫描全部巡查历史
+- lateral: 当前实现 (crud.patrol.get_road_conditions)，配合 (drone_id, update_time DESC, id DESC) 索引逐个无人机探测
+
+用法:
+python -m scripts.bench_road_conditions
+python -m scripts.bench_road_conditions --drones 10000 --patrols 10000000 --rounds 5 --explain
+
+测试数据写入 --schema 指定的 schema（默认 bench_road，不影响 jishe 中的业务数据），结束后删除，
+指定 --keep 时保留以便重复运行（再次运行时跳过数据生成）。
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from crud.patrol import get_road_conditions, road_conditions_query
+from db.database import async_engine
+
+GROUP_BY_SQL = """
+SELECT DISTINCT ON (p.drone_id) p.drone_id, p.address, p.update_time, p.error_id, e.error_content
+FROM {schema}.patrol p
+JOIN (
+    SELECT drone_id, max(update_time) AS max_time FROM {schema}.patrol GROUP BY drone_id
+) latest ON p.drone_id = latest.drone_id AND p.update_time = latest.max_time
+LEFT JOIN {schema}.error e ON p.error_id = e.error_id
+ORDER BY p.drone_id
+"""
+
+
+async def prepare(conn: AsyncConnection, schema: str, drones: int, patrols: int) -> None:
+    """创建测试 schema 并生成数据，已存在时跳过"""
+    exists = await conn.scalar(
+        text("SELECT 1 FROM information_schema.schemata WHERE schema_name = :schema"),
+        {"schema": schema},
+    )
+    if exists:
+        count = await conn.scalar(text(f"SELECT count(*) FROM {schema}.patrol"))
+        print(f"使用已有的测试数据: schema={schema} 巡查记录={count}")
+        return
+
+    print(f"生成测试数据: 无人机={drones} 巡查记录={patrols} ...")
+    start = time.perf_counter()
+    statements = [
+        f"CREATE SCHEMA {schema}",
+        f"CREATE TABLE {schema}.drone (id integer PRIMARY KEY, drone_type varchar(255) NOT NULL, states varchar(1) NOT NULL)",
+        f"CREATE TABLE {schema}.error (error_id integer PRIMARY KEY, error_content text)",
+        f"""CREATE TABLE {schema}.patrol (
+            id integer PRIMARY KEY, drone_id integer NOT NULL, address varchar(255) NOT NULL,
+            predict_fly_time time NOT NULL, fly_start_datetime timestamp NOT NULL,
+            update_time timestamp DEFAULT CURRENT_TIMESTAMP, error_id integer)""",
+        f"""INSERT INTO {schema}.drone
+            SELECT i, 'bench', (i % 2)::text FROM generate_series(1, {drones}) AS i""",
+        f"""INSERT INTO {schema}.error
+            SELECT i, '错误' || i FROM generate_series(1, 1000) AS i""",
+        f"""INSERT INTO {schema}.patrol
+            SELECT i, 1 + (i % {drones}), '路段' || (i % 997), '01:00:00',
+                   now() - make_interval(secs => {patrols} - i),
+                   now() - make_interval(secs => {patrols} - i),
+                   CASE WHEN i % 50 = 0 THEN 1 + (i % 1000) END
+            FROM generate_series(1, {patrols}) AS i""",
+    ]
+    for statement in statements:
+        await conn.execute(text(statement))
+    await conn.commit()
+    print(f"数据生成完成，耗时 {time.perf_counter() - start:.1f}s")
+
+
+async def set_index(conn: AsyncConnection, schema: str, enabled: bool) -> None:
+    """创建或删除最新巡查记录索引"""
+    if enabled:
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_patrol_drone_id_update_time "
+            f"ON {schema}.patrol (drone_id, update_time DESC, id DESC)"
+        ))
+    else:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {schema}.ix_patrol_drone_id_update_time"))
+    await conn.execute(text(f"ANALYZE {schema}.patrol"))
+    await conn.commit()
+
+
+async def measure(name: str, run: Callable[[], Awaitable[int]], rounds: int) -> None:
+    """执行若干轮并输出耗时"""
+    timings: List[float] = []
+    rows = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        rows = await run()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<22} 行数={rows:<6} 中位数={statistics.median(timings):9.1f}ms "
+        f"最快={min(timings):9.1f}ms 最慢={max(timings):9.1f}ms"
+    )
+
+
+async def explain(conn: AsyncConnection, name: str, sql: str) -> None:
+    """输出查询计划"""
+    plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))).scalars().all()
+    print(f"--- {name} ---")
+    print("\n".join(plan))
+
+
+async def bench(args: argparse.Namespace) -> None:
+    schema = args.schema
+    async with async_engine.connect() as raw_conn:
+        await prepare(raw_conn, schema, args.drones, args.patrols)
+        # 将 ORM 模型中的 jishe 映射到测试 schema，直接复用 get_road_conditions
+        conn = await raw_conn.execution_options(schema_translate_map={"jishe": schema})
+        group_by_sql = GROUP_BY_SQL.format(schema=schema)
+
+        async def run_group_by() -> int:
+            return len((await conn.execute(text(group_by_sql))).all())
+
+        async def run_lateral() -> int:
+            async with AsyncSession(bind=conn) as session:
+                return len(await get_road_conditions(session))
+
+        try:
+            # 没有索引时 LATERAL 会对每架无人机扫描一遍巡查表，只测 group_by 作为基线
+            await set_index(raw_conn, schema, False)
+            await measure("group_by (无索引)", run_group_by, args.rounds)
+            await set_index(raw_conn, schema, True)
+            await measure("group_by (有索引)", run_group_by, args.rounds)
+            await measure("lateral (有索引)", run_lateral, args.rounds)
+
+            if args.explain:
+                lateral_sql = str(road_conditions_query().compile(
+                    dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+                )).replace("jishe.", f"{schema}.")
+                await explain(raw_conn, "group_by", group_by_sql)
+                await explain(raw_conn, "lateral", lateral_sql)
+        finally:
+            if not args.keep:
+                await raw_conn.rollback()
+                await raw_conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+                await raw_conn.commit()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="道路状况查询基准测试")
+    parser.add_argument("--drones", type=int, default=10_000, help="无人机数量")
+    parser.add_argument("--patrols", type=int, default=10_000_000, help="巡查记录数量")
+    parser.add_argument("--rounds", type=int, default=5, help="每种查询执行的轮数")
+    parser.add_argument("--schema", default="bench_road", help="测试数据所在的 schema")
+    parser.add_argument("--explain", action="store_true", help="输出 EXPLAIN ANALYZE 查询计划")
+    parser.add_argument("--keep", action="store_true", help="结束后保留测试数据")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
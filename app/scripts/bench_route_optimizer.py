@@ -0,0 +1,72 @@
+"""
+运输线路优化基准测试
+
+在一个城市范围内随机生成站点，分别测量 haversine 距离矩阵计算、最近邻初始解、
+2-opt/Or-opt 局部优化的耗时与优化后的距离下降比例。
+
+用法:
+python -m scripts.bench_route_optimizer
+python -m scripts.bench_route_optimizer --sizes 50 200 1000 --capacity 500 --time-limit 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from service.route_optimizer import haversine_matrix, nearest_neighbor_trips, route_cost, solve_routes
+
+# 以北京市区为中心，约 40km × 40km 的范围
+CENTER = (116.40, 39.90)
+SPAN = 0.25
+
+
+def bench(size: int, capacity: float, time_limit: float, seed: int) -> None:
+    """对指定站点数运行一次基准测试"""
+    rng = np.random.default_rng(seed)
+    coords = np.column_stack((
+        CENTER[0] + rng.uniform(-SPAN, SPAN, size + 1),
+        CENTER[1] + rng.uniform(-SPAN, SPAN, size + 1),
+    ))
+    demands = np.concatenate(([0], rng.integers(1, 20, size))).astype(float)
+
+    start = time.perf_counter()
+    dist = haversine_matrix(coords)
+    matrix_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    trips = nearest_neighbor_trips(dist, demands, capacity or None)
+    nn_ms = (time.perf_counter() - start) * 1000
+    nn_cost = sum(route_cost(trip, dist) for trip in trips)
+
+    start = time.perf_counter()
+    plan = solve_routes(dist, dist / 11.1, demands, capacity or None, time_limit=time_limit)
+    solve_s = time.perf_counter() - start
+
+    gain = (1 - plan["total_distance_meters"] / nn_cost) * 100 if nn_cost else 0.0
+    print(
+        f"站点={size:<5} 矩阵={matrix_ms:8.1f}ms 最近邻={nn_ms:8.1f}ms 优化={solve_s:6.2f}s "
+        f"趟数={len(plan['trips']):<3} 最近邻距离={nn_cost / 1000:9.1f}km "
+        f"优化后={plan['total_distance_meters'] / 1000:9.1f}km 下降={gain:5.1f}%"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="运输线路优化基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000], help="站点数")
+    parser.add_argument("--capacity", type=float, default=0, help="单趟容量，0 表示不限")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="局部优化的时间预算（秒）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size, args.capacity, args.time_limit, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+批量入库吞吐量基准测试
+
+生成指定行数的入库明细（按名称引用 --goods 种临时货物，随机分布到已有仓库），
+调用 crud.stock.bulk_apply_stock_deltas 在一个事务中导入，输出每秒处理的行数。
+第一轮会创建货物与库存记录，之后各轮走 ON CONFLICT DO UPDATE 的更新路径。
+
+用法:
+python -m scripts.bench_stock_bulk
+python -m scripts.bench_stock_bulk --lines 10000 --goods 2000 --rounds 3
+
+临时货物（及其库存记录）在结束时删除。
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import delete, select
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from crud.stock import bulk_apply_stock_deltas
+from db.database import async_db_session, async_engine
+from models.goods import Goods
+from models.warehouse import Warehouse
+from schemas.stock import StockBulkLine
+
+
+async def bench(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    prefix = f"bench-bulk-{int(time.time())}-"
+
+    async with async_db_session() as db:
+        warehouse_ids = (await db.scalars(select(Warehouse.id).order_by(Warehouse.id))).all()
+    if not warehouse_ids:
+        raise SystemExit("数据库中没有仓库")
+
+    try:
+        for round_index in range(args.rounds):
+            lines = [
+                StockBulkLine(
+                    warehouse_id=rng.choice(warehouse_ids),
+                    goods_name=f"{prefix}{rng.randrange(args.goods)}",
+                    delta=rng.randint(1, 50),
+                )
+                for _ in range(args.lines)
+            ]
+            async with async_db_session() as db:
+                start = time.perf_counter()
+                response = await bulk_apply_stock_deltas(db, lines)
+                elapsed = time.perf_counter() - start
+            print(
+                f"第{round_index + 1}轮 行数={response.total:<6} 成功={response.succeeded:<6} "
+                f"新建货物={response.created_goods:<5} 耗时={elapsed:6.2f}s 吞吐={response.total / elapsed:9.1f} 行/s"
+            )
+    finally:
+        async with async_db_session() as db:
+            await db.execute(delete(Goods).where(Goods.goods_name.startswith(prefix)))
+            await db.commit()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量入库吞吐量基准测试")
+    parser.add_argument("--lines", type=int, default=10000, help="每轮导入的行数")
+    parser.add_argument("--goods", type=int, default=2000, help="临时货物种类数")
+    parser.add_argument("--rounds", type=int, default=3, help="轮数")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
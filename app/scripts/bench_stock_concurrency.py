@@ -0,0 +1,132 @@
+"""
+库存并发调整基准测试
+
+创建一条临时库存记录，并发发起若干次随机增减（每次使用独立的数据库会话），
+结束后核对最终库存是否等于初始库存加上所有成功调整量之和，验证没有丢失更新，
+并统计因库存不足被拒绝（409）的次数与吞吐量。
+
+- atomic: 当前实现 crud.stock.update_stock（UPDATE ... SET all_count = all_count + :delta ... RETURNING）
+- naive: 先读取再在 Python 中计算并写回（旧实现的读-改-写方式），用于对照
+
+用法:
+python -m scripts.bench_stock_concurrency
+python -m scripts.bench_stock_concurrency --tasks 500 --initial 1000 --max-delta 20 --mode naive
+
+临时的商品与库存记录在结束时删除。
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from crud.stock import update_stock
+from db.database import async_db_session, async_engine
+from models.goods import Goods
+from models.stock import Stock
+from models.warehouse import Warehouse
+from schemas.stock import StockUpdate
+
+
+async def adjust_atomic(stock_id: int, delta: int) -> bool:
+    """通过 update_stock 调整库存，库存不足时返回 False"""
+    async with async_db_session() as db:
+        try:
+            await update_stock(db, stock_id, StockUpdate(last_add_count=delta))
+            return True
+        except HTTPException as e:
+            if e.status_code == 409:
+                return False
+            raise
+
+
+async def adjust_naive(stock_id: int, delta: int) -> bool:
+    """读取后在 Python 中计算新库存并写回"""
+    async with async_db_session() as db:
+        db_stock = (await db.execute(select(Stock).where(Stock.id == stock_id))).scalar_one()
+        if db_stock.all_count + delta < 0:
+            return False
+        # 让出事件循环，模拟请求处理中的其他耗时，放大竞争窗口
+        await asyncio.sleep(0)
+        db_stock.all_count = db_stock.all_count + delta
+        db_stock.last_add_count = delta
+        await db.commit()
+        return True
+
+
+async def bench(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    deltas = [rng.randint(-args.max_delta, args.max_delta) or 1 for _ in range(args.tasks)]
+    adjust = adjust_atomic if args.mode == "atomic" else adjust_naive
+
+    async with async_db_session() as db:
+        warehouse_id = args.warehouse_id or await db.scalar(select(Warehouse.id).order_by(Warehouse.id).limit(1))
+        if warehouse_id is None:
+            raise SystemExit("数据库中没有仓库，请通过 --warehouse-id 指定")
+        goods = Goods(goods_name=f"bench-stock-{int(time.time())}")
+        db.add(goods)
+        await db.flush()
+        stock = Stock(
+            warehouse_id=warehouse_id,
+            goods_id=goods.id,
+            all_count=args.initial,
+            last_add_count=0,
+            last_add_date=datetime.now(),
+        )
+        db.add(stock)
+        await db.commit()
+        stock_id, goods_id = stock.id, goods.id
+
+    try:
+        results: Dict[int, bool] = {}
+
+        async def run(index: int) -> None:
+            results[index] = await adjust(stock_id, deltas[index])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run(i) for i in range(args.tasks)))
+        elapsed = time.perf_counter() - start
+
+        async with async_db_session() as db:
+            final = await db.scalar(select(Stock.all_count).where(Stock.id == stock_id))
+        applied: List[int] = [deltas[i] for i, ok in results.items() if ok]
+        expected = args.initial + sum(applied)
+        rejected = args.tasks - len(applied)
+        print(
+            f"模式={args.mode:<6} 调整次数={args.tasks:<5} 成功={len(applied):<5} 库存不足={rejected:<5} "
+            f"耗时={elapsed:6.2f}s 吞吐={args.tasks / elapsed:7.1f}/s"
+        )
+        print(
+            f"初始库存={args.initial} 期望最终库存={expected} 实际最终库存={final} "
+            f"{'一致' if final == expected else f'不一致，丢失 {expected - final:+d}'}"
+        )
+    finally:
+        async with async_db_session() as db:
+            await db.execute(delete(Goods).where(Goods.id == goods_id))
+            await db.commit()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="库存并发调整基准测试")
+    parser.add_argument("--tasks", type=int, default=500, help="并发调整次数")
+    parser.add_argument("--initial", type=int, default=1000, help="初始库存")
+    parser.add_argument("--max-delta", type=int, default=20, help="单次调整量的绝对值上限")
+    parser.add_argument("--mode", choices=["atomic", "naive"], default="atomic")
+    parser.add_argument("--warehouse-id", type=int, help="临时库存所属的仓库，默认取第一个仓库")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
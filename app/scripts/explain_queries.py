@@ -0,0 +1,175 @@
+"""
+CRUD 查询索引检查
+
+在一个只读事务中依次调用 CRUD 层的查询函数，记录每个函数实际执行的 SQL，
+再以相同参数执行 EXPLAIN，找出对大表的顺序扫描（Seq Scan），用于发现缺失的索引。
+
+用法:
+python -m scripts.explain_queries
+python -m scripts.explain_queries --min-rows 1000 --analyze --verbose
+
+需连接已有数据的数据库（如生产数据快照），执行过 ANALYZE 后估算行数才准确；
+表的估算行数低于 --min-rows 时顺序扫描本就比索引更快，不视为问题。
+存在问题时退出码为 1，可用于部署前检查。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from crud.error import get_all_errors, get_errors_by_user_id
+from crud.patrol import get_patrol_list, get_road_conditions, get_status_summary
+from crud.role import get_role_by_name
+from crud.stock import check_stock_exists, get_stock_statistics_by_warehouse, get_stocks_by_warehouse
+from crud.transport import get_transports
+from crud.user import get_user_by_username, get_user_roles, list_users_with_roles
+from db.database import async_engine
+from models.goods import Goods
+
+PAGE_SIZE = 100
+
+# 当前正在检查的查询名称，为空时不记录 SQL
+_current: Optional[str] = None
+# (查询名称, SQL, 参数)
+_statements: List[Tuple[str, str, Any]] = []
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current is not None and not executemany:
+        _statements.append((_current, statement, parameters))
+
+
+async def _sample(db: AsyncSession, sql: str, default: Any) -> Any:
+    """从数据库中取一个真实存在的值作为查询参数"""
+    value = await db.scalar(text(sql))
+    return default if value is None else value
+
+
+async def _collect(db: AsyncSession) -> Dict[str, bool]:
+    """
+    调用各个 CRUD 查询并记录执行的 SQL
+
+    Returns:
+        Dict[str, bool]: 查询名称 -> 是否预期全表扫描（如全表统计）
+    """
+    global _current
+    user_id = await _sample(db, 'SELECT id FROM jishe."user" ORDER BY id LIMIT 1', 1)
+    username = await _sample(db, 'SELECT username FROM jishe."user" ORDER BY id LIMIT 1', "admin")
+    warehouse_id, goods_id = (await db.execute(text(
+        "SELECT warehouse_id, goods_id FROM jishe.stock ORDER BY id LIMIT 1"
+    ))).first() or (1, 1)
+    goods_name = await _sample(db, "SELECT goods_name FROM jishe.goods ORDER BY id LIMIT 1", "")
+    role_name = await _sample(db, "SELECT role_name FROM jishe.role ORDER BY role_id LIMIT 1", "")
+
+    checks: List[Tuple[str, Callable[[], Awaitable[Any]], bool]] = [
+        ("patrol.get_patrol_list", lambda: get_patrol_list(db, limit=PAGE_SIZE), False),
+        ("patrol.get_road_conditions", lambda: get_road_conditions(db), False),
+        ("patrol.get_status_summary", lambda: get_status_summary(db), True),
+        ("error.get_all_errors", lambda: get_all_errors(db, limit=PAGE_SIZE), False),
+        ("error.get_errors_by_user_id", lambda: get_errors_by_user_id(db, user_id, limit=PAGE_SIZE), False),
+        ("stock.check_stock_exists", lambda: check_stock_exists(db, warehouse_id, goods_id), False),
+        ("stock.get_stocks_by_warehouse", lambda: get_stocks_by_warehouse(db, warehouse_id, limit=PAGE_SIZE), False),
+        ("stock.get_stock_statistics_by_warehouse", lambda: get_stock_statistics_by_warehouse(db, warehouse_id), False),
+        ("goods.by_name", lambda: db.execute(select(Goods).where(Goods.goods_name == goods_name)), False),
+        ("user.get_user_by_username", lambda: get_user_by_username(db, username), False),
+        ("user.get_user_roles", lambda: get_user_roles(db, user_id), False),
+        ("user.list_users_with_roles", lambda: list_users_with_roles(db, limit=PAGE_SIZE), False),
+        ("role.get_role_by_name", lambda: get_role_by_name(db, role_name), False),
+        ("transport.get_transports", lambda: get_transports(db, limit=PAGE_SIZE), False),
+    ]
+
+    full_scan: Dict[str, bool] = {}
+    for name, run, expect_full_scan in checks:
+        full_scan[name] = expect_full_scan
+        _current = name
+        try:
+            await run()
+        except Exception as e:
+            print(f"{name}: 执行失败 {e}")
+            await db.rollback()
+        finally:
+            _current = None
+    return full_scan
+
+
+def _seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """递归查找计划中顺序扫描的表"""
+    relations = []
+    if plan.get("Node Type") == "Seq Scan":
+        relations.append(f'{plan.get("Schema", "jishe")}.{plan["Relation Name"]}')
+    for child in plan.get("Plans", []):
+        relations.extend(_seq_scans(child))
+    return relations
+
+
+async def _relation_rows(driver_conn, relation: str, cache: Dict[str, float]) -> float:
+    """获取表的估算行数（pg_class.reltuples）"""
+    if relation not in cache:
+        schema, table = relation.split(".", 1)
+        cache[relation] = await driver_conn.fetchval(
+            "SELECT c.reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = $1 AND c.relname = $2",
+            schema, table,
+        ) or 0.0
+    return cache[relation]
+
+
+async def run(args: argparse.Namespace) -> int:
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record_statement)
+    issues = 0
+    async with async_engine.connect() as conn:
+        # 所有查询在同一个事务中执行，结束时回滚，不修改任何数据
+        async with AsyncSession(bind=conn) as db:
+            full_scan = await _collect(db)
+
+            driver_conn = (await conn.get_raw_connection()).driver_connection
+            options = "ANALYZE, BUFFERS, " if args.analyze else ""
+            row_cache: Dict[str, float] = {}
+            for name, statement, parameters in _statements:
+                raw_plan = await driver_conn.fetchval(
+                    f"EXPLAIN ({options}VERBOSE, FORMAT JSON) {statement}", *(parameters or ())
+                )
+                plan = json.loads(raw_plan)[0]["Plan"]
+                flagged = []
+                for relation in _seq_scans(plan):
+                    rows = await _relation_rows(driver_conn, relation, row_cache)
+                    if rows >= args.min_rows:
+                        flagged.append(f"{relation} (约 {int(rows)} 行)")
+
+                if flagged and not full_scan[name]:
+                    issues += 1
+                    result = "顺序扫描: " + ", ".join(flagged)
+                elif flagged:
+                    result = "全表统计，预期顺序扫描: " + ", ".join(flagged)
+                else:
+                    result = "OK"
+                timing = f" 实际耗时={plan['Actual Total Time']:.1f}ms" if args.analyze else ""
+                print(f"{name:<40} 估算代价={plan['Total Cost']:<12.1f}{timing} {result}")
+                if args.verbose:
+                    print(f"    {' '.join(statement.split())}")
+        await conn.rollback()
+    await async_engine.dispose()
+
+    print(f"共检查 {len(_statements)} 条 SQL，{issues} 条存在大表顺序扫描")
+    return 1 if issues else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CRUD 查询索引检查")
+    parser.add_argument("--min-rows", type=float, default=10_000, help="估算行数达到此值的表出现顺序扫描时报告")
+    parser.add_argument("--analyze", action="store_true", help="使用 EXPLAIN ANALYZE 实际执行查询")
+    parser.add_argument("--verbose", action="store_true", help="输出每条 SQL")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,694 @@
+"""
+本地 IoTDA 模拟服务
+
+在内存中实现 crud/iodta.py 用到的 IoTDA v5 接口（设备、设备组及成员、资源空间、异步命令），
+用于在没有华为云账号时联调与压测设备相关接口。支持注入延迟、限流与故障:
+- 延迟: 每个请求等待 latency_ms 加 0~jitter_ms 的随机时长
+- 限流: 超过 throttle_qps（令牌桶，容量 throttle_burst）的请求返回 429
+- 故障: 按 error_rate 的比例返回 500，按 hang_rate 的比例等待 hang_seconds 后再处理（用于触发客户端超时）
+
+与华为云一致，分页按记录ID降序返回，marker 为上一页最后一条记录的ID（24 位十六进制），
+每页 1~50 条；设备列表的 start_time 只按注册时间过滤；异步命令的状态随时间从 SENT
+变为 DELIVERED，再变为 SUCCESSFUL。请求中的签名与 Instance-Id 不做校验。
+
+注入参数可在运行中通过 PUT /_fake/config 修改，GET /_fake/stats 查看请求统计，
+POST /_fake/reset 清空数据并按启动参数重新生成。
+
+用法:
+python -m scripts.fake_iotda
+python -m scripts.fake_iotda --port 18080 --devices 2000 --groups 20 --latency-ms 50 --jitter-ms 30
+python -m scripts.fake_iotda --throttle-qps 100 --error-rate 0.02 --hang-rate 0.01 --hang-seconds 30
+
+应用通过 .env 中的 IOTDA_ENDPOINT=http://127.0.0.1:18080 连接模拟服务。
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+
+IOTDA_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+# 异步命令在下发后多少秒变为 DELIVERED、SUCCESSFUL
+COMMAND_DELIVERED_AFTER = 1.0
+COMMAND_SUCCEEDED_AFTER = 3.0
+
+
+class FaultConfig(BaseModel):
+    """延迟、限流与故障注入参数"""
+
+    latency_ms: float = Field(0, ge=0, description="固定延迟（毫秒）")
+    jitter_ms: float = Field(0, ge=0, description="额外随机延迟的上限（毫秒）")
+    throttle_qps: float = Field(0, ge=0, description="每秒允许的请求数，0 表示不限流")
+    throttle_burst: int = Field(0, ge=0, description="令牌桶容量，0 表示与 throttle_qps 相同")
+    error_rate: float = Field(0, ge=0, le=1, description="返回 500 的请求比例")
+    hang_rate: float = Field(0, ge=0, le=1, description="挂起的请求比例")
+    hang_seconds: float = Field(30, ge=0, description="挂起时长（秒）")
+
+
+class SeedConfig(BaseModel):
+    """初始数据规模"""
+
+    devices: int = Field(200, ge=0)
+    groups: int = Field(10, ge=0)
+    products: int = Field(3, ge=1)
+    group_size: int = Field(20, ge=0, description="每个设备组随机加入的设备数")
+    seed: int = 42
+
+
+class IotdaError(Exception):
+    """接口错误，按华为云的格式返回"""
+
+    def __init__(self, status_code: int, error_code: str, error_msg: str):
+        self.status_code = status_code
+        self.error_code = error_code
+        self.error_msg = error_msg
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime(IOTDA_TIME_FORMAT)
+
+
+def _public(record: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """去掉以下划线开头的内部字段，fields 不为空时只保留指定字段"""
+    return {
+        key: value
+        for key, value in record.items()
+        if not key.startswith("_") and (fields is None or key in fields)
+    }
+
+
+def _error_response(status_code: int, error_code: str, error_msg: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error_code": error_code, "error_msg": error_msg},
+        headers={"X-Request-Id": uuid.uuid4().hex},
+    )
+
+
+class FakeIotda:
+    """模拟服务的内存数据与注入状态"""
+
+    DEVICE_LIST_FIELDS = (
+        "app_id", "app_name", "device_id", "node_id", "gateway_id", "device_name", "node_type",
+        "description", "fw_version", "sw_version", "device_sdk_version", "product_id",
+        "product_name", "status", "tags",
+    )
+    GROUP_MEMBER_FIELDS = ("device_id", "node_id", "device_name", "product_id")
+
+    def __init__(self, seed: SeedConfig, faults: FaultConfig):
+        self.seed_config = seed
+        self.faults = faults
+        self.reset()
+
+    def reset(self) -> None:
+        """清空数据与统计，按初始数据规模重新生成"""
+        self._sequence = 0
+        self.apps: Dict[str, Dict[str, Any]] = {}
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        # group_id -> {device_id: 加入顺序}
+        self.members: Dict[str, Dict[str, int]] = {}
+        self.commands: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats: Counter = Counter()
+        # 令牌桶初始为满
+        self._tokens = float("inf")
+        self._refilled_at = time.monotonic()
+        self._seed()
+
+    def _next_id(self) -> str:
+        """递增的 24 位十六进制记录ID，同时作为分页 marker"""
+        self._sequence += 1
+        return f"{self._sequence:024x}"
+
+    def _seed(self) -> None:
+        rng = random.Random(self.seed_config.seed)
+        app = self.add_app("fake_app", default_app=True)
+        for index in range(self.seed_config.devices):
+            product = rng.randrange(self.seed_config.products)
+            self.add_device({
+                "node_id": f"node-{index:06d}",
+                "device_name": f"fake-device-{index:06d}",
+                "product_id": f"fake_product_{product}",
+                "app_id": app["app_id"],
+            }, status=rng.choice(["ONLINE", "OFFLINE", "INACTIVE"]))
+        device_ids = list(self.devices)
+        for index in range(self.seed_config.groups):
+            group = self.add_group({"name": f"fake-group-{index:03d}", "app_id": app["app_id"]})
+            for device_id in rng.sample(device_ids, min(self.seed_config.group_size, len(device_ids))):
+                self.group_action(group["group_id"], "addDevice", device_id)
+
+    # 注入
+
+    def take_token(self) -> bool:
+        """从令牌桶取一个令牌，未开启限流时总是成功"""
+        rate = self.faults.throttle_qps
+        if rate <= 0:
+            return True
+        burst = self.faults.throttle_burst or max(1.0, rate)
+        now = time.monotonic()
+        self._tokens = min(burst, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def inject(self) -> Optional[JSONResponse]:
+        """按注入参数等待，需要直接返回错误时返回对应响应"""
+        faults = self.faults
+        if faults.hang_rate and random.random() < faults.hang_rate:
+            self.stats["hung"] += 1
+            await asyncio.sleep(faults.hang_seconds)
+        delay = faults.latency_ms + random.uniform(0, faults.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if not self.take_token():
+            self.stats["throttled"] += 1
+            return _error_response(429, "APIGW.0308", "The request is throttled. (fake)")
+        if faults.error_rate and random.random() < faults.error_rate:
+            self.stats["injected_errors"] += 1
+            return _error_response(500, "FAKE.0500", "Injected server error. (fake)")
+        return None
+
+    # 分页
+
+    @staticmethod
+    def paginate(
+        records: List[Dict[str, Any]],
+        id_key: str,
+        limit: Optional[int],
+        marker: Optional[str],
+        offset: Optional[int],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        按记录ID降序分页
+
+        Returns:
+            Tuple: 本页记录与 page（count 为满足条件的记录总数，marker 为本页最后一条记录的ID）
+        """
+        limit = 10 if limit is None else limit
+        offset = offset or 0
+        if not 1 <= limit <= 50 or not 0 <= offset <= 500:
+            raise IotdaError(400, "IOTDA.000002", "Invalid limit or offset.")
+        count = len(records)
+        records = sorted(records, key=lambda record: record[id_key], reverse=True)
+        if marker:
+            records = [record for record in records if record[id_key] < marker]
+        page = records[offset:offset + limit]
+        return page, {"count": count, "marker": page[-1][id_key] if page else None}
+
+    # 资源空间
+
+    def add_app(self, app_name: str, default_app: bool = False) -> Dict[str, Any]:
+        app = {"app_id": self._next_id(), "app_name": app_name, "create_time": _now(), "default_app": default_app}
+        self.apps[app["app_id"]] = app
+        return app
+
+    def get_app(self, app_id: str) -> Dict[str, Any]:
+        if app_id not in self.apps:
+            raise IotdaError(404, "IOTDA.014000", "The application does not exist.")
+        return self.apps[app_id]
+
+    def default_app(self) -> Dict[str, Any]:
+        return next(app for app in self.apps.values() if app["default_app"])
+
+    # 设备
+
+    def add_device(self, body: Dict[str, Any], status: str = "INACTIVE") -> Dict[str, Any]:
+        if not body.get("node_id") or not body.get("product_id"):
+            raise IotdaError(400, "IOTDA.000002", "node_id and product_id are required.")
+        app = self.get_app(body["app_id"]) if body.get("app_id") else self.default_app()
+        sequence = self._next_id()
+        device_id = body.get("device_id") or f"{body['product_id']}_{body['node_id']}"
+        if device_id in self.devices:
+            raise IotdaError(409, "IOTDA.014102", "The device already exists.")
+        now = _now()
+        device = {
+            "app_id": app["app_id"],
+            "app_name": app["app_name"],
+            "device_id": device_id,
+            "node_id": body["node_id"],
+            "gateway_id": body.get("gateway_id") or device_id,
+            "device_name": body.get("device_name") or body["node_id"],
+            "node_type": "GATEWAY" if not body.get("gateway_id") else "ENDPOINT",
+            "description": body.get("description"),
+            "fw_version": None,
+            "sw_version": None,
+            "device_sdk_version": None,
+            "product_id": body["product_id"],
+            "product_name": body["product_id"],
+            "status": status,
+            "create_time": now,
+            "connection_status_update_time": now,
+            "active_time": None,
+            "tags": [],
+            "extension_info": body.get("extension_info"),
+            "_sequence": sequence,
+        }
+        self.devices[device_id] = device
+        return device
+
+    def get_device(self, device_id: str) -> Dict[str, Any]:
+        if device_id not in self.devices:
+            raise IotdaError(404, "IOTDA.014000", "The device does not exist.")
+        return self.devices[device_id]
+
+    def delete_device(self, device_id: str) -> None:
+        self.get_device(device_id)
+        del self.devices[device_id]
+        self.commands.pop(device_id, None)
+        for members in self.members.values():
+            members.pop(device_id, None)
+
+    # 设备组
+
+    def add_group(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not body.get("name"):
+            raise IotdaError(400, "IOTDA.000002", "name is required.")
+        if any(group["name"] == body["name"] for group in self.groups.values()):
+            raise IotdaError(409, "IOTDA.014103", "The device group name already exists.")
+        group = {
+            "group_id": self._next_id(),
+            "name": body["name"],
+            "description": body.get("description"),
+            "super_group_id": body.get("super_group_id"),
+            "group_type": body.get("group_type") or "STATIC",
+            "dynamic_group_rule": body.get("dynamic_group_rule"),
+            "_app_id": body.get("app_id") or self.default_app()["app_id"],
+        }
+        self.groups[group["group_id"]] = group
+        self.members[group["group_id"]] = {}
+        return group
+
+    def get_group(self, group_id: str) -> Dict[str, Any]:
+        if group_id not in self.groups:
+            raise IotdaError(404, "IOTDA.014000", "The device group does not exist.")
+        return self.groups[group_id]
+
+    def group_action(self, group_id: str, action_id: str, device_id: str) -> None:
+        self.get_group(group_id)
+        self.get_device(device_id)
+        if action_id == "addDevice":
+            self._sequence += 1
+            self.members[group_id].setdefault(device_id, self._sequence)
+        elif action_id == "removeDevice":
+            self.members[group_id].pop(device_id, None)
+        else:
+            raise IotdaError(400, "IOTDA.000002", "action_id must be addDevice or removeDevice.")
+
+    # 异步命令
+
+    def add_command(self, device_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        self.get_device(device_id)
+        if not body.get("paras"):
+            raise IotdaError(400, "IOTDA.000002", "paras is required.")
+        command = {
+            "device_id": device_id,
+            "command_id": uuid.uuid4().hex,
+            "service_id": body.get("service_id"),
+            "command_name": body.get("command_name"),
+            "paras": body["paras"],
+            "expire_time": body.get("expire_time", 86400),
+            "status": "SENT",
+            "created_time": _now(),
+            "send_strategy": body.get("send_strategy") or "immediately",
+            "_sequence": self._next_id(),
+            "_sent_at": time.monotonic(),
+        }
+        self.commands.setdefault(device_id, []).append(command)
+        return command
+
+    @staticmethod
+    def command_view(command: Dict[str, Any]) -> Dict[str, Any]:
+        """按下发后经过的时间推进命令状态"""
+        age = time.monotonic() - command["_sent_at"]
+        if age >= COMMAND_SUCCEEDED_AFTER:
+            command["status"] = "SUCCESSFUL"
+        elif age >= COMMAND_DELIVERED_AFTER:
+            command["status"] = "DELIVERED"
+        return _public(command)
+
+    def get_command(self, device_id: str, command_id: str) -> Dict[str, Any]:
+        self.get_device(device_id)
+        for command in self.commands.get(device_id, []):
+            if command["command_id"] == command_id:
+                return command
+        raise IotdaError(404, "IOTDA.014000", "The command does not exist.")
+
+
+router = APIRouter(prefix="/v5/iot/{project_id}")
+
+
+def _state(request: Request) -> FakeIotda:
+    return request.app.state.fake
+
+
+@router.get("/devices")
+async def list_devices(
+    request: Request,
+    product_id: Optional[str] = None,
+    gateway_id: Optional[str] = None,
+    node_id: Optional[str] = None,
+    device_name: Optional[str] = None,
+    app_id: Optional[str] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    limit: Optional[int] = None,
+    marker: Optional[str] = None,
+    offset: Optional[int] = None,
+):
+    fake = _state(request)
+    devices = [
+        device for device in fake.devices.values()
+        if (product_id is None or device["product_id"] == product_id)
+        and (gateway_id is None or device["gateway_id"] == gateway_id)
+        and (node_id is None or device["node_id"] == node_id)
+        and (device_name is None or device["device_name"] == device_name)
+        and (app_id is None or device["app_id"] == app_id)
+        and (start_time is None or device["create_time"] > start_time)
+        and (end_time is None or device["create_time"] < end_time)
+    ]
+    page, info = fake.paginate(devices, "_sequence", limit, marker, offset)
+    return {"devices": [_public(device, fake.DEVICE_LIST_FIELDS) for device in page], "page": info}
+
+
+@router.post("/devices", status_code=201)
+async def add_device(request: Request):
+    return _public(_state(request).add_device(await request.json()))
+
+
+@router.get("/devices/{device_id}")
+async def show_device(request: Request, device_id: str):
+    return _public(_state(request).get_device(device_id))
+
+
+@router.put("/devices/{device_id}")
+async def update_device(request: Request, device_id: str):
+    device = _state(request).get_device(device_id)
+    body = await request.json()
+    for key in ("device_name", "description", "extension_info"):
+        if body.get(key) is not None:
+            device[key] = body[key]
+    return _public(device)
+
+
+@router.delete("/devices/{device_id}", status_code=204)
+async def delete_device(request: Request, device_id: str):
+    _state(request).delete_device(device_id)
+    return Response(status_code=204)
+
+
+@router.post("/devices/{device_id}/async-commands", status_code=201)
+async def create_async_command(request: Request, device_id: str):
+    return _public(_state(request).add_command(device_id, await request.json()))
+
+
+@router.get("/devices/{device_id}/async-commands")
+async def list_async_commands(
+    request: Request,
+    device_id: str,
+    status: Optional[str] = None,
+    command_name: Optional[str] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    limit: Optional[int] = None,
+    marker: Optional[str] = None,
+    offset: Optional[int] = None,
+):
+    fake = _state(request)
+    fake.get_device(device_id)
+    commands = [
+        command for command in fake.commands.get(device_id, [])
+        if (command_name is None or command["command_name"] == command_name)
+        and (start_time is None or command["created_time"] > start_time)
+        and (end_time is None or command["created_time"] < end_time)
+    ]
+    page, info = fake.paginate(commands, "_sequence", limit, marker, offset)
+    views = [fake.command_view(command) for command in page]
+    if status is not None:
+        views = [view for view in views if view["status"] == status]
+    return {"commands": views, "page": info}
+
+
+@router.get("/devices/{device_id}/async-commands/{command_id}")
+async def show_async_device_command(request: Request, device_id: str, command_id: str):
+    fake = _state(request)
+    return fake.command_view(fake.get_command(device_id, command_id))
+
+
+@router.post("/device-group", status_code=201)
+async def add_device_group(request: Request):
+    return _public(_state(request).add_group(await request.json()))
+
+
+@router.get("/device-group")
+async def list_device_groups(
+    request: Request,
+    app_id: Optional[str] = None,
+    group_type: Optional[str] = None,
+    name: Optional[str] = None,
+    limit: Optional[int] = None,
+    marker: Optional[str] = None,
+    offset: Optional[int] = None,
+):
+    fake = _state(request)
+    groups = [
+        group for group in fake.groups.values()
+        if (app_id is None or group["_app_id"] == app_id)
+        and (group_type is None or group["group_type"] == group_type)
+        and (name is None or group["name"] == name)
+    ]
+    page, info = fake.paginate(groups, "group_id", limit, marker, offset)
+    return {"device_groups": [_public(group) for group in page], "page": info}
+
+
+@router.get("/device-group/{group_id}")
+async def show_device_group(request: Request, group_id: str):
+    return _public(_state(request).get_group(group_id))
+
+
+@router.put("/device-group/{group_id}")
+async def update_device_group(request: Request, group_id: str):
+    group = _state(request).get_group(group_id)
+    body = await request.json()
+    for key in ("name", "description"):
+        if body.get(key) is not None:
+            group[key] = body[key]
+    return _public(group)
+
+
+@router.delete("/device-group/{group_id}", status_code=204)
+async def delete_device_group(request: Request, group_id: str):
+    fake = _state(request)
+    fake.get_group(group_id)
+    del fake.groups[group_id]
+    del fake.members[group_id]
+    return Response(status_code=204)
+
+
+@router.post("/device-group/{group_id}/action")
+async def create_or_delete_device_in_group(request: Request, group_id: str, action_id: str, device_id: str):
+    _state(request).group_action(group_id, action_id, device_id)
+    return Response(status_code=200)
+
+
+@router.get("/device-group/{group_id}/devices")
+async def show_devices_in_group(
+    request: Request,
+    group_id: str,
+    limit: Optional[int] = None,
+    marker: Optional[str] = None,
+    offset: Optional[int] = None,
+):
+    fake = _state(request)
+    fake.get_group(group_id)
+    members = [
+        {**fake.devices[device_id], "_member": f"{sequence:024x}"}
+        for device_id, sequence in fake.members[group_id].items()
+    ]
+    page, info = fake.paginate(members, "_member", limit, marker, offset)
+    return {"devices": [_public(device, fake.GROUP_MEMBER_FIELDS) for device in page], "page": info}
+
+
+@router.post("/apps", status_code=201)
+async def add_application(request: Request):
+    body = await request.json()
+    if not body.get("app_name"):
+        raise IotdaError(400, "IOTDA.000002", "app_name is required.")
+    return _state(request).add_app(body["app_name"])
+
+
+@router.get("/apps")
+async def show_applications(request: Request, default_app: Optional[bool] = None):
+    apps = [
+        app for app in _state(request).apps.values()
+        if default_app is None or app["default_app"] == default_app
+    ]
+    return {"applications": apps}
+
+
+@router.get("/apps/{app_id}")
+async def show_application(request: Request, app_id: str):
+    return _state(request).get_app(app_id)
+
+
+@router.put("/apps/{app_id}")
+async def update_application(request: Request, app_id: str):
+    app = _state(request).get_app(app_id)
+    body = await request.json()
+    if body.get("app_name"):
+        app["app_name"] = body["app_name"]
+    return app
+
+
+@router.delete("/apps/{app_id}", status_code=204)
+async def delete_application(request: Request, app_id: str):
+    fake = _state(request)
+    if fake.get_app(app_id)["default_app"]:
+        raise IotdaError(400, "IOTDA.014001", "The default application cannot be deleted.")
+    del fake.apps[app_id]
+    return Response(status_code=204)
+
+
+admin_router = APIRouter(prefix="/_fake", tags=["模拟服务管理"])
+
+
+@admin_router.get("/config")
+async def get_config(request: Request) -> FaultConfig:
+    return _state(request).faults
+
+
+@admin_router.put("/config")
+async def update_config(request: Request, faults: FaultConfig) -> FaultConfig:
+    """修改注入参数，立即生效"""
+    _state(request).faults = faults
+    return faults
+
+
+@admin_router.get("/stats")
+async def get_stats(request: Request) -> Dict[str, Any]:
+    fake = _state(request)
+    return {
+        **fake.stats,
+        "devices": len(fake.devices),
+        "device_groups": len(fake.groups),
+        "commands": sum(len(commands) for commands in fake.commands.values()),
+    }
+
+
+@admin_router.post("/reset")
+async def reset(request: Request) -> Dict[str, Any]:
+    _state(request).reset()
+    return await get_stats(request)
+
+
+def create_fake_iotda_app(seed: Optional[SeedConfig] = None, faults: Optional[FaultConfig] = None) -> FastAPI:
+    """
+    创建模拟服务应用
+
+    Args:
+        seed: 初始数据规模
+        faults: 延迟、限流与故障注入参数
+
+    Returns:
+        FastAPI: 模拟服务应用，状态保存在 app.state.fake
+    """
+    app = FastAPI(title="Fake IoTDA", docs_url="/_fake/docs", openapi_url="/_fake/openapi.json")
+    app.state.fake = FakeIotda(seed or SeedConfig(), faults or FaultConfig())
+
+    @app.exception_handler(IotdaError)
+    async def iotda_error_handler(request: Request, exc: IotdaError) -> JSONResponse:
+        _state(request).stats[f"status_{exc.status_code}"] += 1
+        return _error_response(exc.status_code, exc.error_code, exc.error_msg)
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if not request.url.path.startswith("/v5/"):
+            return await call_next(request)
+        fake = _state(request)
+        fake.stats["requests"] += 1
+        injected = await fake.inject()
+        if injected is not None:
+            return injected
+        response = await call_next(request)
+        response.headers["X-Request-Id"] = uuid.uuid4().hex
+        return response
+
+    app.include_router(router)
+    app.include_router(admin_router)
+    return app
+
+
+def start_fake_iotda_in_thread(app: FastAPI, host: str = "127.0.0.1", port: int = 18080) -> uvicorn.Server:
+    """
+    在后台线程中运行模拟服务（用于压测脚本在同一进程内启动）
+
+    Returns:
+        uvicorn.Server: 设置 server.should_exit = True 即可停止
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="fake-iotda", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"模拟服务启动失败: {host}:{port}")
+        time.sleep(0.05)
+    return server
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加初始数据与注入参数的命令行选项（压测脚本共用）"""
+    parser.add_argument("--devices", type=int, default=200, help="初始设备数")
+    parser.add_argument("--groups", type=int, default=10, help="初始设备组数")
+    parser.add_argument("--products", type=int, default=3, help="设备分布的产品数")
+    parser.add_argument("--group-size", type=int, default=20, help="每个设备组的设备数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0, help="固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="额外随机延迟的上限（毫秒）")
+    parser.add_argument("--throttle-qps", type=float, default=0, help="每秒允许的请求数，0 表示不限流")
+    parser.add_argument("--throttle-burst", type=int, default=0, help="令牌桶容量，默认与 --throttle-qps 相同")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回 500 的请求比例")
+    parser.add_argument("--hang-rate", type=float, default=0, help="挂起的请求比例")
+    parser.add_argument("--hang-seconds", type=float, default=30, help="挂起时长（秒）")
+
+
+def configs_from_args(args: argparse.Namespace) -> Tuple[SeedConfig, FaultConfig]:
+    seed = SeedConfig(
+        devices=args.devices, groups=args.groups, products=args.products,
+        group_size=args.group_size, seed=args.seed,
+    )
+    faults = FaultConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        throttle_qps=args.throttle_qps, throttle_burst=args.throttle_burst,
+        error_rate=args.error_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+    )
+    return seed, faults
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地 IoTDA 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    seed, faults = configs_from_args(args)
+    app = create_fake_iotda_app(seed, faults)
+    print(f"IoTDA 模拟服务: http://{args.host}:{args.port}（设备 {seed.devices} 个，设备组 {seed.groups} 个）")
+    print(f"在 .env 中设置 IOTDA_ENDPOINT=http://{args.host}:{args.port} 即可连接")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
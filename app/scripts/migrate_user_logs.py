@@ -0,0 +1,109 @@
+"""
+用户操作日志迁移脚本
+
+将 user_log/ 目录下按用户保存的 JSONL 日志文件流式导入 jishe.user_log 表
+（需先执行 migrations/003_user_log.sql）。每个文件逐行读取，按批通过 COPY 写入，
+不会一次性把文件载入内存。旧版本创建日志文件时先写入了 "[]"（没有换行），
+第一条日志与其在同一行，读取时会去掉这个前缀。无法解析的行会被跳过，并按文件报告跳过的条数。
+
+脚本只应执行一次：重复执行会重复导入。加 --archive 可在导入成功后将文件移动到
+user_log/migrated/，避免重复导入。
+
+用法:
+python -m scripts.migrate_user_logs
+python -m scripts.migrate_user_logs --dir user_log --batch-size 5000 --archive
+python -m scripts.migrate_user_logs --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+from typing import Iterator, List, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loguru import logger
+
+from service.user_log import USER_LOG_DIR, copy_user_logs, to_user_log_record
+
+LOG_FILE_PATTERN = re.compile(r"^(\d+)_user_log\.json$")
+
+
+def iter_records(path: str, user_id: str) -> Iterator[Tuple[tuple, bool]]:
+    """逐行读取日志文件，返回 (记录, 是否有效)"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if line_number == 0 and line.startswith("[]"):
+                # 旧版本创建文件时写入的空数组，第一条日志紧跟其后
+                line = line[2:].lstrip()
+            if not line:
+                continue
+            try:
+                yield to_user_log_record(user_id, json.loads(line)), True
+            except (ValueError, KeyError, TypeError):
+                yield (), False
+
+
+async def migrate_file(path: str, user_id: str, batch_size: int, dry_run: bool) -> Tuple[int, int]:
+    """
+    导入单个日志文件
+
+    Returns:
+        Tuple[int, int]: (导入条数, 跳过条数)
+    """
+    imported = skipped = 0
+    batch: List[tuple] = []
+    for record, valid in iter_records(path, user_id):
+        if not valid:
+            skipped += 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            imported += len(batch) if dry_run else await copy_user_logs(batch)
+            batch = []
+    if batch:
+        imported += len(batch) if dry_run else await copy_user_logs(batch)
+    return imported, skipped
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="将用户日志文件导入 jishe.user_log 表")
+    parser.add_argument("--dir", default=USER_LOG_DIR, help="日志文件目录")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批 COPY 的行数")
+    parser.add_argument("--archive", action="store_true", help="导入成功后将文件移动到 <dir>/migrated/")
+    parser.add_argument("--dry-run", action="store_true", help="只解析文件并统计，不写入数据库")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        logger.error(f"目录不存在: {args.dir}")
+        return
+
+    total_imported = total_skipped = 0
+    archive_dir = os.path.join(args.dir, "migrated")
+    for name in sorted(os.listdir(args.dir)):
+        match = LOG_FILE_PATTERN.match(name)
+        if not match:
+            continue
+        path = os.path.join(args.dir, name)
+        imported, skipped = await migrate_file(path, match.group(1), args.batch_size, args.dry_run)
+        total_imported += imported
+        total_skipped += skipped
+        if skipped:
+            logger.warning(f"{name}: 导入 {imported} 条，跳过 {skipped} 条无法解析的日志")
+        else:
+            logger.info(f"{name}: 导入 {imported} 条")
+        if args.archive and not args.dry_run:
+            os.makedirs(archive_dir, exist_ok=True)
+            shutil.move(path, os.path.join(archive_dir, name))
+
+    logger.info(f"完成: 共导入 {total_imported} 条，跳过 {total_skipped} 条")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
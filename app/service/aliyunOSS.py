@@ -1,25 +1,34 @@
 # oss_client.py
-import os
+from typing import Optional
+
 import oss2
 from core.config import settings
 
-# 替换为你的实际配置
-auth = oss2.Auth(settings.OSS_ACCESS_KEY_ID, settings.OSS_ACCESS_KEY_SECRET)
-bucket = oss2.Bucket(auth, settings.OSS_ENDPOINT, settings.OSS_BUCKET_NAME)
+_bucket: Optional[oss2.Bucket] = None
+
+
+def _get_bucket() -> oss2.Bucket:
+    """惰性创建 Bucket；会话不读取环境变量中的代理配置，直连 OSS"""
+    global _bucket
+    if _bucket is None:
+        session = oss2.Session()
+        session.session.trust_env = False
+        auth = oss2.Auth(settings.OSS_ACCESS_KEY_ID, settings.OSS_ACCESS_KEY_SECRET)
+        _bucket = oss2.Bucket(auth, settings.OSS_ENDPOINT, settings.OSS_BUCKET_NAME, session=session)
+    return _bucket
 
-ALLOWED_SUFFIX = {"jpg", "jpeg", "png", "gif"}
 
+def put_object(key: str, data: bytes, content_type: str) -> str:
+    """
+    上传对象（同步调用，需在线程池中执行）
 
-def upload_avatar(file_bytes: bytes, file_suffix: str) -> str:
-    import uuid
-    os.environ.pop('HTTP_PROXY', None)
-    os.environ.pop('HTTPS_PROXY', None)
-    os.environ.pop('http_proxy', None)
-    os.environ.pop('https_proxy', None)
-    file_suffix = file_suffix.lower()
-    if file_suffix not in ALLOWED_SUFFIX:
-        raise ValueError("不支持的文件类型")
+    Args:
+        key: 对象名，如 avatars/<id>/256.webp
+        data: 对象内容
+        content_type: 内容类型
 
-    filename = f"avatars/{uuid.uuid4().hex}.{file_suffix}"
-    bucket.put_object(filename, file_bytes)
-    return f"https://{settings.OSS_BUCKET_NAME}.{settings.OSS_ENDPOINT}/{filename}"
+    Returns:
+        str: 对象的访问地址
+    """
+    _get_bucket().put_object(key, data, headers={"Content-Type": content_type})
+    return f"https://{settings.OSS_BUCKET_NAME}.{settings.OSS_ENDPOINT}/{key}"
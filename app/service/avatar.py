@@ -0,0 +1,278 @@
+"""
+用户头像上传
+
+- 直接按块解析 multipart 请求体，只保留头像文件的内容，超过 AVATAR_MAX_BYTES 时立即返回 413，
+  不会先把整个请求体读入内存或临时文件
+- 图片的解码、裁剪缩放与编码以及上传存储都在按 AVATAR_WORKERS 配置的线程池中执行，不阻塞事件循环；
+  排队任务超过上限时返回 429
+- 上传的图片按内容识别格式（JPEG/PNG/GIF/WEBP），居中裁剪为正方形后缩放为 AVATAR_SIZES 中的各个尺寸，
+  统一编码为 WEBP；动图只保留第一帧
+- 存储后端由 AVATAR_STORAGE 决定: oss 为阿里云 OSS，local 为本地目录 AVATAR_LOCAL_DIR（开发与测试使用，
+  由应用以 /static 路径提供访问）
+"""
+
+import asyncio
+import io
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, status
+from loguru import logger
+from multipart.multipart import MultipartParser, parse_options_header
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.config import settings
+from service import aliyunOSS
+
+# 可以上传的图片格式（按内容识别，不看文件后缀）
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+AVATAR_CONTENT_TYPE = "image/webp"
+# multipart 边界与各部分头部的长度余量，用于在读取请求体之前按 Content-Length 拒绝过大的请求
+MULTIPART_OVERHEAD = 64 * 1024
+
+# 请求体中头像文件的字段名，同时用于接口文档
+AVATAR_FIELD = "file"
+AVATAR_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": [AVATAR_FIELD],
+                    "properties": {AVATAR_FIELD: {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+# 正在处理或排队中的头像数
+_in_flight = 0
+
+_stats = {
+    "uploaded": 0,
+    "rejected_too_large": 0,
+    "rejected_invalid": 0,
+    "rejected_busy": 0,
+}
+
+
+def _too_large() -> HTTPException:
+    _stats["rejected_too_large"] += 1
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"头像文件不能超过 {settings.AVATAR_MAX_BYTES // 1024} KB",
+    )
+
+
+async def read_avatar_upload(request: Request) -> bytes:
+    """
+    按块读取 multipart 请求体中的头像文件
+
+    Args:
+        request: 上传请求，头像文件在 file 字段中
+
+    Returns:
+        bytes: 头像文件内容
+
+    Raises:
+        HTTPException: 请求格式错误或缺少文件(400)、文件过大(413)
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="请使用 multipart/form-data 上传头像")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.AVATAR_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    data = bytearray()
+    state: Dict[str, Any] = {"header_field": b"", "header_value": b"", "disposition": b"", "target": False, "found": False}
+
+    def on_part_begin() -> None:
+        state["disposition"] = b""
+
+    def on_header_field(chunk: bytes, start: int, end: int) -> None:
+        state["header_field"] += chunk[start:end]
+
+    def on_header_value(chunk: bytes, start: int, end: int) -> None:
+        state["header_value"] += chunk[start:end]
+
+    def on_header_end() -> None:
+        if state["header_field"].lower() == b"content-disposition":
+            state["disposition"] = state["header_value"]
+        state["header_field"] = state["header_value"] = b""
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(state["disposition"])
+        # 只接收第一个头像文件字段，其他字段的内容直接丢弃
+        state["target"] = options.get(b"name") == AVATAR_FIELD.encode() and not state["found"]
+        state["found"] = state["found"] or state["target"]
+
+    def on_part_data(chunk: bytes, start: int, end: int) -> None:
+        if state["target"]:
+            data.extend(chunk[start:end])
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if len(data) > settings.AVATAR_MAX_BYTES:
+                raise _too_large()
+        parser.finalize()
+    except ValueError as e:
+        # python-multipart 在请求体格式错误时抛出 MultipartParseError (ValueError 的子类)
+        raise HTTPException(status_code=400, detail=f"请求体格式错误: {e}")
+    if not state["found"] or not data:
+        raise HTTPException(status_code=400, detail=f"缺少头像文件字段 {AVATAR_FIELD}")
+    return bytes(data)
+
+
+def render_avatars(data: bytes) -> Dict[int, bytes]:
+    """
+    把上传的图片居中裁剪为正方形，并缩放编码为各个尺寸的 WEBP
+
+    Args:
+        data: 图片文件内容
+
+    Returns:
+        Dict[int, bytes]: 边长到 WEBP 内容的映射
+
+    Raises:
+        ValueError: 不是支持的图片格式，或像素数超过 AVATAR_MAX_PIXELS
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise ValueError("不支持的文件类型")
+    with image:
+        if image.format not in ALLOWED_FORMATS:
+            raise ValueError("不支持的文件类型")
+        # 解码之前检查像素数，避免解压炸弹占满内存
+        if image.width * image.height > settings.AVATAR_MAX_PIXELS:
+            raise ValueError("图片分辨率过大")
+        largest = max(settings.AVATAR_SIZES)
+        # JPEG 可以在解码时直接按 1/2、1/4、1/8 缩小，大图的解码开销显著降低
+        image.draft("RGB", (largest, largest))
+        try:
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        except OSError as e:
+            raise ValueError(f"图片已损坏: {e}")
+
+    square = ImageOps.fit(image, (largest, largest), Image.Resampling.LANCZOS)
+    rendered = {}
+    for size in sorted(set(settings.AVATAR_SIZES), reverse=True):
+        resized = square if size == largest else square.resize((size, size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, "WEBP", quality=settings.AVATAR_QUALITY, method=4)
+        rendered[size] = output.getvalue()
+    return rendered
+
+
+def _put_local(key: str, data: bytes, content_type: str) -> str:
+    """写入本地目录，先写临时文件再重命名，读取方不会看到写了一半的文件"""
+    path = os.path.join(settings.AVATAR_LOCAL_DIR, *key.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return f"{settings.AVATAR_LOCAL_BASE_URL.rstrip('/')}/{key}"
+
+
+# 存储后端: (对象名, 内容, 内容类型) -> 访问地址，均为同步调用
+_STORAGE_BACKENDS: Dict[str, Callable[[str, bytes, str], str]] = {
+    "oss": aliyunOSS.put_object,
+    "local": _put_local,
+}
+
+
+def _render_and_store(data: bytes) -> str:
+    """在线程池中执行：生成各尺寸头像并上传，返回最大尺寸的访问地址"""
+    put = _STORAGE_BACKENDS[settings.AVATAR_STORAGE]
+    prefix = f"avatars/{uuid.uuid4().hex}"
+    urls = {size: put(f"{prefix}/{size}.webp", content, AVATAR_CONTENT_TYPE) for size, content in render_avatars(data).items()}
+    return urls[max(urls)]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.AVATAR_WORKERS, thread_name_prefix="avatar")
+    return _executor
+
+
+async def save_avatar(data: bytes) -> str:
+    """
+    在线程池中生成并上传头像
+
+    Args:
+        data: 上传的图片文件内容
+
+    Returns:
+        str: 最大尺寸头像的访问地址，其他尺寸与其在同一目录下，文件名为 <边长>.webp
+
+    Raises:
+        ValueError: 不是支持的图片或图片已损坏
+        HTTPException: 线程池已饱和(429)
+    """
+    global _in_flight
+    capacity = settings.AVATAR_WORKERS + settings.AVATAR_MAX_PENDING
+    if _in_flight >= capacity:
+        _stats["rejected_busy"] += 1
+        logger.warning(f"头像处理线程池已饱和({_in_flight}/{capacity})，拒绝请求")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many concurrent avatar uploads, please retry later",
+            headers={"Retry-After": "1"},
+        )
+
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        url = await loop.run_in_executor(_get_executor(), _render_and_store, data)
+    except ValueError:
+        _stats["rejected_invalid"] += 1
+        raise
+    finally:
+        _in_flight -= 1
+    _stats["uploaded"] += 1
+    return url
+
+
+def shutdown_avatar_executor() -> None:
+    """关闭头像处理线程池，在应用关闭时调用"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def get_avatar_stats() -> Dict[str, Any]:
+    """
+    获取头像上传统计
+
+    Returns:
+        Dict[str, Any]: 存储后端、线程池大小、处理中的数量、成功与各原因拒绝的次数
+    """
+    return {
+        "storage": settings.AVATAR_STORAGE,
+        "workers": settings.AVATAR_WORKERS,
+        "in_flight": _in_flight,
+        **_stats,
+    }
@@ -0,0 +1,209 @@
+"""
+聊天记录持久化
+
+- 开启 CHAT_HISTORY_PERSIST 后，每轮对话的用户消息与助手回复先写入进程内缓冲区，
+  由后台任务按 CHAT_HISTORY_FLUSH_INTERVAL_SECONDS 或攒满 CHAT_HISTORY_BATCH_SIZE 条时批量插入 jishe.chat_history
+- 应用关闭时写出缓冲区中剩余的消息
+- 任意进程为用户创建会话时从数据库恢复最近的对话，多进程部署无需会话粘滞
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import settings
+from db.database import async_db_session
+from models.chat_history import ChatHistory
+
+# 等待写入的消息，按产生顺序排列
+_buffer: List[Dict[str, Any]] = []
+_flush_lock = asyncio.Lock()
+_wakeup = asyncio.Event()
+_writer_task: Optional["asyncio.Task[None]"] = None
+# 关闭时置位，后台任务写完当前批次后退出，不在写入中途取消
+_stopping = False
+
+_stats = {
+    "recorded": 0,
+    "written": 0,
+    "dropped": 0,
+    "flushes": 0,
+    "failed_flushes": 0,
+    "hydrated_sessions": 0,
+}
+
+
+def _drop_overflow() -> None:
+    """缓冲区超过上限时丢弃最早的消息"""
+    overflow = len(_buffer) - settings.CHAT_HISTORY_MAX_BUFFER
+    if overflow > 0:
+        del _buffer[:overflow]
+        _stats["dropped"] += overflow
+        logger.warning(f"聊天记录缓冲区已满，丢弃 {overflow} 条最早的消息")
+
+
+def record_chat_message(user_id: int, role: str, content: str) -> None:
+    """
+    记录一条聊天消息，由后台任务批量写入数据库
+
+    Args:
+        user_id: 用户ID
+        role: 消息角色 (user / assistant)
+        content: 消息内容
+    """
+    if not settings.CHAT_HISTORY_PERSIST:
+        return
+    _buffer.append({
+        "user_id": user_id,
+        "role": role,
+        "content": content,
+        "created_at": datetime.now(),
+    })
+    _stats["recorded"] += 1
+    _drop_overflow()
+    if len(_buffer) >= settings.CHAT_HISTORY_BATCH_SIZE:
+        _wakeup.set()
+
+
+async def flush_chat_history() -> int:
+    """
+    将缓冲区中的消息批量写入数据库
+
+    写入失败或被取消时消息放回缓冲区，等待下一次写入
+
+    Returns:
+        int: 写入的消息数
+    """
+    async with _flush_lock:
+        if not _buffer:
+            return 0
+        batch = _buffer[:]
+        _buffer.clear()
+        try:
+            async with async_db_session() as session:
+                await session.execute(insert(ChatHistory), batch)
+                await session.commit()
+        except asyncio.CancelledError:
+            _buffer[:0] = batch
+            raise
+        except SQLAlchemyError as e:
+            _buffer[:0] = batch
+            _drop_overflow()
+            _stats["failed_flushes"] += 1
+            logger.error(f"写入聊天记录失败，{len(batch)} 条消息等待重试: {e}")
+            return 0
+        _stats["written"] += len(batch)
+        _stats["flushes"] += 1
+        return len(batch)
+
+
+async def _writer_loop() -> None:
+    """后台写入任务：定时或缓冲区攒满时写入数据库，关闭时由 stop_chat_history_writer 写出剩余消息"""
+    while not _stopping:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.CHAT_HISTORY_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        if _stopping:
+            return
+        await flush_chat_history()
+
+
+def start_chat_history_writer() -> None:
+    """启动后台写入任务（CHAT_HISTORY_PERSIST 关闭时不启动）"""
+    global _writer_task, _stopping
+    if settings.CHAT_HISTORY_PERSIST and _writer_task is None:
+        _stopping = False
+        _writer_task = asyncio.create_task(_writer_loop())
+
+
+async def stop_chat_history_writer() -> None:
+    """停止后台写入任务（等待正在进行的写入完成），并写出缓冲区中剩余的消息"""
+    global _writer_task, _stopping
+    if _writer_task is not None:
+        _stopping = True
+        _wakeup.set()
+        await _writer_task
+        _writer_task = None
+    await flush_chat_history()
+    if _buffer:
+        _stats["dropped"] += len(_buffer)
+        logger.error(f"关闭时未能写入 {len(_buffer)} 条聊天记录")
+        _buffer.clear()
+
+
+async def load_recent_history(user_id: int, limit: int) -> List[Dict[str, str]]:
+    """
+    读取用户最近的对话，包括本进程中尚未写入数据库的消息
+
+    Args:
+        user_id: 用户ID
+        limit: 最多返回的消息数
+
+    Returns:
+        List[Dict[str, str]]: 按时间从早到晚排列的 {"role", "content"} 列表
+    """
+    if not settings.CHAT_HISTORY_PERSIST or limit <= 0:
+        return []
+
+    # 持有写入锁，避免一批消息已移出缓冲区但尚未提交时被漏读
+    async with _flush_lock:
+        pending = [
+            {"role": item["role"], "content": item["content"]}
+            for item in _buffer if item["user_id"] == user_id
+        ]
+        try:
+            async with async_db_session() as session:
+                rows = (await session.execute(
+                    select(ChatHistory.role, ChatHistory.content)
+                    .where(ChatHistory.user_id == user_id)
+                    .order_by(ChatHistory.id.desc())
+                    .limit(limit)
+                )).all()
+        except SQLAlchemyError as e:
+            logger.warning(f"读取用户 {user_id} 的聊天记录失败: {e}")
+            rows = []
+
+    history = [{"role": row.role, "content": row.content} for row in reversed(rows)] + pending
+    if history:
+        _stats["hydrated_sessions"] += 1
+    return history[-limit:]
+
+
+async def clear_chat_history(user_id: int) -> None:
+    """
+    删除用户的全部聊天记录（包括尚未写入的消息）
+
+    Args:
+        user_id: 用户ID
+    """
+    if not settings.CHAT_HISTORY_PERSIST:
+        return
+    async with _flush_lock:
+        _buffer[:] = [item for item in _buffer if item["user_id"] != user_id]
+        try:
+            async with async_db_session() as session:
+                await session.execute(delete(ChatHistory).where(ChatHistory.user_id == user_id))
+                await session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"删除用户 {user_id} 的聊天记录失败: {e}")
+
+
+def get_chat_history_stats() -> Dict[str, Any]:
+    """
+    获取聊天记录写入统计
+
+    Returns:
+        Dict[str, Any]: 是否启用、缓冲区长度、已写入/丢弃的消息数等
+    """
+    return {
+        "enabled": settings.CHAT_HISTORY_PERSIST,
+        "buffered": len(_buffer),
+        "writer_running": _writer_task is not None and not _writer_task.done(),
+        **_stats,
+    }
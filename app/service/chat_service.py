@@ -5,8 +5,11 @@ import json
 from typing import AsyncGenerator
 from autogen_agentchat.messages import ChatMessage
 import asyncio
-from typing import Dict
-from autogen_agentchat.agents import AssistantAgent
+import hashlib
+import inspect
+import re
+import unicodedata
+from typing import Any, Dict, Optional
 from service.gaode import (
     geocode_and_extract_locations,
     get_amap_driving_directions,
@@ -14,14 +17,27 @@ from service.gaode import (
 from typing import Sequence
 from autogen_agentchat.agents import BaseChatAgent
 from autogen_agentchat.base import Response
-from autogen_agentchat.messages import AgentEvent
-from autogen_core.model_context import UnboundedChatCompletionContext
-from autogen_core.models import AssistantMessage, RequestUsage, UserMessage
+from autogen_agentchat.messages import (
+    AgentEvent,
+    ModelClientStreamingChunkEvent,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+)
+from autogen_core import FunctionCall
+from autogen_core.model_context import ChatCompletionContext, UnboundedChatCompletionContext
+from autogen_core.models import AssistantMessage, FunctionExecutionResult, RequestUsage, UserMessage
 from google import genai
 from google.genai import types
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
 from core.config import settings
+from core.data_version import get_data_version_stats, get_data_versions
 from service.db_service import query_database
-from service.db_service import query_database
+from service.chat_history import clear_chat_history, load_recent_history, record_chat_message
+from service.chat_session import ChatSessionManager, TokenBudgetChatCompletionContext
+from utils.cache import TTLCache
+from loguru import logger
 
 
 class GeminiAssistantAgent(BaseChatAgent):
@@ -37,6 +53,8 @@ class GeminiAssistantAgent(BaseChatAgent):
             api_key: str = settings.GEMINI_API_KEY,
             system_message: str
                             | None = "You are a helpful assistant that can respond to messages. Reply with TERMINATE when the task has been completed.",
+            model_client: genai.Client | None = None,
+            model_context: ChatCompletionContext | None = None,
     ):
         """
         初始化 GeminiAssistantAgent。
@@ -46,12 +64,14 @@ class GeminiAssistantAgent(BaseChatAgent):
         :param model: 使用的 Gemini 模型名称，默认为 "gemini-1.5-flash-002"
         :param api_key: Gemini API 密钥，默认为环境变量 "GEMINI_API_KEY" 的值
         :param system_message: 系统消息，默认为助手的基本指令
+        :param model_client: 共享的 Gemini 客户端，为空时使用 api_key 创建新的客户端
+        :param model_context: 模型上下文，为空时使用不截断的上下文
         """
         super().__init__(name=name, description=description)  # 调用父类的初始化方法
         self._model_context = (
-            UnboundedChatCompletionContext()
+            model_context or UnboundedChatCompletionContext()
         )  # 初始化模型上下文，用于存储对话历史
-        self._model_client = genai.Client(
+        self._model_client = model_client or genai.Client(
             api_key=api_key
         )
         self._system_message = system_message  # 保存系统消息，作为助手的初始指令
@@ -61,6 +81,19 @@ class GeminiAssistantAgent(BaseChatAgent):
             get_amap_driving_directions,
             query_database,
         ]
+        self._tool_map = {tool.__name__: tool for tool in self._tools}
+        self._generate_config = types.GenerateContentConfig(
+            system_instruction=self._system_message,  # 系统指令
+            temperature=0.3,  # 控制生成内容的随机性，较低的值使输出更确定
+            tools=self._tools,
+            # 关闭 SDK 的自动函数调用（不支持异步工具），由 on_messages_stream 手动执行
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
+        )
+
+    @property
+    def model_context(self) -> ChatCompletionContext:
+        """模型上下文（对话历史）"""
+        return self._model_context
 
     @property
     def produced_message_types(self) -> Sequence[type[ChatMessage]]:
@@ -103,7 +136,9 @@ class GeminiAssistantAgent(BaseChatAgent):
         """
         以流式方式处理消息并生成响应。
 
-        此方法将消息添加到模型上下文中，生成响应，并返回一个 Response 对象。
+        此方法将消息添加到模型上下文中，使用流式接口生成响应：文本片段以
+        ModelClientStreamingChunkEvent 形式逐个产出，工具调用以 ToolCallRequestEvent /
+        ToolCallExecutionEvent 产出，最后产出完整的 Response 对象。
 
         :param messages: 接收到的消息序列
         :param cancellation_token: 取消令牌
@@ -128,34 +163,133 @@ class GeminiAssistantAgent(BaseChatAgent):
             for msg in await self._model_context.get_messages()  # 遍历模型上下文中的消息
         ]
 
-        # 使用 Gemini 生成响应
-        response = self._model_client.models.generate_content(
-            model=self._model,  # 指定使用的模型
-            contents=f"History: {history}\nGiven the history, please provide a response",  # 提供对话历史和生成指令
-            config=types.GenerateContentConfig(
-                system_instruction=self._system_message,  # 系统指令
-                temperature=0.3,  # 控制生成内容的随机性，较低的值使输出更确定
-                tools=self._tools
-            ),
-        )
+        # 使用 Gemini 流式生成响应（异步客户端，手动执行工具调用）
+        contents: list[types.Content] = [
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_text(
+                        text=f"History: {history}\nGiven the history, please provide a response"  # 提供对话历史和生成指令
+                    )
+                ],
+            )
+        ]
+        prompt_tokens = 0
+        completion_tokens = 0
+        text_chunks: list[str] = []
+        inner_messages: list[AgentEvent] = []
+
+        for _ in range(settings.CHAT_MAX_TOOL_ROUNDS + 1):
+            model_parts: list[types.Part] = []
+            function_calls: list[types.FunctionCall] = []
+            usage_metadata = None
+
+            stream = await self._model_client.aio.models.generate_content_stream(
+                model=self._model,  # 指定使用的模型
+                contents=contents,
+                config=self._generate_config,
+            )
+            async for chunk in stream:
+                # 流式响应中的用量为累计值，取每轮最后一次即可
+                if chunk.usage_metadata:
+                    usage_metadata = chunk.usage_metadata
+                if not chunk.candidates or not chunk.candidates[0].content:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    model_parts.append(part)
+                    if part.function_call:
+                        function_calls.append(part.function_call)
+                    elif part.text and not part.thought:
+                        # 文本片段到达后立即转发给调用方
+                        text_chunks.append(part.text)
+                        yield ModelClientStreamingChunkEvent(content=part.text, source=self.name)
+
+            if usage_metadata:
+                prompt_tokens += usage_metadata.prompt_token_count or 0
+                completion_tokens += usage_metadata.candidates_token_count or 0
+
+            if not function_calls:
+                break
+
+            # 将模型的函数调用与工具结果追加到对话中，进行下一轮生成；同一轮的多个工具调用并发执行
+            contents.append(types.Content(role="model", parts=model_parts))
+            request_event = ToolCallRequestEvent(
+                content=[
+                    FunctionCall(
+                        id=function_call.id or function_call.name,
+                        arguments=json.dumps(function_call.args or {}, ensure_ascii=False),
+                        name=function_call.name,
+                    )
+                    for function_call in function_calls
+                ],
+                source=self.name,
+            )
+            inner_messages.append(request_event)
+            yield request_event
+
+            response_parts = await asyncio.gather(
+                *(self._call_tool(function_call) for function_call in function_calls)
+            )
+            execution_event = ToolCallExecutionEvent(
+                content=[
+                    FunctionExecutionResult(
+                        content=part.function_response.response["result"],
+                        name=call.name,
+                        call_id=call.id,
+                        is_error=False,
+                    )
+                    for call, part in zip(request_event.content, response_parts)
+                ],
+                source=self.name,
+            )
+            inner_messages.append(execution_event)
+            yield execution_event
+            contents.append(types.Content(role="user", parts=list(response_parts)))
 
         # 创建使用元数据
         usage = RequestUsage(
-            prompt_tokens=response.usage_metadata.prompt_token_count,  # 输入的令牌数
-            completion_tokens=response.usage_metadata.candidates_token_count,  # 生成的令牌数
+            prompt_tokens=prompt_tokens,  # 输入的令牌数
+            completion_tokens=completion_tokens,  # 生成的令牌数
         )
+        response_text = "".join(text_chunks)
 
         # 将响应添加到模型上下文
         await self._model_context.add_message(
-            AssistantMessage(content=response.text, source=self.name)
+            AssistantMessage(content=response_text, source=self.name)
         )
 
         # yield 最终响应
         yield Response(
             chat_message=TextMessage(
-                content=response.text, source=self.name, models_usage=usage
+                content=response_text, source=self.name, models_usage=usage
             ),  # 响应消息
-            inner_messages=[],  # 内部消息列表，当前为空
+            inner_messages=inner_messages,  # 工具调用请求与执行结果
+        )
+
+    async def _call_tool(self, function_call: types.FunctionCall) -> types.Part:
+        """
+        执行模型请求的工具调用。
+
+        异步工具直接 await，同步工具放到线程池中执行，避免阻塞事件循环。
+
+        :param function_call: 模型返回的函数调用
+        :return: 包含工具结果的函数响应 Part
+        """
+        tool = self._tool_map.get(function_call.name)
+        args = dict(function_call.args or {})
+        try:
+            if tool is None:
+                result = json.dumps({"error": f"Unknown tool '{function_call.name}'"})
+            elif inspect.iscoroutinefunction(tool):
+                result = await tool(**args)
+            else:
+                result = await asyncio.to_thread(tool, **args)
+        except Exception as e:
+            logger.error(f"工具 {function_call.name} 执行失败: {e}")
+            result = json.dumps({"error": type(e).__name__, "message": str(e)}, ensure_ascii=False)
+
+        return types.Part.from_function_response(
+            name=function_call.name, response={"result": result}
         )
 
     async def on_reset(self, cancellation_token: CancellationToken) -> None:
@@ -167,16 +301,37 @@ class GeminiAssistantAgent(BaseChatAgent):
         await self._model_context.clear()  # 清除模型上下文，重置对话状态
 
 
-sessions: Dict[str, AssistantAgent] = {}
-session_lock = asyncio.Lock()
-
-
-async def get_agent(user_id: str) -> AssistantAgent:
-    async with session_lock:
-        if user_id not in sessions:
-            sessions[user_id] = GeminiAssistantAgent(
-                name=f"assistant_{user_id}",
-                system_message=(
+# 所有会话共用一个模型客户端，复用底层连接
+_model_client: genai.Client | None = None
+
+
+def get_model_client() -> genai.Client:
+    """获取共享的 Gemini 客户端"""
+    global _model_client
+    if _model_client is None:
+        _model_client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    return _model_client
+
+
+async def _create_agent(user_id: str) -> GeminiAssistantAgent:
+    """为用户创建新的助手代理，从数据库恢复最近的对话，上下文按令牌预算截断"""
+    name = f"assistant_{user_id}"
+    history = await load_recent_history(user_id, settings.CHAT_HISTORY_HYDRATE_MESSAGES)
+    initial_messages = [
+        UserMessage(content=item["content"], source="user")
+        if item["role"] == "user"
+        else AssistantMessage(content=item["content"], source=name)
+        for item in history
+    ]
+    return GeminiAssistantAgent(
+        name=name,
+        model_client=get_model_client(),
+        model_context=TokenBudgetChatCompletionContext(
+            max_tokens=settings.CHAT_CONTEXT_MAX_TOKENS,
+            max_messages=settings.CHAT_CONTEXT_MAX_MESSAGES,
+            initial_messages=initial_messages,
+        ),
+        system_message=(
                     """
                     你是一个物流配送管理助手。
                     请根据用户的问题，使用可用的工具来给出回答。
@@ -184,7 +339,7 @@ async def get_agent(user_id: str) -> AssistantAgent:
                     **可用工具:**
                     1.  `geocode_and_extract_locations(address: str, city: Optional[str] = None) -> str`: 获取地址的经纬度坐标。
                     2.  `get_amap_driving_directions(origin: str, destination: str, waypoints: Optional[str] = None) -> str`: 获取驾车路线规划。
-                    3.  `query_database(sql_query: str) -> str`: 执行 SQL 查询数据库。
+                    3.  `query_database(sql_query: str) -> str`: 执行只读 SQL 查询数据库。
 
                     **导航与路线规划指南：**
                     1.  **识别需求：** 识别起点、终点和可选的途经点。
@@ -241,7 +396,8 @@ async def get_agent(user_id: str) -> AssistantAgent:
                     3.  **调用查询工具：** 使用 `query_database` 工具，将构建好的 SQL 查询语句作为 `sql_query` 参数传入。例如：`query_database(sql_query="SELECT goods_name, all_count FROM jishe.stock JOIN jishe.goods ON jishe.stock.goods_id = jishe.goods.id WHERE jishe.stock.warehouse_id = 1;")`
                     4.  **解析并处理结果：** `query_database` 工具会返回一个 JSON *字符串*。
                         *   对于成功的 `SELECT` 查询，返回格式通常是 `'{"data": [{"column1": value1, ...}, ...]}'`。
-                        *   对于成功的 `INSERT`, `UPDATE`, `DELETE` 操作，返回格式通常是 `'{"status": "success", "rows_affected": count}'`。
+                        *   查询在只读事务中执行，`INSERT`, `UPDATE`, `DELETE` 等写操作会被拒绝并返回错误，每次只能执行一条 SQL 语句。
+                        *   结果行数超过上限时会被截断，返回中包含 `"truncated": true` 和 `"row_limit"`，此时应告知用户结果不完整，必要时使用聚合或更精确的条件重新查询。
                         *   如果查询被禁止或发生错误，返回格式会包含 `error` 字段，例如：`'{"error": "Forbidden Query", "message": "Access to table 'user' is restricted."}'` 或 `'{"error": "Database Error", "message": "column \\"good_name\\" does not exist"}'`。
                         *   你需要解析这个 JSON 字符串，提取出有效的数据或错误信息。
                     5.  **整合并回答：** 根据解析出的数据或错误信息，以自然语言清晰地回复用户。
@@ -252,44 +408,248 @@ async def get_agent(user_id: str) -> AssistantAgent:
                         *   **重要：同样注意，不要直接输出原始的 SQL 查询语句或原始的 JSON 结果字符串给用户。不要回答例如我将查询什么数据。给予用户直接的反馈**
 
                     **其他情况：** 对于非导航、非数据库查询类问题，请直接回答。"""
-                ),
-            )
-        return sessions[user_id]
+        ),
+    )
+
+
+session_manager = ChatSessionManager(
+    factory=_create_agent,
+    max_sessions=settings.CHAT_SESSION_MAX,
+    idle_ttl=settings.CHAT_SESSION_IDLE_TTL_SECONDS,
+)
+
+
+async def get_agent(user_id: str) -> GeminiAssistantAgent:
+    """获取用户的助手代理，不存在时创建"""
+    return (await session_manager.get(user_id)).agent
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """
+    格式化一条 Server-Sent Events 消息
+
+    Args:
+        event: 事件类型
+        data: 事件数据，序列化为 JSON
+
+    Returns:
+        str: SSE 消息文本
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# 回答缓存：(最近上下文摘要, 规范化问题) -> {"content", "tables", "versions"}
+# 仅缓存只调用了 query_database 的回答，回答涉及的表有写入时失效，TTL 兜底其他进程与外部系统的写入；
+# 键中包含最近上下文的摘要，追问（如"那第二个呢"）只会命中相同上下文下的回答
+answer_cache = TTLCache(
+    maxsize=settings.CHAT_ANSWER_CACHE_MAXSIZE,
+    ttl=settings.CHAT_ANSWER_CACHE_TTL_SECONDS,
+)
+_answer_cache_stats = {"hits": 0, "misses": 0, "stale": 0, "stored": 0, "uncacheable": 0}
+
+# 查询可以引用的 schema，其他 schema（如 pg_catalog）的表没有版本号，引用它们的回答不缓存
+_CACHEABLE_SCHEMAS = {"", "jishe"}
+
+
+def normalize_question(text: str) -> str:
+    """
+    规范化用户问题，作为回答缓存的键
+
+    统一全角/半角字符与大小写，去掉空白和末尾的标点
+
+    Args:
+        text: 用户问题
+
+    Returns:
+        str: 规范化后的问题
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", "", text)
+    return text.rstrip("?？。.!！~")
+
+
+def extract_sql_tables(sql: str) -> Optional[set[str]]:
+    """
+    解析 SQL 引用的全部表，包括逗号连接、JOIN、子查询与 CTE 中的表
+
+    Args:
+        sql: SQL 语句
+
+    Returns:
+        Optional[set[str]]: 小写的表名（不含 schema）；无法解析、引用了表函数或
+        jishe 以外 schema 的表时返回 None，表示无法确定回答依赖的数据
+    """
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read="postgres") if statement is not None]
+    except SqlglotError:
+        return None
+    tables: set[str] = set()
+    for statement in statements:
+        cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+        for table in statement.find_all(exp.Table):
+            if not isinstance(table.this, exp.Identifier) or table.db.lower() not in _CACHEABLE_SCHEMAS:
+                return None
+            name = table.name.lower()
+            if table.db or name not in cte_names:
+                tables.add(name)
+    return tables
+
+
+async def answer_cache_key(question: str, context: ChatCompletionContext) -> tuple[str, str]:
+    """
+    计算回答缓存的键
+
+    Args:
+        question: 用户问题
+        context: 本轮开始前会话的模型上下文
+
+    Returns:
+        tuple[str, str]: (最近 CHAT_ANSWER_CACHE_CONTEXT_MESSAGES 条上下文消息的摘要, 规范化后的问题)
+    """
+    messages = await context.get_messages()
+    count = settings.CHAT_ANSWER_CACHE_CONTEXT_MESSAGES
+    recent = messages[-count:] if count > 0 else []
+    digest = hashlib.sha256()
+    for item in recent:
+        digest.update(f"{type(item).__name__}\0{item.content}\0".encode("utf-8"))
+    return digest.hexdigest(), normalize_question(question)
+
+
+def _lookup_answer(key: tuple[str, str]) -> Optional[str]:
+    """查询回答缓存，回答涉及的表版本号发生变化时视为失效"""
+    if not settings.CHAT_ANSWER_CACHE_ENABLED:
+        return None
+    entry = answer_cache.get(key)
+    if entry is None:
+        _answer_cache_stats["misses"] += 1
+        return None
+    if get_data_versions(entry["tables"]) != entry["versions"]:
+        answer_cache.pop(key)
+        _answer_cache_stats["stale"] += 1
+        _answer_cache_stats["misses"] += 1
+        return None
+    _answer_cache_stats["hits"] += 1
+    return entry["content"]
+
+
+def _store_answer(key: tuple[str, str], response: Response, versions: Dict[str, int]) -> None:
+    """
+    缓存一轮对话的回答
+
+    只有调用了 query_database 且没有调用其他工具、没有出错、能确定 SQL 引用的全部表的回答才会被缓存；
+    记录的版本号取本轮开始时的快照，生成期间发生的写入会使缓存直接失效
+
+    Args:
+        key: 本轮开始时计算的缓存键
+        response: 代理的最终响应
+        versions: 本轮开始时各表的版本号
+    """
+    if not settings.CHAT_ANSWER_CACHE_ENABLED:
+        return
+    tables: set[str] = set()
+    cacheable = bool(response.chat_message.content)
+    for event in response.inner_messages or []:
+        if isinstance(event, ToolCallRequestEvent):
+            for call in event.content:
+                if call.name != "query_database":
+                    cacheable = False
+                    continue
+                referenced = extract_sql_tables(json.loads(call.arguments or "{}").get("sql_query", ""))
+                if referenced is None:
+                    cacheable = False
+                    continue
+                tables.update(referenced)
+        elif isinstance(event, ToolCallExecutionEvent):
+            for result in event.content:
+                if result.is_error or '"error"' in result.content:
+                    cacheable = False
+
+    if not cacheable or not tables:
+        _answer_cache_stats["uncacheable"] += 1
+        return
+    answer_cache.set(key, {
+        "content": response.chat_message.content,
+        "tables": sorted(tables),
+        "versions": tuple((table, versions.get(table, 0)) for table in sorted(tables)),
+    })
+    _answer_cache_stats["stored"] += 1
+
+
+def get_answer_cache_stats() -> Dict[str, Any]:
+    """
+    获取回答缓存统计信息
+
+    Returns:
+        Dict[str, Any]: 条目数、命中数、未命中数（含失效）、命中率与各表版本号
+    """
+    lookups = _answer_cache_stats["hits"] + _answer_cache_stats["misses"]
+    return {
+        "enabled": settings.CHAT_ANSWER_CACHE_ENABLED,
+        "size": len(answer_cache),
+        **_answer_cache_stats,
+        "hit_rate": round(_answer_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "data_versions": get_data_version_stats(),
+    }
 
 
 async def chat(message: ChatMessage, user_id: str) -> AsyncGenerator[str, None]:
     """
-    处理用户聊天消息并生成响应
+    处理用户聊天消息并以 SSE 事件流式返回响应
+
+    事件类型:
+    - token: 模型生成的文本片段，data 为 {"content": "..."}
+    - tool_call: 模型开始调用工具，data 为 {"tools": ["query_database", ...]}
+    - done: 生成结束，data 为 {"content": "完整回复", "cached": false}，命中回答缓存时 cached 为 true
+    - error: 生成失败，data 为 {"message": "..."}
 
     Args:
         message: 用户消息对象
+        user_id: 用户ID
 
     Returns:
-        AsyncGenerator[str, None]: 流式生成的响应
+        AsyncGenerator[str, None]: SSE 格式的事件流
     """
-    gemini_assistant = await get_agent(user_id)
-
     user_message = TextMessage(content=message.message, source="user")
 
-    # 使用历史记录创建流式响应
-    async for msg in gemini_assistant.on_messages_stream(
-            [user_message], cancellation_token=CancellationToken()
-    ):
-        # 解析消息内容
-        try:
-            # 解析JSON格式的消息
-            parsed_message = json.loads(msg.chat_message.content)
-            chunk = parsed_message.get("message", "")
-
-            # 返回每个文本块
-            if chunk:
-                yield chunk
-        except json.JSONDecodeError:
-            # 如果不是JSON格式，尝试直接返回内容
-            yield msg.chat_message.content
+    try:
+        # 同一用户的多条消息依次处理，不同用户之间互不阻塞
+        async with session_manager.session(user_id) as gemini_assistant:
+            cache_key = await answer_cache_key(message.message, gemini_assistant.model_context)
+            cached = _lookup_answer(cache_key)
+            if cached is not None:
+                # 命中回答缓存，不调用模型，但仍写入对话历史以保持上下文连贯
+                await gemini_assistant.model_context.add_message(
+                    UserMessage(content=message.message, source="user")
+                )
+                await gemini_assistant.model_context.add_message(
+                    AssistantMessage(content=cached, source=gemini_assistant.name)
+                )
+                record_chat_message(user_id, "user", message.message)
+                record_chat_message(user_id, "assistant", cached)
+                yield _sse_event("token", {"content": cached})
+                yield _sse_event("done", {"content": cached, "cached": True})
+                return
+
+            versions = get_data_version_stats()
+            async for event in gemini_assistant.on_messages_stream(
+                    [user_message], cancellation_token=CancellationToken()
+            ):
+                if isinstance(event, ModelClientStreamingChunkEvent):
+                    yield _sse_event("token", {"content": event.content})
+                elif isinstance(event, ToolCallRequestEvent):
+                    yield _sse_event("tool_call", {"tools": [call.name for call in event.content]})
+                elif isinstance(event, Response):
+                    record_chat_message(user_id, "user", message.message)
+                    record_chat_message(user_id, "assistant", event.chat_message.content)
+                    _store_answer(cache_key, event, versions)
+                    yield _sse_event("done", {"content": event.chat_message.content, "cached": False})
+    except Exception as e:
+        logger.error(f"用户 {user_id} 的聊天生成失败: {e}")
+        yield _sse_event("error", {"message": "生成回复时发生错误，请稍后重试"})
 
 
 async def reset_chat(user_id: str) -> AsyncGenerator[str, None]:
-    gemini_assistant = await get_agent(user_id)
-    await gemini_assistant.on_reset(CancellationToken())
+    async with session_manager.session(user_id) as gemini_assistant:
+        await gemini_assistant.on_reset(CancellationToken())
+        await clear_chat_history(user_id)
     return "Chat reset successfully."
@@ -0,0 +1,201 @@
+"""
+聊天会话管理
+
+- 每个用户一个会话，会话之间互不阻塞；同一用户的多轮对话通过该用户的锁串行执行
+- 空闲超过 CHAT_SESSION_IDLE_TTL_SECONDS 的会话被回收，会话数超过 CHAT_SESSION_MAX 时淘汰最久未使用的会话
+- 模型上下文按令牌预算截断，只保留最近的消息
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_core.model_context import UnboundedChatCompletionContext
+from autogen_core.models import LLMMessage
+
+from utils.singleflight import SingleFlight
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的令牌数
+
+    中日韩字符按每字1个令牌计算，其余字符按每4个字符1个令牌计算
+    """
+    wide = sum(1 for ch in text if ord(ch) >= 0x2E80)
+    return wide + (len(text) - wide + 3) // 4
+
+
+def _message_tokens(message: LLMMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return estimate_tokens(content)
+
+
+class TokenBudgetChatCompletionContext(UnboundedChatCompletionContext):
+    """
+    按令牌预算截断的模型上下文
+
+    每次添加消息后从最早的消息开始丢弃，直到总令牌数不超过预算且消息数不超过上限；
+    最新的一条消息总会保留。
+    """
+
+    def __init__(self, max_tokens: int, max_messages: int, initial_messages: List[LLMMessage] | None = None):
+        super().__init__(initial_messages)
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.token_count = sum(_message_tokens(message) for message in self._messages)
+        self.truncated_messages = 0
+        self._truncate()
+
+    def _truncate(self) -> None:
+        while len(self._messages) > 1 and (
+            self.token_count > self.max_tokens or len(self._messages) > self.max_messages
+        ):
+            dropped = self._messages.pop(0)
+            self.token_count -= _message_tokens(dropped)
+            self.truncated_messages += 1
+
+    async def add_message(self, message: LLMMessage) -> None:
+        self._messages.append(message)
+        self.token_count += _message_tokens(message)
+        self._truncate()
+
+    async def clear(self) -> None:
+        await super().clear()
+        self.token_count = 0
+
+    async def load_state(self, state: Dict[str, Any]) -> None:
+        await super().load_state(state)
+        self.token_count = sum(_message_tokens(message) for message in self._messages)
+        self._truncate()
+
+    @property
+    def message_count(self) -> int:
+        return len(self._messages)
+
+
+class ChatSession:
+    """单个用户的聊天会话"""
+
+    def __init__(self, agent: BaseChatAgent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class ChatSessionManager:
+    """
+    聊天会话管理器
+
+    会话字典的读写均为同步操作，不需要全局锁；创建会话时通过 SingleFlight
+    保证同一用户的并发请求只创建一个会话。正在使用中（锁被持有）的会话不会被淘汰。
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Awaitable[BaseChatAgent]],
+        max_sessions: int,
+        idle_ttl: float,
+    ):
+        """
+        Args:
+            factory: 根据用户ID创建代理的协程函数
+            max_sessions: 最大会话数
+            idle_ttl: 会话空闲回收时间（秒）
+        """
+        self._factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._creating = SingleFlight()
+        self.created = 0
+        self.evicted = 0
+
+    async def get(self, user_id: str) -> ChatSession:
+        """
+        获取用户的会话，不存在时创建
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            ChatSession: 用户的会话
+        """
+        session = self._sessions.get(user_id)
+        if session is not None:
+            self._sessions.move_to_end(user_id)
+            return session
+
+        async def _create() -> ChatSession:
+            created = ChatSession(await self._factory(user_id))
+            self._sessions[user_id] = created
+            self.created += 1
+            self._evict()
+            return created
+
+        return await self._creating.do(user_id, _create)
+
+    @asynccontextmanager
+    async def session(self, user_id: str) -> AsyncIterator[BaseChatAgent]:
+        """
+        独占使用用户的会话，同一用户的并发请求依次执行
+
+        Args:
+            user_id: 用户ID
+
+        Yields:
+            BaseChatAgent: 用户的代理
+        """
+        session = await self.get(user_id)
+        async with session.lock:
+            session.last_used = time.monotonic()
+            try:
+                yield session.agent
+            finally:
+                session.last_used = time.monotonic()
+
+    def discard(self, user_id: str) -> None:
+        """删除用户的会话"""
+        self._sessions.pop(user_id, None)
+
+    def _evict(self) -> None:
+        """回收空闲超时的会话，并在超出容量时淘汰最久未使用的会话"""
+        now = time.monotonic()
+        for user_id, session in list(self._sessions.items()):
+            if not session.lock.locked() and now - session.last_used > self.idle_ttl:
+                del self._sessions[user_id]
+                self.evicted += 1
+
+        for user_id, session in list(self._sessions.items()):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not session.lock.locked():
+                del self._sessions[user_id]
+                self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取会话统计信息
+
+        Returns:
+            Dict[str, Any]: 会话数、使用中的会话数、上下文消息数与令牌数等
+        """
+        self._evict()
+        contexts = [
+            getattr(session.agent, "model_context", None) for session in self._sessions.values()
+        ]
+        contexts = [ctx for ctx in contexts if isinstance(ctx, TokenBudgetChatCompletionContext)]
+        return {
+            "live_sessions": len(self._sessions),
+            "active_sessions": sum(1 for session in self._sessions.values() if session.lock.locked()),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evicted": self.evicted,
+            "context_messages": sum(ctx.message_count for ctx in contexts),
+            "context_tokens": sum(ctx.token_count for ctx in contexts),
+            "max_context_tokens": max((ctx.token_count for ctx in contexts), default=0),
+            "truncated_messages": sum(ctx.truncated_messages for ctx in contexts),
+        }
@@ -1,9 +1,12 @@
 import json
-import psycopg2
-import psycopg2.extras  
-from typing import Optional, Dict, Any  
 import re
+from typing import Optional, Dict, Any, List
+
+import asyncpg
+from loguru import logger
+
 from core.config import settings
+from db.database import async_engine
 
 
 FORBIDDEN_TABLES = ["user", "user_role", "role"]
@@ -22,35 +25,85 @@ def _find_forbidden_tables(query: str) -> Optional[str]:
     return None
 
 
-def query_database(sql_query: str) -> str:
-    """Executes a given SQL query against the PostgreSQL database (synchronous) and returns results as JSON.
-
-    Connects to the database using credentials from the application settings.
-    Executes the provided SQL query safely, preventing access to forbidden tables
-    ('user', 'user_role', 'role').
+async def _execute_read_only(sql_query: str) -> Dict[str, Any]:
+    """
+    在连接池的连接上以只读事务执行查询
 
-    Handles SELECT queries by returning fetched data and modification queries
-    (INSERT, UPDATE, DELETE) by returning the number of affected rows.
+    - 复用 async_engine 连接池中的连接，不再为每次调用建立新连接
+    - 事务以 READ ONLY 方式开启，任何写操作都会被数据库拒绝
+    - 通过 SET LOCAL statement_timeout 限制单条语句的执行时间
+    - 使用服务端游标分批读取，超过行数上限即停止读取
+    - 预处理语句只允许单条 SQL，无法通过拼接多条语句绕过只读事务
+    """
+    max_rows = settings.QUERY_TOOL_MAX_ROWS
+    async with async_engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        driver_conn: asyncpg.Connection = raw_conn.driver_connection
+
+        # 无论成功与否都回滚事务，避免查询中的 SET 等语句残留在连接池的连接上
+        transaction = driver_conn.transaction(readonly=True)
+        await transaction.start()
+        try:
+            await driver_conn.execute(
+                f"SET LOCAL statement_timeout = {int(settings.QUERY_TOOL_STATEMENT_TIMEOUT_MS)}"
+            )
+            statement = await driver_conn.prepare(sql_query)
+
+            # 不返回结果集的语句（写操作已被只读事务拦截）
+            if not statement.get_attributes():
+                await statement.fetch()
+                status = statement.get_statusmsg() or ""
+                rows_affected = status.split()[-1] if status else "0"
+                return {
+                    "status": "success",
+                    "rows_affected": int(rows_affected) if rows_affected.isdigit() else 0,
+                }
+
+            rows: List[Dict[str, Any]] = []
+            truncated = False
+            async for record in statement.cursor(prefetch=settings.QUERY_TOOL_FETCH_SIZE):
+                if len(rows) >= max_rows:
+                    truncated = True
+                    break
+                rows.append(dict(record))
+        finally:
+            await transaction.rollback()
+
+    result_payload: Dict[str, Any] = {"data": rows}
+    if truncated:
+        result_payload["truncated"] = True
+        result_payload["row_limit"] = max_rows
+    return result_payload
+
+
+async def query_database(sql_query: str) -> str:
+    """Executes a read-only SQL query against the PostgreSQL database and returns results as JSON.
+
+    Runs on the application's shared connection pool inside a READ ONLY transaction
+    with a per-statement timeout. Access to forbidden tables ('user', 'user_role',
+    'role') is rejected. Only a single statement is allowed per call. Large result
+    sets are read with a server-side cursor and capped at a maximum number of rows;
+    when the cap is hit the result contains '"truncated": true' and the 'row_limit'.
+
+    Modification queries (INSERT, UPDATE, DELETE) are rejected by the read-only
+    transaction and return a database error.
 
     Args:
         sql_query: The raw SQL query string to execute.
             Example SELECT: "SELECT id, name FROM products WHERE category = 'electronics' LIMIT 10;"
-            Example INSERT: "INSERT INTO orders (customer_id, order_date) VALUES (123, NOW());"
-                         (Note: ensure target table is not forbidden)
 
     Returns:
         A JSON string representing the query result or an error.
         On successful SELECT: '{"data": [{"col1": val1, ...}, ...]}'
-        On successful INSERT/UPDATE/DELETE: '{"status": "success", "rows_affected": count}'
+        On a SELECT that exceeds the row cap: '{"data": [...], "truncated": true, "row_limit": 200}'
         On forbidden query attempt: '{"error": "Forbidden Query", "message": "Access to table '...' is restricted."}'
+        On timeout: '{"error": "Query Timeout", "message": "..."}'
         On database or other errors: '{"error": "Error Type", "message": "Error details..."}'
         Example Failure (Forbidden): '{"error": "Forbidden Query", "message": "Access to table 'user' is restricted."}'
         Example Failure (DB Error): '{"error": "Database Error", "message": "relation \\"productss\\" does not exist"}'
+        Example Failure (Write): '{"error": "Database Error", "message": "cannot execute INSERT in a read-only transaction"}'
         Example Success (SELECT): '{"data": [{"id": 1, "name": "Laptop"}, {"id": 2, "name": "Mouse"}]}'
-        Example Success (INSERT): '{"status": "success", "rows_affected": 1}'
     """
-    conn = None
-    cursor = None
     result_payload: Dict[str, Any] = {}
 
     # 1. Input Validation / Security Check
@@ -69,79 +122,41 @@ def query_database(sql_query: str) -> str:
         }
         return json.dumps(result_payload)
 
-    is_select_query = sql_query.strip().lower().startswith("select")
-
+    # 2. Execute on the pooled connection inside a read-only transaction
     try:
-        # 2. Establish Database Connection
-        conn = psycopg2.connect(
-            dbname=settings.DB_NAME,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            host=settings.DB_HOST,
-            port=settings.DB_PORT,
-            # Using DictCursor to get results as dictionaries
-            cursor_factory=psycopg2.extras.DictCursor,
-        )
-        # Set autocommit to False to manage transactions explicitly
-        conn.autocommit = False
-
-        # 3. Create Cursor and Execute Query
-        cursor = conn.cursor()
-        cursor.execute(sql_query)
-
-        # 4. Process Results
-        if is_select_query and cursor.description:
-
-            rows = cursor.fetchall()
+        result_payload = await _execute_read_only(sql_query)
 
-            result_payload = {"data": [dict(row) for row in rows]}
-        else:
-
-            rows_affected = cursor.rowcount
-            result_payload = {"status": "success", "rows_affected": rows_affected}
-
-            conn.commit()  
-
-    # 5. Handle Potential Errors
-    except psycopg2.Error as db_err:
-
-        if conn:
-            conn.rollback()  
-        error_type = type(db_err).__name__  
-        error_message = str(db_err).split("\n")[0]  
-        print(
-            f"Database Error ({error_type}): {db_err.pgcode} - {db_err.pgerror}"
-        )  
+    # 3. Handle Potential Errors
+    except asyncpg.exceptions.QueryCanceledError as timeout_err:
+        logger.warning(f"查询工具执行超时: {timeout_err}")
+        result_payload = {
+            "error": "Query Timeout",
+            "message": str(timeout_err).split("\n")[0],
+        }
+    except asyncpg.PostgresError as db_err:
+        error_type = type(db_err).__name__
+        error_message = str(db_err).split("\n")[0]
+        logger.warning(f"查询工具数据库错误 ({error_type}): {db_err.sqlstate} - {error_message}")
         result_payload = {
             "error": "Database Error",
             "message": error_message,
             "type": error_type,
         }
     except Exception as e:
-
-        if conn:
-            conn.rollback()
         error_type = type(e).__name__
-        print(f"Unexpected Error during DB query: {e}")  
+        logger.error(f"查询工具执行时未知错误: {e}")
         result_payload = {
             "error": "Unexpected Error",
             "message": str(e),
             "type": error_type,
         }
 
-    # 6. Cleanup: Close cursor and connection
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-    # 7. Serialize Result to JSON
+    # 4. Serialize Result to JSON
     try:
         # Use default=str to handle potential non-serializable types like dates/decimals
         return json.dumps(result_payload, ensure_ascii=False, default=str)
     except TypeError as json_err:
-        print(f"JSON Serialization Error: {json_err}")
+        logger.error(f"查询结果序列化失败: {json_err}")
         # Fallback error message if JSON serialization itself fails
         return json.dumps(
             {
@@ -149,5 +164,3 @@ def query_database(sql_query: str) -> str:
                 "message": "Could not serialize query results to JSON.",
             }
         )
-
-
@@ -1,33 +1,494 @@
+import asyncio
 import json
-import requests  
-from requests.exceptions import (
-    RequestException,
-    JSONDecodeError,
-)  
-from typing import Optional, Dict, Any, List
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+import aiohttp
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
 from core.config import settings
+from core.http_client import get_http_session
+from db.database import async_db_session
+from models.geocode_cache import GeocodeCache
+from utils.cache import TTLCache
+from utils.rate_limiter import AsyncRateLimiter
+from utils.singleflight import SingleFlight
 
 
 GEOCODE_URL = "https://restapi.amap.com/v3/geocode/geo"
-DIRECTIONS_URL = "https://restapi.amap.com/v5/direction/driving"  
+DIRECTIONS_URL = "https://restapi.amap.com/v5/direction/driving"
+DISTANCE_URL = "https://restapi.amap.com/v3/distance"
+
+# 高德批量地理编码单次最多10个地址，距离测量单次最多100个起点
+GEOCODE_BATCH_SIZE = 10
+DISTANCE_MAX_ORIGINS = 100
+# 地理编码持久化缓存每条 INSERT 语句的最大行数（每行6个参数，远低于单条语句的参数上限）
+GEOCODE_PERSIST_CHUNK_SIZE = 1000
+
+# 所有高德API调用共用的限流器与并发上限
+_amap_limiter = AsyncRateLimiter(
+    rate=settings.GAODE_RATE_LIMIT_QPS,
+    burst=max(1, int(settings.GAODE_RATE_LIMIT_QPS)),
+)
+_amap_semaphore = asyncio.Semaphore(settings.GAODE_MAX_CONCURRENCY)
+_amap_upstream_calls = 0
+
+# 地理编码缓存：规范化的 (地址, 城市) -> 坐标
+geocode_cache = TTLCache(
+    maxsize=settings.GEOCODE_CACHE_MAX_SIZE,
+    ttl=settings.GEOCODE_CACHE_TTL_SECONDS,
+)
+# 距离矩阵单元缓存：(起点, 终点, 类型) -> 距离与耗时
+distance_cache = TTLCache(
+    maxsize=settings.DISTANCE_CACHE_MAX_SIZE,
+    ttl=settings.DISTANCE_CACHE_TTL_SECONDS,
+)
+# 合并相同地址、相同路线的并发请求
+_geocode_flight = SingleFlight()
+_directions_flight = SingleFlight()
+
+
+def normalize_geocode_key(address: str, city: Optional[str] = None) -> Tuple[str, str]:
+    """
+    规范化地址与城市作为缓存键
+
+    全角字符转半角、去除所有空白、英文字母转小写
+
+    Args:
+        address: 地址
+        city: 城市
+
+    Returns:
+        Tuple[str, str]: (规范化地址, 规范化城市)
+    """
+    def _normalize(value: Optional[str]) -> str:
+        value = unicodedata.normalize("NFKC", value or "")
+        return re.sub(r"\s+", "", value).lower()
+
+    return _normalize(address), _normalize(city)
+
+
+async def _load_persisted_geocodes(cache_keys: List[str]) -> Dict[str, Dict[str, float]]:
+    """从数据库批量读取未过期的地理编码缓存，返回 cache_key -> 坐标"""
+    if not cache_keys:
+        return {}
+    expire_before = datetime.now() - timedelta(seconds=settings.GEOCODE_CACHE_PERSIST_TTL_SECONDS)
+    try:
+        async with async_db_session() as session:
+            rows = await session.scalars(
+                select(GeocodeCache).where(
+                    GeocodeCache.cache_key.in_(cache_keys),
+                    GeocodeCache.updated_at >= expire_before,
+                )
+            )
+            return {
+                row.cache_key: {"longitude": row.longitude, "latitude": row.latitude}
+                for row in rows
+            }
+    except SQLAlchemyError as e:
+        logger.warning(f"读取地理编码持久化缓存失败: {e}")
+        return {}
+
+
+async def _persist_geocodes(
+    entries: List[Tuple[str, str, Optional[str], Dict[str, float]]]
+) -> None:
+    """
+    将地理编码结果批量写入数据库，已存在则更新
+
+    每 GEOCODE_PERSIST_CHUNK_SIZE 条合并为一条多行 INSERT ... ON CONFLICT DO UPDATE，在同一事务中提交
+
+    Args:
+        entries: (cache_key, 地址, 城市, 坐标) 列表，cache_key 不能重复
+    """
+    if not entries:
+        return
+    now = datetime.now()
+    rows = [
+        {
+            "cache_key": cache_key,
+            "address": address[:255],
+            "city": city[:64] if city else None,
+            "longitude": location["longitude"],
+            "latitude": location["latitude"],
+            "updated_at": now,
+        }
+        for cache_key, address, city, location in entries
+    ]
+    try:
+        async with async_db_session() as session:
+            for start in range(0, len(rows), GEOCODE_PERSIST_CHUNK_SIZE):
+                stmt = insert(GeocodeCache).values(rows[start:start + GEOCODE_PERSIST_CHUNK_SIZE])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[GeocodeCache.cache_key],
+                    set_={
+                        "longitude": stmt.excluded.longitude,
+                        "latitude": stmt.excluded.latitude,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+                await session.execute(stmt)
+            await session.commit()
+    except SQLAlchemyError as e:
+        logger.warning(f"写入地理编码持久化缓存失败: {e}")
+
+
+async def geocode_cached(address: str, city: Optional[str] = None) -> Dict[str, float]:
+    """
+    带缓存的地理编码
+
+    依次查询内存缓存、数据库缓存（GEOCODE_CACHE_PERSIST 开启时），均未命中才请求高德API；
+    相同地址的并发请求只会发起一次网络调用。只缓存成功解析出坐标的结果。
+
+    Args:
+        address: 地址
+        city: 城市
+
+    Returns:
+        Dict[str, float]: {"longitude": ..., "latitude": ...}，失败时为空字典
+    """
+    key = normalize_geocode_key(address, city)
+    location = geocode_cache.get(key)
+    if location is not None:
+        return location
+
+    async def _lookup() -> Dict[str, float]:
+        cache_key = "|".join(key)
+        if settings.GEOCODE_CACHE_PERSIST:
+            persisted = (await _load_persisted_geocodes([cache_key])).get(cache_key)
+            if persisted:
+                geocode_cache.set(key, persisted)
+                return persisted
+
+        result = await _geocode_tool_internal(address=address, city=city)
+        if result:
+            geocode_cache.set(key, result)
+            if settings.GEOCODE_CACHE_PERSIST:
+                await _persist_geocodes([(cache_key, address, city, result)])
+        return result
+
+    return await _geocode_flight.do(key, _lookup)
+
+
+async def geocode_many(
+    items: List[Tuple[str, Optional[str]]]
+) -> List[Dict[str, float]]:
+    """
+    批量地理编码
+
+    相同（规范化后）地址只解析一次；依次查询内存缓存、数据库缓存，
+    剩余地址按城市分组，每组以最多10个地址为一批调用高德批量接口，
+    批量请求失败的地址再逐个解析。批量解析出的坐标在全部批次完成后一次写入数据库缓存。
+
+    Args:
+        items: (地址, 城市) 列表
+
+    Returns:
+        List[Dict[str, float]]: 与 items 一一对应的坐标字典，未找到为空字典
+    """
+    keys = [normalize_geocode_key(address, city) for address, city in items]
+    resolved: Dict[Tuple[str, str], Dict[str, float]] = {}
+    pending: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+    for key, item in zip(keys, items):
+        if key in resolved or key in pending:
+            continue
+        location = geocode_cache.get(key)
+        if location is not None:
+            resolved[key] = location
+        else:
+            pending[key] = item
+
+    if pending and settings.GEOCODE_CACHE_PERSIST:
+        persisted = await _load_persisted_geocodes(["|".join(key) for key in pending])
+        for key in list(pending):
+            location = persisted.get("|".join(key))
+            if location:
+                geocode_cache.set(key, location)
+                resolved[key] = location
+                del pending[key]
+
+    # 按城市分组后分批请求；含 '|' 的地址无法放入批量请求，单独解析
+    groups: Dict[Optional[str], List[Tuple[str, str]]] = {}
+    singles: List[Tuple[str, str]] = []
+    for key, (address, city) in pending.items():
+        if "|" in address:
+            singles.append(key)
+        else:
+            groups.setdefault(city or None, []).append(key)
+
+    to_persist: List[Tuple[str, str, Optional[str], Dict[str, float]]] = []
+
+    async def _resolve_batch(city: Optional[str], batch_keys: List[Tuple[str, str]]) -> None:
+        locations = await _geocode_batch_internal([pending[key][0] for key in batch_keys], city)
+        if locations is None:
+            singles.extend(batch_keys)
+            return
+        for key, location in zip(batch_keys, locations):
+            resolved[key] = location
+            if location:
+                geocode_cache.set(key, location)
+                to_persist.append(("|".join(key), pending[key][0], city, location))
+
+    await asyncio.gather(*(
+        _resolve_batch(city, group[start:start + GEOCODE_BATCH_SIZE])
+        for city, group in groups.items()
+        for start in range(0, len(group), GEOCODE_BATCH_SIZE)
+    ))
+    if settings.GEOCODE_CACHE_PERSIST:
+        await _persist_geocodes(to_persist)
+
+    if singles:
+        locations = await asyncio.gather(*(geocode_cached(*pending[key]) for key in singles))
+        resolved.update(zip(singles, locations))
+
+    return [resolved.get(key, {}) for key in keys]
+
+
+def normalize_coordinate(coord: str) -> str:
+    """
+    将 '经度,纬度' 规范化为保留6位小数的字符串，作为缓存键和请求参数
+
+    Raises:
+        ValueError: 坐标格式错误或超出范围
+    """
+    lon, lat = (float(part) for part in coord.split(","))
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError(f"坐标超出范围: {coord}")
+    return f"{lon:.6f},{lat:.6f}"
+
+
+async def distance_matrix(
+    origins: List[str], destinations: List[str], distance_type: int = 1
+) -> Dict[str, Any]:
+    """
+    计算 N 个起点 × M 个终点的距离/耗时矩阵
+
+    - 相同的 (起点, 终点) 只计算一次，起点与终点相同的单元直接为0
+    - 已缓存的单元不再请求高德API
+    - 剩余单元按终点分组，每组以最多100个起点为一批调用高德距离测量接口，
+      所有批次并发执行，受全局并发上限与限流器约束
+
+    Args:
+        origins: 已规范化的起点坐标列表
+        destinations: 已规范化的终点坐标列表
+        distance_type: 0 直线距离, 1 驾车导航距离, 3 步行距离
+
+    Returns:
+        Dict[str, Any]: rows 为 N×M 的单元列表（{"distance_meters", "duration_seconds"} 或 {"error"}），
+        以及 unique_legs、cached_legs、upstream_calls 统计
+    """
+    legs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    missing: Dict[str, List[str]] = {}
+    cached_legs = 0
+    for destination in dict.fromkeys(destinations):
+        for origin in dict.fromkeys(origins):
+            if origin == destination:
+                legs[(origin, destination)] = {"distance_meters": 0, "duration_seconds": 0}
+                continue
+            leg = distance_cache.get((origin, destination, distance_type))
+            if leg is not None:
+                legs[(origin, destination)] = leg
+                cached_legs += 1
+            else:
+                missing.setdefault(destination, []).append(origin)
+
+    async def _fetch(batch: List[str], destination: str) -> None:
+        try:
+            results = await _distance_internal(batch, destination, distance_type)
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"距离测量请求失败 (终点: {destination}, 起点数: {len(batch)}): {e}")
+            for origin in batch:
+                legs[(origin, destination)] = {"error": str(e) or type(e).__name__}
+            return
+        for origin, leg in zip(batch, results):
+            if leg is None:
+                legs[(origin, destination)] = {"error": "无法计算该起点到终点的距离"}
+            else:
+                legs[(origin, destination)] = leg
+                distance_cache.set((origin, destination, distance_type), leg)
+
+    batches = [
+        (group[start:start + DISTANCE_MAX_ORIGINS], destination)
+        for destination, group in missing.items()
+        for start in range(0, len(group), DISTANCE_MAX_ORIGINS)
+    ]
+    await asyncio.gather(*(_fetch(batch, destination) for batch, destination in batches))
+
+    return {
+        "rows": [[legs[(origin, destination)] for destination in destinations] for origin in origins],
+        "unique_legs": len(legs),
+        "cached_legs": cached_legs,
+        "upstream_calls": len(batches),
+    }
+
+
+def get_gaode_stats() -> Dict[str, Any]:
+    """获取高德服务缓存、请求合并与限流的统计信息"""
+    return {
+        "upstream_calls": _amap_upstream_calls,
+        "rate_limiter": _amap_limiter.stats(),
+        "geocode_cache": {"persist": settings.GEOCODE_CACHE_PERSIST, **geocode_cache.stats()},
+        "distance_cache": distance_cache.stats(),
+        "geocode_singleflight": _geocode_flight.stats(),
+        "directions_singleflight": _directions_flight.stats(),
+    }
+
+
+async def _amap_get(url: str, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """
+    通过共享会话请求高德API
+
+    受全局并发上限与令牌桶限流约束，超出速率的请求排队等待
+
+    Args:
+        url: 接口地址
+        params: 查询参数
+        timeout: 超时时间（秒）
+
+    Returns:
+        Dict[str, Any]: 解析后的JSON响应
+
+    Raises:
+        aiohttp.ClientError: 网络或HTTP错误
+        asyncio.TimeoutError: 请求超时
+        json.JSONDecodeError: 响应不是合法JSON
+    """
+    global _amap_upstream_calls
+    async with _amap_semaphore:
+        await _amap_limiter.acquire()
+        _amap_upstream_calls += 1
+        async with get_http_session().get(
+            url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            response.raise_for_status()  # 检查 HTTP 错误状态码
+            return await response.json(content_type=None)  # 解析 JSON
+
+
+def _parse_location(location_str: Any) -> Dict[str, float]:
+    """将高德返回的 '经度,纬度' 字符串解析为坐标字典，失败时返回空字典"""
+    if isinstance(location_str, str) and "," in location_str:
+        try:
+            parts = location_str.split(",")
+            if len(parts) == 2:
+                return {
+                    "longitude": float(parts[0].strip()),
+                    "latitude": float(parts[1].strip()),
+                }
+        except ValueError:
+            logger.warning(f"解析坐标时 ValueError: '{location_str}'")
+    return {}
+
+
+async def _geocode_batch_internal(
+    addresses: List[str], city: Optional[str] = None
+) -> Optional[List[Dict[str, float]]]:
+    """
+    使用高德批量地理编码接口一次解析最多10个地址
+
+    Args:
+        addresses: 地址列表（不超过 GEOCODE_BATCH_SIZE 个，且不含 '|'）
+        city: 城市
+
+    Returns:
+        List[Dict[str, float]]: 与 addresses 一一对应的坐标字典（未找到为空字典）；
+        请求失败或返回条数与请求不一致时返回 None，由调用方逐个重试
+    """
+    params = {
+        "key": settings.GAODE_API_KEY,
+        "address": "|".join(addresses),
+        "batch": "true",
+        "output": "JSON",
+    }
+    if city:
+        params["city"] = city
+    try:
+        result_data = await _amap_get(GEOCODE_URL, params, timeout=10)
+    except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+        logger.warning(f"批量地理编码请求失败 ({len(addresses)} 个地址): {e}")
+        return None
+
+    geocodes_list = result_data.get("geocodes")
+    if result_data.get("status") != "1" or not isinstance(geocodes_list, list):
+        logger.warning(
+            f"高德批量地理编码 API 错误: status={result_data.get('status')}, info={result_data.get('info')}"
+        )
+        return None
+    if len(geocodes_list) != len(addresses):
+        logger.warning(f"批量地理编码返回条数不一致: 请求 {len(addresses)} 条, 返回 {len(geocodes_list)} 条")
+        return None
+
+    return [
+        _parse_location(item.get("location")) if isinstance(item, dict) else {}
+        for item in geocodes_list
+    ]
+
+
+async def _distance_internal(
+    origins: List[str], destination: str, distance_type: int = 1
+) -> List[Optional[Dict[str, int]]]:
+    """
+    使用高德距离测量接口计算多个起点到同一终点的距离与耗时
+
+    Args:
+        origins: '经度,纬度' 格式的起点列表（不超过 DISTANCE_MAX_ORIGINS 个）
+        destination: '经度,纬度' 格式的终点
+        distance_type: 0 直线距离, 1 驾车导航距离, 3 步行距离
 
+    Returns:
+        List[Optional[Dict[str, int]]]: 与 origins 一一对应的 {"distance_meters", "duration_seconds"}，
+        无法计算的起点为 None
+
+    Raises:
+        aiohttp.ClientError: 网络或HTTP错误
+        asyncio.TimeoutError: 请求超时
+        ValueError: 高德API返回错误状态
+    """
+    params = {
+        "key": settings.GAODE_API_KEY,
+        "origins": "|".join(origins),
+        "destination": destination,
+        "type": str(distance_type),
+        "output": "JSON",
+    }
+    data = await _amap_get(DISTANCE_URL, params, timeout=15)
+    if data.get("status") != "1":
+        raise ValueError(f"高德距离测量API返回错误: {data.get('info')} ({data.get('infocode')})")
 
-def _geocode_tool_internal(
+    legs: List[Optional[Dict[str, int]]] = [None] * len(origins)
+    for item in data.get("results") or []:
+        try:
+            # origin_id 为从1开始的起点序号
+            index = int(item.get("origin_id")) - 1
+            leg = {
+                "distance_meters": int(float(item.get("distance"))),
+                "duration_seconds": int(float(item.get("duration") or 0)),
+            }
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(origins):
+            legs[index] = leg
+    return legs
+
+
+async def _geocode_tool_internal(
     address: str, city: Optional[str] = None
 ) -> Dict[str, float]:
-    """Internal synchronous: gets coordinates, returns dict or empty dict."""
+    """Internal async: gets coordinates via the shared HTTP session, returns dict or empty dict."""
     params = {"key": settings.GAODE_API_KEY, "address": address, "output": "JSON"}
     if city:
         params["city"] = city
     location_result: Dict[str, float] = {}
     try:
-        # 使用 requests.get 进行同步请求
-        response = requests.get(GEOCODE_URL, params=params, timeout=10)  # 添加超时
-        response.raise_for_status()  # 检查 HTTP 错误状态码
-        result_data: Dict[str, Any] = response.json()  # 解析 JSON
+        # 使用共享会话进行异步请求，复用 keep-alive 连接
+        result_data: Dict[str, Any] = await _amap_get(GEOCODE_URL, params, timeout=10)  # 添加超时
 
         if result_data.get("status") != "1":
-            print(
+            logger.warning(
                 f"高德地理编码 API 错误: status={result_data.get('status')}, info={result_data.get('info')} (地址: {address})"
             )
             return location_result
@@ -38,42 +499,27 @@ def _geocode_tool_internal(
 
         first_geocode = geocodes_list[0]
         if isinstance(first_geocode, dict):
-            location_str = first_geocode.get("location")
-            if isinstance(location_str, str) and "," in location_str:
-                try:
-                    parts = location_str.split(",")
-                    if len(parts) == 2:
-                        longitude = float(parts[0].strip())
-                        latitude = float(parts[1].strip())
-                        location_result = {
-                            "longitude": longitude,
-                            "latitude": latitude,
-                        }
-                except ValueError:
-                    print(f"解析坐标时 ValueError: '{location_str}'")
-                except Exception as parse_err:
-                    print(f"解析坐标时未知错误: {parse_err}")
+            location_result = _parse_location(first_geocode.get("location"))
 
         return location_result
-    # 捕获 requests 可能抛出的异常
-    except RequestException as e:
-        print(f"请求高德地理编码时网络错误 (地址: {address}): {e}")
+    # 捕获 aiohttp 可能抛出的异常
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning(f"请求高德地理编码时网络错误 (地址: {address}): {e}")
         return location_result
-    # requests.JSONDecodeError 继承自 json.JSONDecodeError, 但更明确
-    except JSONDecodeError as e:
-        print(f"解析高德地理编码响应 JSON 时出错 (地址: {address}): {e}")
+    except json.JSONDecodeError as e:
+        logger.warning(f"解析高德地理编码响应 JSON 时出错 (地址: {address}): {e}")
         return location_result
     except Exception as e:
-        print(f"处理地理编码时未知错误 (地址: '{address}'): {e}")
+        logger.error(f"处理地理编码时未知错误 (地址: '{address}'): {e}")
         return location_result
 
 
-def _directions_tool_internal(
+async def _directions_tool_internal(
     origin: str,
     destination: str,
     waypoints: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Internal synchronous: gets directions, returns dict."""
+    """Internal async: gets directions via the shared HTTP session, returns dict."""
     params = {
         "key": settings.GAODE_API_KEY,
         "origin": origin,
@@ -85,10 +531,8 @@ def _directions_tool_internal(
 
     result_payload: Dict[str, Any] = {}
     try:
-        # 使用 requests.get 进行同步请求
-        response = requests.get(DIRECTIONS_URL, params=params, timeout=15)  # 增加超时
-        response.raise_for_status()
-        data = response.json()
+        # 使用共享会话进行异步请求
+        data = await _amap_get(DIRECTIONS_URL, params, timeout=15)  # 增加超时
 
         if data.get("status") == "1" and data.get("infocode") == "10000":
             route = data.get("route", {})
@@ -104,8 +548,8 @@ def _directions_tool_internal(
                         duration_seconds = int(float(duration_str))
                     except (ValueError, TypeError):
                         duration_seconds = 0
-                        print(
-                            f"Warning: Invalid duration value received: {duration_str}"
+                        logger.warning(
+                            f"Invalid duration value received: {duration_str}"
                         )
 
                     # 确保distance是数值类型再转换
@@ -114,8 +558,8 @@ def _directions_tool_internal(
                         distance_meters = int(distance_str)
                     except (ValueError, TypeError):
                         distance_meters = 0
-                        print(
-                            f"Warning: Invalid distance value received: {distance_str}"
+                        logger.warning(
+                            f"Invalid distance value received: {distance_str}"
                         )
 
                     route_info = {
@@ -147,16 +591,13 @@ def _directions_tool_internal(
                 "infocode": data.get("infocode"),
             }
 
-    except RequestException as e:
-        # 更具体的错误分类（可选，但有帮助）
-        error_type = "网络连接或请求错误"
-        if isinstance(e, requests.exceptions.Timeout):
-            error_type = "请求超时"
-        elif isinstance(e, requests.exceptions.HTTPError):
-            error_type = f"HTTP请求错误: {e.response.status_code}"
-
-        result_payload = {"error": error_type, "message": str(e)}
-    except JSONDecodeError:
+    except asyncio.TimeoutError as e:
+        result_payload = {"error": "请求超时", "message": str(e)}
+    except aiohttp.ClientResponseError as e:
+        result_payload = {"error": f"HTTP请求错误: {e.status}", "message": str(e)}
+    except aiohttp.ClientError as e:
+        result_payload = {"error": "网络连接或请求错误", "message": str(e)}
+    except json.JSONDecodeError:
         result_payload = {"error": "无法解析API响应内容 (非JSON格式)"}
     except Exception as e:
         result_payload = {"error": "处理路线规划时发生未知错误", "message": str(e)}
@@ -167,13 +608,15 @@ def _directions_tool_internal(
 
 
 
-def geocode_and_extract_locations(
+async def geocode_and_extract_locations(
     address: str, city: Optional[str] = None
 ) -> str:  # 返回值仍是 JSON 字符串
-    """Gets the latitude and longitude coordinates for a given address using geocoding (synchronous).
+    """Gets the latitude and longitude coordinates for a given address using geocoding.
 
-    Uses the Amap Geocoding API internally. Returns an empty JSON object string
-    if the address cannot be found or an error occurs.
+    Uses the Amap Geocoding API internally. Results are cached per normalized
+    address and city, so repeated lookups of the same address are free.
+    Returns an empty JSON object string if the address cannot be found or an
+    error occurs.
 
     Args:
         address: The detailed address string to geocode,
@@ -188,28 +631,28 @@ def geocode_and_extract_locations(
         Example failure: '{}'
     """
     try:
-        # 直接调用同步的内部函数，不再需要 http client session
-        location_dict = _geocode_tool_internal(address=address, city=city)
+        # 先查缓存，未命中时通过共享会话请求高德API
+        location_dict = await geocode_cached(address=address, city=city)
         # 确保返回的是字典，即使是空的
         if not isinstance(location_dict, dict):
-            print(
-                f"Warning: _geocode_tool_internal did not return a dict. Received: {type(location_dict)}"
+            logger.warning(
+                f"geocode_cached did not return a dict. Received: {type(location_dict)}"
             )
             return "{}"  # 保持返回空 JSON 字符串的约定
         return json.dumps(location_dict)
     except Exception as e:
         # 这个顶级异常捕获现在主要处理 _geocode_tool_internal 内部未捕获的意外错误
         # 或者 json.dumps 可能遇到的极罕见错误（如循环引用，理论上这里不会发生）
-        print(f"Error in geocode_and_extract_locations synchronous wrapper: {e}")
+        logger.error(f"Error in geocode_and_extract_locations wrapper: {e}")
         return "{}"  # 返回空 JSON 字符串
 
 
-def get_amap_driving_directions(
+async def get_amap_driving_directions(
     origin: str,
     destination: str,
     waypoints: Optional[str] = None,
 ) -> str:  # 返回值仍是 JSON 字符串
-    """Gets driving directions between two or more points using the Amap API (synchronous).
+    """Gets driving directions between two or more points using the Amap API.
 
     Takes origin, destination, and optional waypoints as longitude,latitude strings
     and returns route information including distance, duration, and instructions.
@@ -277,16 +720,19 @@ def get_amap_driving_directions(
         return json.dumps(error_payload)
 
     try:
-        # 直接调用同步的内部函数
-        result_dict = _directions_tool_internal(
-            origin=origin,
-            destination=destination,
-            waypoints=waypoints,
+        # 相同路线的并发请求只发起一次网络调用
+        result_dict = await _directions_flight.do(
+            (origin, destination, waypoints or ""),
+            lambda: _directions_tool_internal(
+                origin=origin,
+                destination=destination,
+                waypoints=waypoints,
+            ),
         )
         # 确保返回的是字典
         if not isinstance(result_dict, dict):
-            print(
-                f"Warning: _directions_tool_internal did not return a dict. Received: {type(result_dict)}"
+            logger.warning(
+                f"_directions_tool_internal did not return a dict. Received: {type(result_dict)}"
             )
             return json.dumps(
                 {
@@ -297,13 +743,10 @@ def get_amap_driving_directions(
         return json.dumps(result_dict)
     except Exception as e:
         # 同样，这个顶级异常捕获处理包装器或 json.dumps 的意外错误
-        print(f"Error in get_amap_driving_directions synchronous wrapper: {e}")
+        logger.error(f"Error in get_amap_driving_directions wrapper: {e}")
         return json.dumps(
             {
                 "error": "内部服务器错误",
                 "message": "处理路线规划请求时发生意外错误。",
             }
         )
-
-
-
@@ -0,0 +1,234 @@
+"""
+IoTDA 批量设备命令下发
+
+批量命令接口只把每台设备的命令写入发件箱 (jishe.iotda_command)，由后台任务下发:
+- IOTDA_COMMAND_WORKERS 个任务各自认领一小批到期的命令并依次下发，所有任务共用
+  IOTDA_COMMAND_RATE_PER_SECOND 的令牌桶，整体下发速率与并发都有上限
+- 限流 (429)、5xx、超时与连接失败按指数退避重新排队，最多尝试 IOTDA_COMMAND_MAX_ATTEMPTS 次；其他错误直接标记失败
+- 认领的命令在 IOTDA_COMMAND_LEASE_SECONDS 内未记录结果（如进程退出）时会被重新认领，
+  因此命令至少下发一次，极端情况下可能重复下发
+- 另有一个任务按 IOTDA_COMMAND_STATUS_REFRESH_SECONDS 查询已受理命令的最新状态
+  (PENDING/SENT/DELIVERED/SUCCESSFUL/FAILED/TIMEOUT/EXPIRED)，与查询设备命令接口返回的状态一致
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from huaweicloudsdkcore.exceptions import exceptions
+from huaweicloudsdkiotda.v5 import (
+    AsyncDeviceCommandRequest,
+    CreateAsyncCommandRequest,
+    ShowAsyncDeviceCommandRequest,
+)
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import settings
+from crud import iotda_command
+from db.database import async_db_session
+from service.iotda_service import call
+from utils.rate_limiter import AsyncRateLimiter
+
+# 每个任务一次认领的命令数
+CLAIM_SIZE = 10
+# 只刷新一天内创建的命令，更早的命令在 IoTDA 中早已过期
+STATUS_REFRESH_MAX_AGE = timedelta(days=1)
+# 重新排队的最长等待时间
+MAX_RETRY_DELAY = timedelta(minutes=5)
+
+_limiter = AsyncRateLimiter(
+    rate=settings.IOTDA_COMMAND_RATE_PER_SECOND,
+    burst=max(1, int(settings.IOTDA_COMMAND_RATE_PER_SECOND)),
+)
+_wakeup = asyncio.Event()
+_tasks: List["asyncio.Task[None]"] = []
+
+_stats = {
+    "enqueued": 0,
+    "sent": 0,
+    "retried": 0,
+    "failed": 0,
+    "status_refreshes": 0,
+}
+
+
+def _is_retryable(error: Exception) -> bool:
+    """限流、服务端错误、超时与连接失败可以重试，其他错误（参数错误、设备不存在等）重试也不会成功"""
+    if isinstance(error, exceptions.ServiceResponseException):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(
+        error, (asyncio.TimeoutError, exceptions.ConnectionException, exceptions.RequestTimeoutException)
+    )
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, exceptions.ServiceResponseException):
+        return f"状态码:{error.status_code}, 错误码:{error.error_code}, 错误信息:{error.error_msg}"
+    return repr(error)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次失败后的等待时间：指数退避加随机抖动"""
+    ceiling = min(
+        MAX_RETRY_DELAY.total_seconds(),
+        settings.IOTDA_COMMAND_RETRY_DELAY_SECONDS * 2 ** (attempts - 1),
+    )
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+async def enqueue_command_batch(
+    device_ids: List[str],
+    command: Dict[str, Any],
+    instance_id: Optional[str] = None,
+    created_by: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    写入批量命令并唤醒下发任务
+
+    Args:
+        device_ids: 目标设备ID（不重复）
+        command: 命令内容（AsyncDeviceCommandRequest 的字段）
+        instance_id: IoTDA 实例ID
+        created_by: 创建者用户ID
+
+    Returns:
+        Dict[str, Any]: {"batch_id", "total"}
+    """
+    async with async_db_session() as db:
+        batch = await iotda_command.create_command_batch(
+            db, device_ids, command, instance_id=instance_id, created_by=created_by
+        )
+    _stats["enqueued"] += batch.total
+    _wakeup.set()
+    return {"batch_id": batch.id, "total": batch.total}
+
+
+async def _send(command: Dict[str, Any]) -> Dict[str, Any]:
+    """下发一条命令，返回要记录的结果"""
+    await _limiter.acquire()
+    try:
+        request = CreateAsyncCommandRequest(
+            device_id=command["device_id"],
+            instance_id=command["instance_id"],
+            body=AsyncDeviceCommandRequest(**command["command"]),
+        )
+        response = await call("create_async_command", request)
+    except Exception as e:
+        # 无法重试的错误（包括命令内容本身有误）直接标记失败，避免同一条命令反复下发
+        if _is_retryable(e) and command["attempts"] < settings.IOTDA_COMMAND_MAX_ATTEMPTS:
+            _stats["retried"] += 1
+            return {
+                "id": command["id"],
+                "status": "pending",
+                "next_attempt_at": datetime.now() + _retry_delay(command["attempts"]),
+                "error": _describe(e),
+            }
+        _stats["failed"] += 1
+        logger.warning(f"设备 {command['device_id']} 的命令下发失败（第 {command['attempts']} 次）: {_describe(e)}")
+        return {"id": command["id"], "status": "failed", "error": _describe(e)}
+
+    _stats["sent"] += 1
+    return {
+        "id": command["id"],
+        "status": "sent",
+        "command_id": response.command_id,
+        "command_status": response.status,
+        "error": None,
+    }
+
+
+async def _worker_loop() -> None:
+    """下发任务：认领一小批命令依次下发，没有到期的命令时等待唤醒或轮询"""
+    lease = timedelta(seconds=settings.IOTDA_COMMAND_LEASE_SECONDS)
+    while True:
+        # 先清除唤醒标志再认领，认领之后写入的命令会再次唤醒
+        _wakeup.clear()
+        try:
+            async with async_db_session() as db:
+                commands = await iotda_command.claim_commands(db, CLAIM_SIZE, lease)
+            results = []
+            try:
+                for command in commands:
+                    results.append(await _send(command))
+            finally:
+                # 停止时也记录已下发命令的结果，避免认领到期后重复下发
+                async with async_db_session() as db:
+                    await iotda_command.record_command_results(db, results)
+        except SQLAlchemyError as e:
+            # 已认领的命令在认领到期后会被重新下发
+            logger.error(f"设备命令发件箱读写失败: {e}")
+            commands = []
+        if len(commands) < CLAIM_SIZE:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=settings.IOTDA_COMMAND_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _refresh_status(command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    await _limiter.acquire()
+    request = ShowAsyncDeviceCommandRequest(
+        device_id=command["device_id"],
+        instance_id=command["instance_id"],
+        command_id=command["command_id"],
+    )
+    try:
+        response = await call("show_async_device_command", request)
+    except (exceptions.SdkException, asyncio.TimeoutError) as e:
+        logger.warning(f"查询设备 {command['device_id']} 的命令 {command['command_id']} 状态失败: {_describe(e)}")
+        return None
+    return {"id": command["id"], "command_status": response.status}
+
+
+async def _status_loop() -> None:
+    """状态刷新任务：定期查询已受理但尚未结束的命令的状态"""
+    interval = timedelta(seconds=settings.IOTDA_COMMAND_STATUS_REFRESH_SECONDS)
+    while True:
+        try:
+            async with async_db_session() as db:
+                commands = await iotda_command.claim_status_refresh(
+                    db, CLAIM_SIZE, interval, STATUS_REFRESH_MAX_AGE
+                )
+            results = [result for result in [await _refresh_status(command) for command in commands] if result]
+            async with async_db_session() as db:
+                await iotda_command.record_command_results(db, results)
+            _stats["status_refreshes"] += len(results)
+        except SQLAlchemyError as e:
+            logger.error(f"刷新设备命令状态失败: {e}")
+            commands = []
+        if len(commands) < CLAIM_SIZE:
+            await asyncio.sleep(settings.IOTDA_COMMAND_POLL_INTERVAL_SECONDS)
+
+
+def start_iotda_command_workers() -> None:
+    """启动下发与状态刷新任务（IOTDA_COMMAND_OUTBOX_ENABLED 关闭时不启动）"""
+    if not settings.IOTDA_COMMAND_OUTBOX_ENABLED or _tasks:
+        return
+    _tasks.extend(asyncio.create_task(_worker_loop()) for _ in range(settings.IOTDA_COMMAND_WORKERS))
+    if settings.IOTDA_COMMAND_STATUS_REFRESH_SECONDS > 0:
+        _tasks.append(asyncio.create_task(_status_loop()))
+
+
+async def stop_iotda_command_workers() -> None:
+    """停止后台任务，正在下发的命令在认领到期后由其他进程或下次启动时重新下发"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def get_iotda_command_stats() -> Dict[str, Any]:
+    """
+    获取批量命令下发统计
+
+    Returns:
+        Dict[str, Any]: 是否启用、运行中的任务数、入队/下发/重试/失败的命令数、状态刷新次数与限流统计
+    """
+    return {
+        "enabled": settings.IOTDA_COMMAND_OUTBOX_ENABLED,
+        "running_tasks": sum(1 for task in _tasks if not task.done()),
+        **_stats,
+        "limiter": _limiter.stats(),
+    }
@@ -1,24 +1,185 @@
-from huaweicloudsdkcore.region.region import Region
-from huaweicloudsdkiotda.v5 import IoTDAAsyncClient
+"""
+华为云 IoTDA 调用网关
+
+SDK 的 *_async 方法返回的是线程池中的 Future，不能直接 await，且客户端线程池大小固定。
+这里使用同步客户端，在按 IOTDA_MAX_WORKERS 配置的独立线程池中执行调用，通过 asyncio.wrap_future 等待结果：
+- 客户端在第一次调用时按配置创建（连接池大小、连接/读取超时），导入模块时不访问网络
+- 每次调用受 IOTDA_CALL_TIMEOUT_SECONDS 限制，超时抛出 asyncio.TimeoutError
+- 被限流 (429) 时按指数退避加随机抖动重试；查询类调用在连接失败、超时和 5xx 时也会重试，
+  写操作只在限流时重试，避免重复执行
+- fan_out 并发执行一组调用（并发数受 IOTDA_FANOUT_CONCURRENCY 限制），结果与输入顺序一致
+"""
+
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
 from huaweicloudsdkcore.auth.credentials import BasicCredentials
+from huaweicloudsdkcore.exceptions import exceptions
+from huaweicloudsdkcore.http.http_config import HttpConfig
+from huaweicloudsdkcore.region.region import Region
+from huaweicloudsdkiotda.v5 import IoTDAClient
+from loguru import logger
+
 from core.config import settings
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 只读调用（按方法名前缀判断），失败重试不会产生副作用
+_IDEMPOTENT_PREFIXES = ("list_", "show_")
+
+_client: Optional[IoTDAClient] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
+
+_stats = {
+    "calls": 0,
+    "retries": 0,
+    "throttled": 0,
+    "timeouts": 0,
+    "failures": 0,
+}
+
+
+def _get_client() -> IoTDAClient:
+    """按配置惰性创建 IoTDA 客户端"""
+    global _client
+    if _client is None:
+        config = HttpConfig.get_default_config()
+        config.timeout = (settings.IOTDA_CONNECT_TIMEOUT_SECONDS, settings.IOTDA_READ_TIMEOUT_SECONDS)
+        config.pool_connections = settings.IOTDA_POOL_MAXSIZE
+        config.pool_maxsize = settings.IOTDA_POOL_MAXSIZE
+        # 重试由 call() 统一处理
+        config.retry_times = 0
+
+        credentials = BasicCredentials(
+            settings.HUAWEICLOUD_SDK_AK, settings.HUAWEICLOUD_SDK_SK, settings.IOTDA_PROJECT_ID
+        )
+        _client = (
+            IoTDAClient.new_builder()
+            .with_http_config(config)
+            .with_credentials(credentials)
+            .with_region(Region(settings.IOTDA_REGION_ID, settings.IOTDA_ENDPOINT))
+            .build()
+        )
+        logger.info(f"IoTDA 客户端已创建: {settings.IOTDA_ENDPOINT}")
+    return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IOTDA_MAX_WORKERS, thread_name_prefix="iotda")
+    return _executor
+
+
+def _is_retryable(error: Exception, idempotent: bool) -> bool:
+    """判断调用失败后是否可以重试"""
+    if isinstance(error, exceptions.ServiceResponseException):
+        if error.status_code == 429:
+            return True
+        return idempotent and error.status_code >= 500
+    return idempotent and isinstance(
+        error, (asyncio.TimeoutError, exceptions.ConnectionException, exceptions.RequestTimeoutException)
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    """指数退避加全量随机抖动，避免多个请求同时重试"""
+    ceiling = min(settings.IOTDA_RETRY_MAX_DELAY_SECONDS, settings.IOTDA_RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+async def call(method: str, request: Any) -> Any:
+    """
+    调用 IoTDA 接口
+
+    Args:
+        method: IoTDAClient 的方法名，如 "show_device"
+        request: 对应的请求对象
+
+    Returns:
+        Any: SDK 响应对象
+
+    Raises:
+        exceptions.SdkException: 接口返回错误或连接失败（已用尽重试次数）
+        asyncio.TimeoutError: 调用超时（已用尽重试次数）
+    """
+    global _in_flight
+    func = getattr(_get_client(), method)
+    idempotent = method.startswith(_IDEMPOTENT_PREFIXES)
+    attempt = 0
+    while True:
+        _stats["calls"] += 1
+        _in_flight += 1
+        try:
+            future = _get_executor().submit(func, request)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.IOTDA_CALL_TIMEOUT_SECONDS)
+        except (exceptions.SdkException, asyncio.TimeoutError) as e:
+            if isinstance(e, asyncio.TimeoutError):
+                _stats["timeouts"] += 1
+            elif isinstance(e, exceptions.ServiceResponseException) and e.status_code == 429:
+                _stats["throttled"] += 1
+
+            if attempt >= settings.IOTDA_MAX_RETRIES or not _is_retryable(e, idempotent):
+                _stats["failures"] += 1
+                raise
+            delay = _backoff_delay(attempt)
+            attempt += 1
+            _stats["retries"] += 1
+            logger.warning(f"IoTDA 调用 {method} 失败，{delay:.2f}s 后第 {attempt} 次重试: {e!r}")
+        finally:
+            _in_flight -= 1
+        await asyncio.sleep(delay)
+
+
+async def fan_out(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    并发地对每个元素执行 func
+
+    Args:
+        func: 异步函数
+        items: 参数列表
+        concurrency: 最大并发数，默认 IOTDA_FANOUT_CONCURRENCY
+
+    Returns:
+        List[Any]: 与 items 顺序一致的结果，失败的元素对应位置为异常对象
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.IOTDA_FANOUT_CONCURRENCY)
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
 
-ak = settings.HUAWEICLOUD_SDK_AK
-sk = settings.HUAWEICLOUD_SDK_SK
-project_id = "8b086955-1e5d-45f7-ab7b-1a54fdbf5e68"
-region_id = "cn-north-4"
-endpoint = "2f6dd797a9.st1.iotda-app.cn-north-4.myhuaweicloud.com"
+def shutdown_iotda_gateway() -> None:
+    """关闭客户端与线程池，在应用关闭时调用"""
+    global _client, _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _client is not None:
+        _client.close()
+        _client = None
 
-REGION = Region(region_id, endpoint)
 
-# 创建认证
-# 创建BasicCredentials实例并初始化
-credentials = BasicCredentials(ak, sk, project_id)
+def get_iotda_stats() -> Dict[str, Any]:
+    """
+    获取 IoTDA 调用统计
 
-client = (
-    IoTDAAsyncClient.new_builder()
-    .with_credentials(credentials)
-    .with_region(REGION)
-    .build()
-)
+    Returns:
+        Dict[str, Any]: 进行中的调用数、调用/重试/限流/超时/失败次数
+    """
+    return {
+        "in_flight": _in_flight,
+        "max_workers": settings.IOTDA_MAX_WORKERS,
+        **_stats,
+    }
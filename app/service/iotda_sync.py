@@ -0,0 +1,287 @@
+"""
+IoTDA 设备镜像同步
+
+开启 IOTDA_MIRROR_ENABLED 后，后台任务把 IOTDA_INSTANCE_ID 实例的设备、设备组与设备组成员同步到本地表
+(jishe.iotda_device 等)，设备与设备组查询接口直接读取镜像:
+- 增量同步（每 IOTDA_SYNC_INTERVAL_SECONDS）: 按 marker 分页查询注册时间晚于上次同步的设备，
+  IoTDA 的 start_time 只按注册时间过滤，因此增量同步只能发现新注册的设备
+- 全量同步（每 IOTDA_SYNC_FULL_INTERVAL_SECONDS，或通过本系统修改设备/设备组后）: 分页遍历全部设备与设备组，
+  并发查询每个设备组的成员，最后删除本次未出现的记录；设备属性与状态的变化在全量同步后反映到镜像
+- 多进程部署时通过 jishe.iotda_sync_state 中的租约保证同一时间只有一个进程在同步
+- 镜像的新鲜度以最近一次全量同步完成时间为准，超过 IOTDA_MIRROR_MAX_STALENESS_SECONDS 时查询回退到华为云
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Response
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from crud import iodta
+from crud import iotda_mirror
+from db.database import async_db_session
+from service.iotda_service import fan_out
+
+# IoTDA 分页查询每页最大条数
+PAGE_SIZE = 50
+# 增量同步水位向前回退的时间，覆盖本机与 IoTDA 之间的时钟误差
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# 同步租约时长，持有租约的进程异常退出后其他进程最多等待这么久
+SYNC_LEASE = timedelta(minutes=10)
+IOTDA_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+# 响应头：镜像数据距最近一次全量同步的秒数，直接查询华为云时为 live
+FRESHNESS_HEADER = "X-Data-Freshness"
+
+_wakeup = asyncio.Event()
+_sync_task: Optional["asyncio.Task[None]"] = None
+_full_requested = False
+
+_stats = {
+    "incremental_syncs": 0,
+    "full_syncs": 0,
+    "failed_syncs": 0,
+    "lease_skips": 0,
+    "devices_synced": 0,
+    "devices_deleted": 0,
+    "mirror_reads": 0,
+    "live_reads": 0,
+    "stale_fallbacks": 0,
+}
+
+
+def mirror_key(instance_id: Optional[str] = None) -> str:
+    """请求中的实例ID对应的镜像键，未指定时为同步的实例"""
+    return instance_id or settings.IOTDA_INSTANCE_ID or ""
+
+
+async def _walk(fetch: Callable[[Optional[str]], Awaitable[Optional[Dict[str, Any]]]], key: str) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    按 marker 逐页遍历 IoTDA 分页接口
+
+    Args:
+        fetch: 以 marker 为参数查询一页，失败时返回 None
+        key: 响应中记录列表的字段名
+    """
+    marker = None
+    while True:
+        page = await fetch(marker)
+        if page is None:
+            raise RuntimeError(f"分页查询 {key} 失败")
+        items = page.get(key) or []
+        yield items
+        marker = (page.get("page") or {}).get("marker")
+        if len(items) < PAGE_SIZE or not marker:
+            return
+
+
+async def _sync_devices(instance_id: Optional[str], key: str, synced_at: datetime, start_time: Optional[str]) -> int:
+    """同步设备，start_time 为空时遍历全部设备"""
+    synced = 0
+    pages = _walk(
+        lambda marker: iodta.list_devices(
+            instance_id=instance_id, limit=PAGE_SIZE, marker=marker, start_time=start_time
+        ),
+        "devices",
+    )
+    async for devices in pages:
+        async with async_db_session() as db:
+            await iotda_mirror.upsert_devices(db, key, devices, synced_at)
+            await db.commit()
+        synced += len(devices)
+    return synced
+
+
+async def _sync_groups(instance_id: Optional[str], key: str, synced_at: datetime) -> None:
+    """同步全部设备组及其成员"""
+    group_ids: List[str] = []
+    pages = _walk(
+        lambda marker: iodta.list_device_groups(instance_id=instance_id, limit=PAGE_SIZE, marker=marker),
+        "device_groups",
+    )
+    async for groups in pages:
+        async with async_db_session() as db:
+            await iotda_mirror.upsert_device_groups(db, key, groups, synced_at)
+            await db.commit()
+        group_ids.extend(group["group_id"] for group in groups)
+
+    async def members(group_id: str) -> List[str]:
+        device_ids: List[str] = []
+        async for devices in _walk(
+            lambda marker: iodta.show_devices_in_group(
+                instance_id=instance_id, group_id=group_id, limit=PAGE_SIZE, marker=marker
+            ),
+            "devices",
+        ):
+            device_ids.extend(device["device_id"] for device in devices)
+        return device_ids
+
+    results = await fan_out(members, group_ids)
+    for group_id, result in zip(group_ids, results):
+        if isinstance(result, BaseException):
+            raise RuntimeError(f"查询设备组 {group_id} 的成员失败") from result
+    async with async_db_session() as db:
+        for group_id, device_ids in zip(group_ids, results):
+            await iotda_mirror.upsert_group_members(db, key, group_id, device_ids, synced_at)
+        await db.commit()
+
+
+async def sync_iotda_mirror(full: bool = False) -> bool:
+    """
+    执行一次镜像同步
+
+    从未全量同步过、距上次全量同步超过 IOTDA_SYNC_FULL_INTERVAL_SECONDS 或 full 为 True 时执行全量同步，
+    否则执行增量同步
+
+    Args:
+        full: 是否强制全量同步
+
+    Returns:
+        bool: 是否完成同步（其他进程持有租约或同步失败时为 False）
+    """
+    instance_id = settings.IOTDA_INSTANCE_ID
+    key = mirror_key()
+    started_at = datetime.now()
+    watermark = (datetime.now(timezone.utc) - WATERMARK_OVERLAP).strftime(IOTDA_TIME_FORMAT)
+
+    async with async_db_session() as db:
+        state = await iotda_mirror.acquire_sync_lease(db, key, started_at, SYNC_LEASE)
+    if state is None:
+        _stats["lease_skips"] += 1
+        return False
+
+    full = (
+        full
+        or state.last_full_sync_at is None
+        or state.device_watermark is None
+        or started_at - state.last_full_sync_at >= timedelta(seconds=settings.IOTDA_SYNC_FULL_INTERVAL_SECONDS)
+    )
+    try:
+        if full:
+            synced = await _sync_devices(instance_id, key, started_at, None)
+            await _sync_groups(instance_id, key, started_at)
+            async with async_db_session() as db:
+                deleted = await iotda_mirror.delete_stale(db, key, started_at)
+                await db.commit()
+            _stats["devices_deleted"] += deleted["devices"]
+            values = {"last_full_sync_at": datetime.now()}
+        else:
+            synced = await _sync_devices(instance_id, key, started_at, state.device_watermark)
+            values = {"last_incremental_sync_at": datetime.now()}
+    except Exception as e:
+        _stats["failed_syncs"] += 1
+        logger.error(f"IoTDA 设备镜像{'全量' if full else '增量'}同步失败: {e!r}")
+        async with async_db_session() as db:
+            await iotda_mirror.release_sync_lease(db, key, last_error=repr(e))
+        return False
+
+    async with async_db_session() as db:
+        await iotda_mirror.release_sync_lease(db, key, device_watermark=watermark, last_error=None, **values)
+    _stats["full_syncs" if full else "incremental_syncs"] += 1
+    _stats["devices_synced"] += synced
+    logger.info(
+        f"IoTDA 设备镜像{'全量' if full else '增量'}同步完成: {synced} 个设备，"
+        f"耗时 {(datetime.now() - started_at).total_seconds():.1f}s"
+    )
+    return True
+
+
+def request_iotda_sync() -> None:
+    """通过本系统修改设备或设备组后调用，尽快执行一次全量同步"""
+    global _full_requested
+    if _sync_task is not None:
+        _full_requested = True
+        _wakeup.set()
+
+
+async def _sync_loop() -> None:
+    """后台同步任务：启动时立即同步，之后定时或收到请求时同步"""
+    global _full_requested
+    while True:
+        full, _full_requested = _full_requested, False
+        try:
+            # 其他进程持有租约或同步失败时，保留全量同步请求到下一轮
+            if not await sync_iotda_mirror(full=full) and full:
+                _full_requested = True
+        except Exception as e:
+            _stats["failed_syncs"] += 1
+            logger.error(f"IoTDA 设备镜像同步异常: {e!r}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.IOTDA_SYNC_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_iotda_sync() -> None:
+    """启动后台同步任务（IOTDA_MIRROR_ENABLED 关闭时不启动）"""
+    global _sync_task
+    if settings.IOTDA_MIRROR_ENABLED and _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+
+async def stop_iotda_sync() -> None:
+    """停止后台同步任务"""
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+
+async def get_mirror_age(db: AsyncSession, instance_id: Optional[str]) -> Optional[float]:
+    """
+    判断查询能否由镜像提供
+
+    Args:
+        db: 数据库会话
+        instance_id: 请求中的实例ID
+
+    Returns:
+        Optional[float]: 镜像数据距最近一次全量同步的秒数；
+            未开启镜像、该实例未同步过或数据过旧时返回 None，应查询华为云
+    """
+    if not settings.IOTDA_MIRROR_ENABLED:
+        _stats["live_reads"] += 1
+        return None
+    state = await iotda_mirror.get_sync_state(db, mirror_key(instance_id))
+    if state is None or state.last_full_sync_at is None:
+        _stats["live_reads"] += 1
+        return None
+    age = (datetime.now() - state.last_full_sync_at).total_seconds()
+    if age > settings.IOTDA_MIRROR_MAX_STALENESS_SECONDS:
+        _stats["stale_fallbacks"] += 1
+        _stats["live_reads"] += 1
+        return None
+    _stats["mirror_reads"] += 1
+    return age
+
+
+async def forget_mirror_device(db: AsyncSession, instance_id: Optional[str], device_id: str) -> None:
+    """通过本系统删除设备后立即从镜像中移除，不等待下一次全量同步"""
+    if settings.IOTDA_MIRROR_ENABLED:
+        await iotda_mirror.delete_device(db, mirror_key(instance_id), device_id)
+
+
+def set_data_freshness(response: Response, age: Optional[float]) -> None:
+    """设置数据新鲜度响应头，age 为 None 表示数据直接来自华为云"""
+    response.headers[FRESHNESS_HEADER] = "live" if age is None else str(int(age))
+
+
+def get_iotda_sync_stats() -> Dict[str, Any]:
+    """
+    获取 IoTDA 设备镜像同步与读取统计
+
+    Returns:
+        Dict[str, Any]: 是否启用、同步次数、同步/删除的设备数、镜像与华为云查询次数
+    """
+    return {
+        "enabled": settings.IOTDA_MIRROR_ENABLED,
+        "sync_running": _sync_task is not None and not _sync_task.done(),
+        **_stats,
+    }
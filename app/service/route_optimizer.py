@@ -0,0 +1,390 @@
+"""
+运输线路优化
+
+为多站点配送求解带容量约束的车辆路径问题（单车多趟）：
+1. 获取距离/耗时矩阵：高德距离测量接口，或基于 haversine 的本地估算（可注册其他来源）
+2. 构造初始解：按容量限制的最近邻算法，车辆装满后返回仓库开始下一趟
+3. 局部优化：对每一趟交替执行 2-opt 与 Or-opt，直到无法改进或超出时间预算
+
+距离矩阵计算与局部搜索中的候选评估均使用 NumPy 向量化实现。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from core.config import settings
+from service.gaode import distance_matrix
+
+EARTH_RADIUS_METERS = 6371008.8
+
+# 距离来源: 输入 (n, 2) 的 [经度, 纬度] 数组，返回 (距离矩阵[米], 耗时矩阵[秒])
+DistanceProvider = Callable[[np.ndarray], Awaitable[Tuple[np.ndarray, np.ndarray]]]
+
+
+def haversine_matrix(coords: np.ndarray) -> np.ndarray:
+    """
+    向量化计算所有点对之间的球面距离
+
+    Args:
+        coords: (n, 2) 数组，每行为 [经度, 纬度]
+
+    Returns:
+        np.ndarray: (n, n) 距离矩阵（米）
+    """
+    lon = np.radians(coords[:, 0])
+    lat = np.radians(coords[:, 1])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _estimate_road_matrices(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """用直线距离乘以绕行系数估算道路距离，再按平均车速估算耗时"""
+    distance = haversine_matrix(coords) * settings.ROUTE_DETOUR_FACTOR
+    speed = settings.ROUTE_AVERAGE_SPEED_KMH * 1000 / 3600
+    return distance, distance / speed
+
+
+async def haversine_provider(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """本地估算的距离来源，不调用任何外部接口"""
+    return _estimate_road_matrices(coords)
+
+
+async def gaode_provider(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    高德驾车距离来源
+
+    复用 gaode.distance_matrix 的去重、缓存与限流；无法计算的单元使用本地估算值补齐
+    """
+    points = [f"{lon:.6f},{lat:.6f}" for lon, lat in coords]
+    result = await distance_matrix(points, points, distance_type=1)
+
+    distance, duration = _estimate_road_matrices(coords)
+    missing = 0
+    for i, row in enumerate(result["rows"]):
+        for j, cell in enumerate(row):
+            if cell.get("distance_meters") is None:
+                missing += 1
+                continue
+            distance[i, j] = cell["distance_meters"]
+            duration[i, j] = cell["duration_seconds"]
+    if missing:
+        logger.warning(f"高德距离矩阵中有 {missing} 个单元无法计算，已使用本地估算值")
+    return distance, duration
+
+
+DISTANCE_PROVIDERS: Dict[str, DistanceProvider] = {
+    "haversine": haversine_provider,
+    "gaode": gaode_provider,
+}
+
+
+def register_distance_provider(name: str, provider: DistanceProvider) -> None:
+    """
+    注册新的距离来源
+
+    Args:
+        name: 来源名称，可在优化请求的 distance_source 中使用
+        provider: 距离来源协程函数
+    """
+    DISTANCE_PROVIDERS[name] = provider
+
+
+def resolve_distance_source(source: str, point_count: int) -> str:
+    """
+    解析距离来源，auto 时点数不超过 ROUTE_GAODE_MAX_POINTS 使用高德，否则使用本地估算
+
+    显式指定高德时同样受 ROUTE_GAODE_MAX_POINTS 与 GEO_MATRIX_MAX_ELEMENTS 限制，
+    避免大量站点的请求耗尽高德配额
+
+    Raises:
+        ValueError: 未知的距离来源，或点数超出高德距离的上限
+    """
+    if source == "auto":
+        return "gaode" if point_count <= settings.ROUTE_GAODE_MAX_POINTS else "haversine"
+    if source not in DISTANCE_PROVIDERS:
+        raise ValueError(f"未知的距离来源: {source}")
+    if source == "gaode" and (
+        point_count > settings.ROUTE_GAODE_MAX_POINTS
+        or point_count * point_count > settings.GEO_MATRIX_MAX_ELEMENTS
+    ):
+        raise ValueError(
+            f"点数（含仓库）{point_count} 超过高德距离的上限 {settings.ROUTE_GAODE_MAX_POINTS}，"
+            f"请使用 haversine 或 auto"
+        )
+    return source
+
+
+async def build_matrices(coords: np.ndarray, source: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    使用指定来源获取距离与耗时矩阵
+
+    Args:
+        coords: (n, 2) 数组，第0行为仓库
+        source: 已解析的距离来源名称
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (距离矩阵[米], 耗时矩阵[秒])
+    """
+    return await DISTANCE_PROVIDERS[source](coords)
+
+
+def route_cost(route: Sequence[int], matrix: np.ndarray) -> float:
+    """计算路线上所有边的代价之和"""
+    route = np.asarray(route)
+    return float(matrix[route[:-1], route[1:]].sum())
+
+
+def nearest_neighbor_trips(
+    dist: np.ndarray, demands: np.ndarray, capacity: Optional[float], depot: int = 0
+) -> List[List[int]]:
+    """
+    按容量限制的最近邻算法构造初始解
+
+    从仓库出发，每次前往剩余容量可承载的最近站点；没有可承载的站点时返回仓库开始新一趟
+
+    Args:
+        dist: 距离矩阵
+        demands: 各点的需求量，仓库为0
+        capacity: 单趟容量，None 表示不限
+        depot: 仓库下标
+
+    Returns:
+        List[List[int]]: 每一趟的路线，首尾均为仓库
+
+    Raises:
+        ValueError: 存在需求量超过单趟容量的站点
+    """
+    remaining = np.ones(len(dist), dtype=bool)
+    remaining[depot] = False
+    limit = np.inf if capacity is None else capacity
+    if remaining.any() and not (demands[remaining] <= limit).all():
+        raise ValueError(f"存在需求量超过单趟容量 ({capacity}) 的站点")
+    trips: List[List[int]] = []
+
+    while remaining.any():
+        trip = [depot]
+        load = 0.0
+        current = depot
+        while True:
+            feasible = remaining & (demands <= limit - load)
+            if not feasible.any():
+                break
+            candidates = np.where(feasible, dist[current], np.inf)
+            current = int(np.argmin(candidates))
+            trip.append(current)
+            load += demands[current]
+            remaining[current] = False
+        if len(trip) == 1:
+            # 一个站点都装不下时（如需求量为 NaN）不再继续，避免无限循环
+            raise ValueError("存在无法装载的站点")
+        trip.append(depot)
+        trips.append(trip)
+    return trips
+
+
+def two_opt(route: List[int], dist: np.ndarray, deadline: float) -> Tuple[List[int], bool]:
+    """
+    2-opt 局部优化：反转路线中的一段以消除交叉边
+
+    对每个起点 i，向量化评估所有终点 j 的收益并执行最优的一次反转
+
+    Args:
+        route: 首尾为仓库的路线
+        dist: 对称距离矩阵
+        deadline: 截止时间（time.perf_counter）
+
+    Returns:
+        Tuple[List[int], bool]: 优化后的路线、是否有改进
+    """
+    r = np.asarray(route)
+    size = len(r)
+    improved_any = False
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, size - 2):
+            a, b = r[i - 1], r[i]
+            js = np.arange(i + 1, size - 1)
+            c, d = r[js], r[js + 1]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = js[k]
+                r[i:j + 1] = r[i:j + 1][::-1]
+                improved = improved_any = True
+    return r.tolist(), improved_any
+
+
+def or_opt(route: List[int], dist: np.ndarray, deadline: float, max_segment: int = 3) -> Tuple[List[int], bool]:
+    """
+    Or-opt 局部优化：将长度为 1~max_segment 的连续站点移动到路线中的其他位置（可反向插入）
+
+    对每个片段，向量化评估所有插入位置的代价
+
+    Args:
+        route: 首尾为仓库的路线
+        dist: 对称距离矩阵
+        deadline: 截止时间（time.perf_counter）
+        max_segment: 最大片段长度
+
+    Returns:
+        Tuple[List[int], bool]: 优化后的路线、是否有改进
+    """
+    r = np.asarray(route)
+    improved_any = False
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length <= len(r) - 1 and time.perf_counter() < deadline:
+                segment = r[i:i + length]
+                first, last = segment[0], segment[-1]
+                prev, nxt = r[i - 1], r[i + length]
+                removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+                rest = np.concatenate((r[:i], r[i + length:]))
+                u, v = rest[:-1], rest[1:]
+                forward = dist[u, first] + dist[last, v] - dist[u, v]
+                backward = dist[u, last] + dist[first, v] - dist[u, v]
+                pos_f, pos_b = int(np.argmin(forward)), int(np.argmin(backward))
+
+                if forward[pos_f] <= backward[pos_b]:
+                    pos, cost, piece = pos_f, forward[pos_f], segment
+                else:
+                    pos, cost, piece = pos_b, backward[pos_b], segment[::-1]
+
+                if cost - removal_gain < -1e-9:
+                    r = np.concatenate((rest[:pos + 1], piece, rest[pos + 1:]))
+                    improved = improved_any = True
+                else:
+                    i += 1
+    return r.tolist(), improved_any
+
+
+def improve_route(route: List[int], dist: np.ndarray, deadline: float) -> List[int]:
+    """交替执行 2-opt 与 Or-opt，直到两者都无法改进或超出时间预算"""
+    if len(route) <= 4:
+        return route
+    while time.perf_counter() < deadline:
+        route, improved_2opt = two_opt(route, dist, deadline)
+        route, improved_oropt = or_opt(route, dist, deadline)
+        if not (improved_2opt or improved_oropt):
+            break
+    return route
+
+
+def solve_routes(
+    dist: np.ndarray,
+    duration: np.ndarray,
+    demands: np.ndarray,
+    capacity: Optional[float] = None,
+    return_to_depot: bool = True,
+    service_seconds: float = 0.0,
+    time_limit: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    求解带容量约束的单车多趟路径问题，下标0为仓库
+
+    Args:
+        dist: (n, n) 距离矩阵（米）
+        duration: (n, n) 耗时矩阵（秒）
+        demands: (n,) 各点需求量，仓库为0
+        capacity: 单趟容量，None 表示不限（退化为TSP）
+        return_to_depot: 最后一趟结束后是否返回仓库（中间各趟总是返回仓库装货）
+        service_seconds: 每个站点的停留时间（秒）
+        time_limit: 局部优化的时间预算（秒）
+
+    Returns:
+        Dict[str, Any]: trips（每趟的站点下标、距离、耗时、载重）、总距离、总耗时，
+        以及最近邻初始解的距离（用于对比优化效果）
+    """
+    deadline = time.perf_counter() + time_limit
+    # 非对称矩阵（如驾车距离）在局部搜索中使用对称化近似，最终代价按原矩阵计算
+    search = (dist + dist.T) / 2 if not np.allclose(dist, dist.T) else dist
+
+    trips = nearest_neighbor_trips(search, demands, capacity)
+    baseline = 0.0
+    results = []
+    for index, trip in enumerate(trips):
+        is_open = not return_to_depot and index == len(trips) - 1
+        if is_open:
+            # 最后一趟不返回仓库：回到仓库的边代价视为0，优化后去掉终点
+            open_search = search.copy()
+            open_search[:, 0] = 0
+            baseline += route_cost(trip[:-1], dist)
+            trip = improve_route(trip, open_search, deadline)[:-1]
+        else:
+            baseline += route_cost(trip, dist)
+            trip = improve_route(trip, search, deadline)
+        stops = [node for node in trip if node != 0]
+        results.append({
+            "route": trip,
+            "stops": stops,
+            "distance_meters": route_cost(trip, dist),
+            "duration_seconds": route_cost(trip, duration) + service_seconds * len(stops),
+            "load": float(demands[stops].sum()) if stops else 0.0,
+        })
+
+    return {
+        "trips": results,
+        "total_distance_meters": sum(trip["distance_meters"] for trip in results),
+        "total_duration_seconds": sum(trip["duration_seconds"] for trip in results),
+        "baseline_distance_meters": baseline,
+    }
+
+
+async def optimize_route(
+    depot: Tuple[float, float],
+    stops: List[Tuple[float, float]],
+    demands: Optional[List[float]] = None,
+    capacity: Optional[float] = None,
+    source: str = "auto",
+    return_to_depot: bool = True,
+) -> Dict[str, Any]:
+    """
+    获取距离矩阵并在线程中求解路线，避免阻塞事件循环
+
+    Args:
+        depot: 仓库坐标 (经度, 纬度)
+        stops: 站点坐标列表
+        demands: 各站点需求量，默认均为0
+        capacity: 单趟容量
+        source: 距离来源，auto/haversine/gaode 或已注册的来源
+        return_to_depot: 最后一趟是否返回仓库
+
+    Returns:
+        Dict[str, Any]: solve_routes 的结果，站点下标为 stops 中的下标（从0开始），并附带 distance_source
+
+    Raises:
+        ValueError: 未知的距离来源、点数超出高德距离的上限，或存在需求量超过单趟容量的站点
+    """
+    coords = np.array([depot, *stops], dtype=float)
+    demand_array = np.zeros(len(coords))
+    if demands:
+        demand_array[1:] = demands
+    source = resolve_distance_source(source, len(coords))
+
+    dist, duration = await build_matrices(coords, source)
+    plan = await asyncio.to_thread(
+        solve_routes,
+        dist,
+        duration,
+        demand_array,
+        capacity,
+        return_to_depot,
+        settings.ROUTE_SERVICE_SECONDS,
+        settings.ROUTE_OPTIMIZE_TIME_LIMIT_SECONDS,
+    )
+    # 转换为请求中 stops 的下标
+    for trip in plan["trips"]:
+        trip["stops"] = [node - 1 for node in trip["stops"]]
+        del trip["route"]
+    plan["distance_source"] = source
+    return plan
@@ -0,0 +1,108 @@
+"""
+巡检看板状态统计快照
+
+看板会持续轮询 /patrol/status-summary，统计结果在 STATUS_SUMMARY_CACHE_SECONDS 内复用同一个快照：
+- 快照过期后，第一个请求触发后台刷新并继续返回旧快照（过期不超过一个窗口），避免轮询请求排队等待
+- drone / patrol / error 在本进程内有写入时（数据版本号变化）快照立即失效，下一个请求同步刷新
+- 并发刷新通过 SingleFlight 合并，无论多少客户端轮询，每个窗口最多执行一次统计查询
+- STATUS_SUMMARY_CACHE_SECONDS 为 0 时不缓存，每次请求直接查询
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.data_version import get_data_versions
+from crud.patrol import get_status_summary
+from db.database import async_db_session
+from schemas.patrol import StatusSummaryResponse
+from utils.singleflight import SingleFlight
+
+_TABLES = ("drone", "patrol", "error")
+
+# (刷新时间, 数据版本号, 统计结果)
+_snapshot: Optional[Tuple[float, Tuple[Tuple[str, int], ...], StatusSummaryResponse]] = None
+_refresh_flight = SingleFlight()
+_background_refresh: Optional["asyncio.Task[Any]"] = None
+
+_stats = {
+    "hits": 0,
+    "stale_served": 0,
+    "refreshes": 0,
+    "invalidations": 0,
+    "failed_refreshes": 0,
+}
+
+
+async def _refresh() -> StatusSummaryResponse:
+    """使用独立的数据库会话查询统计并替换快照"""
+    global _snapshot
+    versions = get_data_versions(_TABLES)
+    async with async_db_session() as session:
+        summary = await get_status_summary(session)
+    _snapshot = (time.monotonic(), versions, summary)
+    _stats["refreshes"] += 1
+    return summary
+
+
+def _on_background_refresh_done(task: "asyncio.Task[Any]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        _stats["failed_refreshes"] += 1
+        logger.warning(f"后台刷新状态统计失败: {task.exception()}")
+
+
+async def get_status_summary_snapshot(db: AsyncSession) -> StatusSummaryResponse:
+    """
+    获取状态统计，优先返回快照
+
+    Args:
+        db: 请求的数据库会话，仅在不缓存时使用
+
+    Returns:
+        StatusSummaryResponse: 状态统计信息
+    """
+    global _background_refresh
+    window = settings.STATUS_SUMMARY_CACHE_SECONDS
+    if window <= 0:
+        return await get_status_summary(db)
+
+    snapshot = _snapshot
+    if snapshot is not None:
+        refreshed_at, versions, summary = snapshot
+        if versions != get_data_versions(_TABLES):
+            _stats["invalidations"] += 1
+        else:
+            age = time.monotonic() - refreshed_at
+            if age < window:
+                _stats["hits"] += 1
+                return summary
+            if age < 2 * window:
+                # 过期不久：返回旧快照，由后台任务刷新
+                _stats["stale_served"] += 1
+                if _background_refresh is None or _background_refresh.done():
+                    _background_refresh = asyncio.ensure_future(
+                        _refresh_flight.do("summary", _refresh)
+                    )
+                    _background_refresh.add_done_callback(_on_background_refresh_done)
+                return summary
+
+    return await _refresh_flight.do("summary", _refresh)
+
+
+def get_status_summary_stats() -> Dict[str, Any]:
+    """
+    获取状态统计快照的命中情况
+
+    Returns:
+        Dict[str, Any]: 快照窗口、快照年龄、命中数、后台刷新次数等
+    """
+    snapshot = _snapshot
+    return {
+        "window_seconds": settings.STATUS_SUMMARY_CACHE_SECONDS,
+        "snapshot_age_seconds": round(time.monotonic() - snapshot[0], 3) if snapshot else None,
+        **_stats,
+    }
@@ -1,42 +1,409 @@
-from datetime import datetime
+"""
+用户操作日志
+
+insert_user_log 只把日志条目放入内存队列，由后台任务批量写出，不阻塞请求。
+队列攒满 USER_LOG_BATCH_SIZE 条或每隔 USER_LOG_FLUSH_INTERVAL_SECONDS 写出一次。
+写入失败（如数据库短暂不可用）时批次放回队列，重试间隔按失败次数翻倍，不超过 USER_LOG_RETRY_MAX_SECONDS；
+队列超过 USER_LOG_MAX_QUEUE 时丢弃最新的日志。
+
+存储后端由 USER_LOG_BACKEND 决定:
+- file: 按用户分组追加到 user_log/{用户ID}_user_log.json（每行一条 JSON），写文件在线程池中执行；
+  后台任务未启动时（如脚本中调用）直接同步写入
+- database: 通过 COPY 批量写入按月分区的 jishe.user_log 表，支持跨用户、按时间范围查询
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime
 import os
 import json
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from loguru import logger
+from sqlalchemy import select, text
+from core.config import settings
+from db.database import async_db_session, async_engine
+from models.user_log import UserLog
 from schemas.user_log import LogResponse
+from utils.pagination import decode_cursor, encode_cursor, keyset_paginate, paginate_rows
 from file_read_backwards import FileReadBackwards
 from pydantic import BaseModel, Field
 USER_LOG_DIR = "user_log"
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# 等待写入的日志条目 (用户ID, 日志)
+_queue: List[tuple[str, Dict[str, str]]] = []
+# 正在写入文件的批次，读取日志时一并返回
+_in_flight: List[tuple[str, Dict[str, str]]] = []
+_wakeup = asyncio.Event()
+_writer_task: Optional["asyncio.Task[None]"] = None
+# 关闭时置位，后台任务写完当前批次后退出，不在写入中途取消（取消会中断 COPY）
+_stopping = False
+# 连续写入失败的次数，大于 0 时后台任务按倍数延长重试间隔
+_consecutive_failures = 0
+
+_stats = {
+    "enqueued": 0,
+    "written": 0,
+    "dropped": 0,
+    "flushes": 0,
+    "failed_flushes": 0,
+}
+
+
+def _log_file(user_id: str) -> str:
+    return os.path.join(USER_LOG_DIR, f"{user_id}_user_log.json")
+
+
+def _write_entries(entries: List[tuple[str, Dict[str, str]]]) -> None:
+    """按用户分组，每个用户的日志文件只打开一次"""
+    grouped: Dict[str, List[str]] = defaultdict(list)
+    for user_id, log_entry in entries:
+        grouped[user_id].append(json.dumps(log_entry, ensure_ascii=False) + "\n")
 
-def insert_user_log(user_id: str, activity_type: str, status: str):
     os.makedirs(USER_LOG_DIR, exist_ok=True)
-    log_file = os.path.join(USER_LOG_DIR, f"{user_id}_user_log.json")
+    for user_id, lines in grouped.items():
+        with open(_log_file(user_id), 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+# 已确认存在的月分区
+_partitions: set[date] = set()
+
 
+async def ensure_user_log_partitions(months: Iterable[date]) -> None:
+    """
+    按需创建 jishe.user_log 的月分区
+
+    创建失败（如默认分区中已有该月数据）时只记录日志，数据继续写入默认分区
+
+    Args:
+        months: 需要的月份（任意日期，按所在月份处理）
+    """
+    missing = sorted({_month_start(month) for month in months} - _partitions)
+    if not missing:
+        return
+    async with async_engine.connect() as conn:
+        for month in missing:
+            try:
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS jishe.user_log_p{month:%Y%m} "
+                    f"PARTITION OF jishe.user_log "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+                ))
+                await conn.commit()
+                _partitions.add(month)
+            except Exception as e:
+                await conn.rollback()
+                logger.warning(f"创建用户日志分区 {month:%Y%m} 失败，日志将写入默认分区: {e}")
+                _partitions.add(month)
+
+
+async def copy_user_logs(records: Sequence[Tuple[int, datetime, str, str]]) -> int:
+    """
+    通过 COPY 批量写入用户日志
+
+    Args:
+        records: (用户ID, 时间, 活动类型, 操作状态) 列表
+
+    Returns:
+        int: 写入的条数
+    """
+    if not records:
+        return 0
+    await ensure_user_log_partitions(record[1] for record in records)
+    async with async_engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            "user_log",
+            records=records,
+            columns=["user_id", "time", "action", "status"],
+            schema_name="jishe",
+        )
+    return len(records)
+
+
+def to_user_log_record(user_id: str, log_entry: Dict[str, str]) -> Tuple[int, datetime, str, str]:
+    """将日志条目转换为 jishe.user_log 的一行"""
+    return (
+        int(user_id),
+        datetime.strptime(log_entry["time"], LOG_TIME_FORMAT),
+        log_entry["action"][:64],
+        log_entry["status"][:32],
+    )
+
+
+async def _write_batch(entries: List[tuple[str, Dict[str, str]]]) -> None:
+    """将一批日志写入当前配置的存储后端"""
+    if settings.USER_LOG_BACKEND == "database":
+        await copy_user_logs([to_user_log_record(user_id, log_entry) for user_id, log_entry in entries])
+    else:
+        await asyncio.to_thread(_write_entries, entries)
+
+
+def insert_user_log(user_id: str, activity_type: str, status: str):
     log_entry = {
-        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "time": datetime.now().strftime(LOG_TIME_FORMAT),
         "action": activity_type,
         "status": status
     }
 
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+    if _writer_task is None and settings.USER_LOG_BACKEND != "database":
+        _write_entries([(str(user_id), log_entry)])
+        return
 
+    if len(_queue) >= settings.USER_LOG_MAX_QUEUE:
+        # 队列已满说明磁盘写入跟不上，丢弃新条目而不是阻塞请求
+        _stats["dropped"] += 1
+        if _stats["dropped"] % 1000 == 1:
+            logger.warning(f"用户日志队列已满，已丢弃 {_stats['dropped']} 条日志")
+        return
 
-def get_user_logs(user_id: str, count: int) -> List[LogResponse]:
-    log_file = os.path.join(USER_LOG_DIR, f"{user_id}_user_log.json")
-    if not os.path.exists(log_file):
-        print("No such file or directory")
-        return []
+    _queue.append((str(user_id), log_entry))
+    _stats["enqueued"] += 1
+    # 写入失败后由后台任务按退避间隔重试，不因队列攒满而提前唤醒
+    if len(_queue) >= settings.USER_LOG_BATCH_SIZE and not _consecutive_failures:
+        _wakeup.set()
 
-    logs = []
-    with FileReadBackwards(log_file, encoding="utf-8") as frb:
-        for line in frb:
-            try:
-                log = json.loads(line)
-                logs.append(LogResponse(**log))
-                if len(logs) >= count:
-                    break
-            except json.JSONDecodeError:
-                continue
-
-    return logs
\ No newline at end of file
+
+def _requeue(batch: List[tuple[str, Dict[str, str]]]) -> None:
+    """将写入失败的批次放回队列头部，超出 USER_LOG_MAX_QUEUE 时丢弃最新的日志"""
+    _queue[:0] = batch
+    overflow = len(_queue) - settings.USER_LOG_MAX_QUEUE
+    if overflow > 0:
+        del _queue[-overflow:]
+        _stats["dropped"] += overflow
+        logger.warning(f"用户日志队列已满，丢弃 {overflow} 条最新的日志")
+
+
+def _retry_delay() -> float:
+    """连续写入失败时的重试间隔：写入间隔按失败次数翻倍，不超过 USER_LOG_RETRY_MAX_SECONDS"""
+    interval = settings.USER_LOG_FLUSH_INTERVAL_SECONDS * 2 ** min(_consecutive_failures, 16)
+    return min(interval, settings.USER_LOG_RETRY_MAX_SECONDS)
+
+
+async def flush_user_logs() -> int:
+    """
+    将队列中的日志写入当前配置的存储后端（文件或数据库）
+
+    写入失败或被取消时日志放回队列头部，等待下一次写入
+
+    Returns:
+        int: 写入的日志条数
+    """
+    global _consecutive_failures
+    if not _queue or _in_flight:
+        return 0
+    batch = _queue[:]
+    _queue.clear()
+    _in_flight.extend(batch)
+    try:
+        await _write_batch(batch)
+    except asyncio.CancelledError:
+        # 被取消时放回队列，由之后的写入重试
+        _queue[:0] = batch
+        raise
+    except Exception as e:
+        _requeue(batch)
+        _consecutive_failures += 1
+        _stats["failed_flushes"] += 1
+        logger.error(f"写入用户日志失败，{len(batch)} 条日志将在 {_retry_delay():.1f} 秒后重试: {e}")
+        return 0
+    finally:
+        _in_flight.clear()
+    _consecutive_failures = 0
+    _stats["written"] += len(batch)
+    _stats["flushes"] += 1
+    return len(batch)
+
+
+async def _writer_loop() -> None:
+    """
+    后台写入任务：定时或队列攒满时写出日志，写入失败后按退避间隔重试，
+    关闭时由 stop_user_log_writer 写出剩余日志
+    """
+    while not _stopping:
+        timeout = _retry_delay() if _consecutive_failures else settings.USER_LOG_FLUSH_INTERVAL_SECONDS
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        if _stopping:
+            return
+        await flush_user_logs()
+
+
+def start_user_log_writer() -> None:
+    """启动后台写入任务"""
+    global _writer_task, _stopping
+    if _writer_task is None:
+        _stopping = False
+        _writer_task = asyncio.create_task(_writer_loop())
+
+
+async def stop_user_log_writer() -> None:
+    """停止后台写入任务（等待正在写入的批次完成），并写出队列中剩余的日志"""
+    global _writer_task, _stopping
+    if _writer_task is None:
+        return
+    _stopping = True
+    _wakeup.set()
+    await _writer_task
+    _writer_task = None
+    await flush_user_logs()
+    if _queue:
+        _stats["dropped"] += len(_queue)
+        logger.error(f"关闭时未能写入 {len(_queue)} 条用户日志")
+        _queue.clear()
+
+
+def get_user_log_stats() -> Dict[str, Any]:
+    """
+    获取用户日志写入统计
+
+    Returns:
+        Dict[str, Any]: 队列长度、已写入与丢弃的条数等
+    """
+    return {
+        "queue_depth": len(_queue),
+        "in_flight": len(_in_flight),
+        "max_queue": settings.USER_LOG_MAX_QUEUE,
+        "consecutive_failures": _consecutive_failures,
+        "writer_running": _writer_task is not None and not _writer_task.done(),
+        **_stats,
+    }
+
+
+def _matches(
+    log_entry: Dict[str, str],
+    action: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> bool:
+    if action and log_entry.get("action") != action:
+        return False
+    if start_time or end_time:
+        log_time = datetime.strptime(log_entry["time"], LOG_TIME_FORMAT)
+        if start_time and log_time < start_time:
+            return False
+        if end_time and log_time >= end_time:
+            return False
+    return True
+
+
+async def _query_database_logs(
+    user_id: str,
+    count: int,
+    cursor: Optional[str],
+    action: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> Tuple[List[LogResponse], Optional[str]]:
+    """按 (time, id) 倒序的键集分页查询数据库中的日志"""
+    stmt = select(UserLog).where(UserLog.user_id == int(user_id))
+    if action:
+        stmt = stmt.where(UserLog.action == action)
+    if start_time:
+        stmt = stmt.where(UserLog.time >= start_time)
+    if end_time:
+        stmt = stmt.where(UserLog.time < end_time)
+    after = decode_cursor(cursor, 2) if cursor else None
+    if after and not (isinstance(after[0], datetime) and isinstance(after[1], int)):
+        raise ValueError("无效的分页游标")
+    stmt = keyset_paginate(stmt, [UserLog.time, UserLog.id], after, count, descending=True)
+
+    async with async_db_session() as session:
+        rows = (await session.scalars(stmt)).all()
+    rows, next_cursor = paginate_rows(rows, count, lambda row: [row.time, row.id])
+    logs = [
+        LogResponse(time=row.time.strftime(LOG_TIME_FORMAT), action=row.action, status=row.status)
+        for row in rows
+    ]
+    return logs, next_cursor
+
+
+def _query_file_logs(
+    user_id: str,
+    pending: List[Dict[str, str]],
+    count: int,
+    offset: int,
+    action: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> Tuple[List[LogResponse], bool]:
+    """从新到旧扫描日志文件，跳过前 offset 条匹配的日志，返回最多 count 条及是否还有更多"""
+    def _entries():
+        yield from pending
+        log_file = _log_file(user_id)
+        if not os.path.exists(log_file):
+            return
+        with FileReadBackwards(log_file, encoding="utf-8") as frb:
+            for line in frb:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    logs: List[LogResponse] = []
+    skipped = 0
+    for log_entry in _entries():
+        # 文件按时间顺序追加，早于起始时间即可停止扫描
+        if start_time and log_entry.get("time", "") < start_time.strftime(LOG_TIME_FORMAT):
+            break
+        if not _matches(log_entry, action, start_time, end_time):
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        if len(logs) >= count:
+            return logs, True
+        logs.append(LogResponse(**log_entry))
+    return logs, False
+
+
+async def query_user_logs(
+    user_id: str,
+    count: int,
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+) -> Tuple[List[LogResponse], Optional[str]]:
+    """
+    从新到旧分页查询用户日志
+
+    Args:
+        user_id: 用户ID
+        count: 每页条数
+        cursor: 上一页返回的游标，为空时从最新的日志开始
+        action: 只返回指定活动类型的日志
+        start_time: 起始时间（包含）
+        end_time: 结束时间（不包含）
+
+    Returns:
+        Tuple[List[LogResponse], Optional[str]]: 本页日志与下一页的游标，没有更多日志时游标为空
+
+    Raises:
+        ValueError: 游标无效
+    """
+    if settings.USER_LOG_BACKEND == "database":
+        return await _query_database_logs(user_id, count, cursor, action, start_time, end_time)
+
+    offset = decode_cursor(cursor, 1)[0] if cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("无效的分页游标")
+    # 尚未写入文件的日志比文件中的更新，先从新到旧返回
+    pending = [log_entry for uid, log_entry in reversed(_in_flight + _queue) if uid == str(user_id)]
+    logs, has_more = await asyncio.to_thread(
+        _query_file_logs, user_id, pending, count, offset, action, start_time, end_time
+    )
+    next_cursor = encode_cursor([offset + len(logs)]) if has_more else None
+    return logs, next_cursor
@@ -1,4 +1,7 @@
+import csv
+import io
 from typing import Dict, List
+from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
@@ -8,6 +11,7 @@ from models.goods import Goods
 from models.stock import Stock
 from crud.goods import get_all_goods
 from crud.stock import get_stocks_by_warehouse
+from schemas.stock import StockBulkLine
 
 
 async def get_warehouse_stock_statistics(db: AsyncSession, warehouse_id: int) -> Dict[str, List]:
@@ -49,4 +53,50 @@ async def get_warehouse_stock_statistics(db: AsyncSession, warehouse_id: int) ->
         raise
     except Exception as e:
         logger.error(f"处理仓库库存统计数据失败: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+
+STOCK_BULK_CSV_COLUMNS = ("warehouse_id", "goods_id", "goods_name", "delta")
+
+
+def parse_stock_bulk_csv(content: bytes) -> List[StockBulkLine]:
+    """
+    解析批量入库的 CSV 文件
+
+    首行为表头，需包含 warehouse_id、delta 以及 goods_id / goods_name 中的至少一列，
+    goods_id 为空的行按 goods_name 匹配货物。支持带 BOM 的 UTF-8 编码（Excel 导出）
+
+    Args:
+        content: CSV 文件内容
+
+    Returns:
+        List[StockBulkLine]: 入库明细
+
+    Raises:
+        ValueError: 编码、表头或某一行的内容无效（错误信息包含行号）
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("CSV 文件需使用 UTF-8 编码")
+
+    reader = csv.DictReader(io.StringIO(text))
+    header = {name.strip() for name in reader.fieldnames or []}
+    if not {"warehouse_id", "delta"} <= header or not header & {"goods_id", "goods_name"}:
+        raise ValueError(f"CSV 表头需包含 warehouse_id、delta 以及 goods_id 或 goods_name，可用列: {', '.join(STOCK_BULK_CSV_COLUMNS)}")
+
+    lines = []
+    for row in reader:
+        values = {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and key.strip() in STOCK_BULK_CSV_COLUMNS and value and value.strip()
+        }
+        if not values:
+            continue
+        try:
+            lines.append(StockBulkLine(**values))
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc'])) or '行'}: {err['msg']}" for err in e.errors())
+            raise ValueError(f"第 {reader.line_num} 行无效: {errors}")
+    return lines
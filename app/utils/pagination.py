@@ -0,0 +1,189 @@
+"""
+游标分页工具
+
+列表接口按固定的排序键（最后一列为唯一ID）做键集分页：下一页的条件是
+(排序键, ID) 严格小于/大于上一页最后一行，借助索引直接定位，耗时不随页数增长。
+
+游标是排序键取值的 JSON 经 base64url 编码后的不透明字符串，客户端原样回传即可。
+列表类响应体保持不变，下一页的游标通过响应头 X-Next-Cursor 返回，没有更多数据时不返回该响应头。
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+
+from core.config import settings
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或与排序键不匹配"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    将排序键取值编码为游标
+
+    Args:
+        values: 上一页最后一行的排序键取值
+
+    Returns:
+        str: 不透明的游标字符串
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: Optional[int] = None) -> List[Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: 游标字符串
+        size: 期望的排序键个数，为空时不校验
+
+    Returns:
+        List[Any]: 排序键取值
+
+    Raises:
+        InvalidCursorError: 游标无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or (size is not None and len(values) != size):
+            raise ValueError(values)
+        return [_decode_value(value) for value in values]
+    except (ValueError, TypeError):
+        raise InvalidCursorError("无效的分页游标")
+
+
+def keyset_paginate(
+    stmt: Select,
+    order_by: Sequence[Any],
+    after: Optional[Sequence[Any]],
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """
+    为查询加上键集分页条件、排序与条数限制
+
+    多取一行用于判断是否还有下一页，配合 paginate_rows 使用
+
+    Args:
+        stmt: 原始查询
+        order_by: 排序列，最后一列必须唯一（通常为主键）
+        after: 上一页最后一行的排序键取值（由游标解析得到），为空时从第一页开始
+        limit: 每页条数
+        descending: 是否倒序
+
+    Returns:
+        Select: 分页后的查询
+    """
+    if after:
+        key = tuple_(*order_by)
+        stmt = stmt.where(key < tuple(after) if descending else key > tuple(after))
+    return stmt.order_by(
+        *(column.desc() if descending else column.asc() for column in order_by)
+    ).limit(limit + 1)
+
+
+def paginate_rows(
+    rows: Sequence[T],
+    limit: int,
+    key: Callable[[T], Sequence[Any]],
+) -> Tuple[List[T], Optional[str]]:
+    """
+    截取一页数据并生成下一页的游标
+
+    Args:
+        rows: 按 keyset_paginate 查询得到的行（最多 limit + 1 行）
+        limit: 每页条数
+        key: 从行中取出排序键取值的函数，顺序与 order_by 一致
+
+    Returns:
+        Tuple[List[T], Optional[str]]: 本页数据与下一页游标，没有更多数据时游标为空
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+class PageParams:
+    """
+    分页查询参数依赖
+
+    - cursor: 上一页响应头 X-Next-Cursor 中的游标
+    - limit: 每页条数
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 中的游标"),
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+            description="每页条数",
+        ),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+    def after(self, size: int) -> Optional[List[Any]]:
+        """
+        解析游标中的排序键取值
+
+        Args:
+            size: 排序键个数
+
+        Returns:
+            Optional[List[Any]]: 排序键取值，未传游标时为空
+
+        Raises:
+            HTTPException: 游标无效时返回 400
+        """
+        if not self.cursor:
+            return None
+        try:
+            return decode_cursor(self.cursor, size)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """有下一页时将游标写入响应头"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
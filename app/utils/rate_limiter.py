@@ -0,0 +1,71 @@
+"""
+异步限流工具
+
+基于令牌桶限制对外部API的调用速率，超出速率的调用会排队等待而不是失败
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class AsyncRateLimiter:
+    """
+    令牌桶限流器
+
+    - 令牌以 rate 个/秒的速度补充，桶容量为 burst
+    - acquire 在没有令牌时休眠到下一个令牌可用，等待者按到达顺序获得令牌
+    - 仅在单个事件循环内使用
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒允许的调用数
+            burst: 允许的突发调用数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """获取一个令牌，必要时等待"""
+        if self.rate <= 0:
+            self.acquired += 1
+            return
+
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.throttled += 1
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            self.acquired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 包含速率、已发放令牌数、被限流次数和累计等待时间
+        """
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
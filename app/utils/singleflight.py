@@ -0,0 +1,60 @@
+"""
+请求合并（single-flight）工具
+
+同一个键的多个并发调用只执行一次底层协程，其余调用等待并共享同一个结果，
+用于避免缓存未命中时对相同地址等资源发起重复的外部请求。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    按键合并并发中的相同调用
+
+    - 第一个调用者创建任务并执行，后续调用者等待同一个任务
+    - 任务完成（成功或异常）后立即移除，下一次调用会重新执行
+    - 某个等待者被取消不会影响正在执行的任务
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入一个以 key 标识的调用
+
+        Args:
+            key: 调用标识，相同键的并发调用会被合并
+            func: 无参协程函数，只在没有同键任务时被调用
+
+        Returns:
+            T: 协程的返回值
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 包含调用数、被合并的调用数和进行中的任务数
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,18 @@
+--
+-- 地理编码缓存表
+-- 开启 GEOCODE_CACHE_PERSIST 后，高德地理编码结果会持久化到此表，进程重启后仍可命中
+--
+
+CREATE TABLE IF NOT EXISTS jishe.geocode_cache (
+    cache_key character varying(512) NOT NULL,
+    address character varying(255) NOT NULL,
+    city character varying(64),
+    longitude double precision NOT NULL,
+    latitude double precision NOT NULL,
+    updated_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT geocode_cache_pkey PRIMARY KEY (cache_key)
+);
+
+COMMENT ON TABLE jishe.geocode_cache IS '地理编码缓存表';
+COMMENT ON COLUMN jishe.geocode_cache.cache_key IS '规范化后的 地址|城市';
+COMMENT ON COLUMN jishe.geocode_cache.updated_at IS '最近一次更新时间';
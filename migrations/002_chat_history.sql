@@ -0,0 +1,22 @@
+--
+-- 聊天记录表
+-- 开启 CHAT_HISTORY_PERSIST 后，智能助手的对话会批量写入此表；
+-- 任意进程为用户创建会话时从此表恢复最近的对话，重启或多进程部署时对话历史保持一致
+--
+
+CREATE TABLE IF NOT EXISTS jishe.chat_history (
+    id bigserial NOT NULL,
+    user_id integer NOT NULL,
+    role character varying(16) NOT NULL,
+    content text NOT NULL,
+    created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT chat_history_pkey PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_chat_history_user_id_id ON jishe.chat_history (user_id, id DESC);
+
+COMMENT ON TABLE jishe.chat_history IS '聊天记录表';
+COMMENT ON COLUMN jishe.chat_history.user_id IS '用户ID';
+COMMENT ON COLUMN jishe.chat_history.role IS '消息角色: user / assistant';
+COMMENT ON COLUMN jishe.chat_history.content IS '消息内容';
+COMMENT ON COLUMN jishe.chat_history.created_at IS '消息时间';
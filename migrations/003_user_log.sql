@@ -0,0 +1,25 @@
+--
+-- 用户操作日志表
+-- USER_LOG_BACKEND=database 时，用户操作日志批量写入此表（按月分区），替代 user_log/ 目录下的按用户 JSON 文件
+-- 月分区由应用在写入前按需创建 (jishe.user_log_pYYYYMM)；落在已有分区之外的数据写入默认分区
+-- 已有的日志文件可通过 python -m scripts.migrate_user_logs 导入
+--
+
+CREATE TABLE IF NOT EXISTS jishe.user_log (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    user_id integer NOT NULL,
+    time timestamp without time zone NOT NULL,
+    action character varying(64) NOT NULL,
+    status character varying(32) NOT NULL,
+    CONSTRAINT user_log_pkey PRIMARY KEY (user_id, time, id)
+) PARTITION BY RANGE (time);
+
+CREATE INDEX IF NOT EXISTS ix_user_log_time ON jishe.user_log (time);
+
+CREATE TABLE IF NOT EXISTS jishe.user_log_default PARTITION OF jishe.user_log DEFAULT;
+
+COMMENT ON TABLE jishe.user_log IS '用户操作日志表（按月分区）';
+COMMENT ON COLUMN jishe.user_log.user_id IS '用户ID';
+COMMENT ON COLUMN jishe.user_log.time IS '操作时间';
+COMMENT ON COLUMN jishe.user_log.action IS '活动类型';
+COMMENT ON COLUMN jishe.user_log.status IS '操作状态';
@@ -0,0 +1,11 @@
+--
+-- 每架无人机最新巡查记录索引
+-- 道路状况接口按无人机逐个取 update_time 最新的一条巡查记录（LATERAL ... ORDER BY update_time DESC LIMIT 1），
+-- 借助此索引每架无人机只需一次索引探测，耗时与无人机数量成正比，不随巡查历史增长
+-- 大表上建议改用 CREATE INDEX CONCURRENTLY 在线创建（不能放在事务中执行）
+--
+
+CREATE INDEX IF NOT EXISTS ix_patrol_drone_id_update_time
+    ON jishe.patrol (drone_id, update_time DESC, id DESC);
+
+ANALYZE jishe.patrol;
@@ -0,0 +1,51 @@
+--
+-- 常用查询的二级索引与库存唯一约束
+-- init.sql 中除主键外只有 ix_user_email，以下索引对应 CRUD 层的高频过滤、连接与排序条件：
+-- - stock (warehouse_id, goods_id) 唯一：check_stock_exists 假定每个仓库的每种商品只有一条库存记录，
+--   同时覆盖按仓库查询库存
+-- - stock (goods_id)：按商品汇总库存、删除商品时的级联删除
+-- - error (user_id, error_id)：按用户分页查询问题记录、删除用户时的清理
+-- - error (error_found_time DESC, error_id DESC)：问题列表按发现时间倒序的游标分页
+-- - error (states)：按处理状态统计问题数量
+-- - goods (goods_name)：创建库存时按商品名称查重
+-- - user (username)：登录与按用户名查询
+-- - user_role (role_id)：user_id 已是主键前缀，补充按角色查询用户、删除角色时的级联删除
+-- patrol (drone_id, update_time DESC, id DESC) 已在 004_patrol_latest_index.sql 中创建
+--
+-- 大表上建议改用 CREATE INDEX CONCURRENTLY 逐条在线创建（不能放在事务中执行）
+-- 可用 python -m scripts.explain_queries 检查各查询是否仍有顺序扫描
+--
+
+-- 已存在重复库存记录时终止，需先人工合并（保留一条并累加 all_count）后再执行
+DO $$
+DECLARE
+    duplicates integer;
+BEGIN
+    SELECT count(*) INTO duplicates FROM (
+        SELECT 1 FROM jishe.stock GROUP BY warehouse_id, goods_id HAVING count(*) > 1
+    ) d;
+    IF duplicates > 0 THEN
+        RAISE EXCEPTION 'jishe.stock 中有 % 组重复的 (warehouse_id, goods_id)，请先合并后再添加唯一约束', duplicates;
+    END IF;
+END $$;
+
+ALTER TABLE jishe.stock DROP CONSTRAINT IF EXISTS uq_stock_warehouse_id_goods_id;
+ALTER TABLE jishe.stock ADD CONSTRAINT uq_stock_warehouse_id_goods_id UNIQUE (warehouse_id, goods_id);
+
+CREATE INDEX IF NOT EXISTS ix_stock_goods_id ON jishe.stock (goods_id);
+
+CREATE INDEX IF NOT EXISTS ix_error_user_id_error_id ON jishe.error (user_id, error_id);
+CREATE INDEX IF NOT EXISTS ix_error_found_time_error_id ON jishe.error (error_found_time DESC, error_id DESC);
+CREATE INDEX IF NOT EXISTS ix_error_states ON jishe.error (states);
+
+CREATE INDEX IF NOT EXISTS ix_goods_goods_name ON jishe.goods (goods_name);
+
+CREATE INDEX IF NOT EXISTS ix_user_username ON jishe."user" (username);
+
+CREATE INDEX IF NOT EXISTS ix_user_role_role_id ON jishe.user_role (role_id);
+
+ANALYZE jishe.stock;
+ANALYZE jishe.error;
+ANALYZE jishe.goods;
+ANALYZE jishe."user";
+ANALYZE jishe.user_role;
@@ -0,0 +1,70 @@
+--
+-- IoTDA 设备镜像表
+-- 开启 IOTDA_MIRROR_ENABLED 后，后台任务将华为云 IoTDA 的设备、设备组与设备组成员同步到以下表中，
+-- 设备列表、设备详情与设备组查询接口直接读取镜像，不再每次分页调用华为云
+-- instance_id 为 IoTDA 实例ID，默认实例为空字符串
+--
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_device (
+    instance_id character varying(64) NOT NULL,
+    device_id character varying(128) NOT NULL,
+    app_id character varying(64),
+    app_name character varying(64),
+    node_id character varying(64),
+    gateway_id character varying(128),
+    device_name character varying(256),
+    node_type character varying(16),
+    description text,
+    fw_version character varying(256),
+    sw_version character varying(256),
+    device_sdk_version character varying(256),
+    product_id character varying(64),
+    product_name character varying(128),
+    status character varying(16),
+    tags jsonb,
+    synced_at timestamp without time zone NOT NULL,
+    CONSTRAINT iotda_device_pkey PRIMARY KEY (instance_id, device_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_iotda_device_device_name ON jishe.iotda_device (instance_id, device_name);
+CREATE INDEX IF NOT EXISTS ix_iotda_device_product_id ON jishe.iotda_device (instance_id, product_id);
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_device_group (
+    instance_id character varying(64) NOT NULL,
+    group_id character varying(36) NOT NULL,
+    name character varying(64),
+    description text,
+    super_group_id character varying(36),
+    group_type character varying(16),
+    synced_at timestamp without time zone NOT NULL,
+    CONSTRAINT iotda_device_group_pkey PRIMARY KEY (instance_id, group_id)
+);
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_device_group_member (
+    instance_id character varying(64) NOT NULL,
+    group_id character varying(36) NOT NULL,
+    device_id character varying(128) NOT NULL,
+    synced_at timestamp without time zone NOT NULL,
+    CONSTRAINT iotda_device_group_member_pkey PRIMARY KEY (instance_id, group_id, device_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_iotda_device_group_member_device_id ON jishe.iotda_device_group_member (instance_id, device_id);
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_sync_state (
+    instance_id character varying(64) NOT NULL,
+    device_watermark character varying(16),
+    last_incremental_sync_at timestamp without time zone,
+    last_full_sync_at timestamp without time zone,
+    lease_until timestamp without time zone,
+    last_error text,
+    CONSTRAINT iotda_sync_state_pkey PRIMARY KEY (instance_id)
+);
+
+COMMENT ON TABLE jishe.iotda_device IS 'IoTDA 设备镜像表';
+COMMENT ON TABLE jishe.iotda_device_group IS 'IoTDA 设备组镜像表';
+COMMENT ON TABLE jishe.iotda_device_group_member IS 'IoTDA 设备组成员镜像表';
+COMMENT ON TABLE jishe.iotda_sync_state IS 'IoTDA 设备镜像同步状态表';
+COMMENT ON COLUMN jishe.iotda_device.synced_at IS '最近一次从 IoTDA 同步的时间';
+COMMENT ON COLUMN jishe.iotda_sync_state.device_watermark IS '增量同步的设备注册时间下限 (yyyyMMdd''T''HHmmss''Z'')';
+COMMENT ON COLUMN jishe.iotda_sync_state.last_full_sync_at IS '最近一次全量同步完成时间';
+COMMENT ON COLUMN jishe.iotda_sync_state.lease_until IS '同步租约到期时间';
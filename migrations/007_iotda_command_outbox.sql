@@ -0,0 +1,46 @@
+--
+-- IoTDA 批量设备命令发件箱
+-- 开启 IOTDA_COMMAND_OUTBOX_ENABLED 后，批量命令接口把每台设备的命令写入 jishe.iotda_command，
+-- 由后台任务限速下发并记录 IoTDA 返回的命令状态；应用重启后未完成的命令继续下发
+--
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_command_batch (
+    id bigserial NOT NULL,
+    instance_id character varying(64),
+    command jsonb NOT NULL,
+    total integer NOT NULL,
+    created_by integer,
+    created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT iotda_command_batch_pkey PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS jishe.iotda_command (
+    id bigserial NOT NULL,
+    batch_id bigint NOT NULL,
+    device_id character varying(128) NOT NULL,
+    status character varying(16) DEFAULT 'pending' NOT NULL,
+    attempts integer DEFAULT 0 NOT NULL,
+    next_attempt_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    command_id character varying(64),
+    command_status character varying(16),
+    error text,
+    created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT iotda_command_pkey PRIMARY KEY (id),
+    CONSTRAINT uq_iotda_command_batch_id_device_id UNIQUE (batch_id, device_id),
+    CONSTRAINT iotda_command_batch_id_fkey FOREIGN KEY (batch_id)
+        REFERENCES jishe.iotda_command_batch (id) ON DELETE CASCADE
+);
+
+-- 待下发与认领到期的命令
+CREATE INDEX IF NOT EXISTS ix_iotda_command_next_attempt_at ON jishe.iotda_command (next_attempt_at)
+    WHERE status IN ('pending', 'sending');
+-- 等待刷新 IoTDA 状态的命令
+CREATE INDEX IF NOT EXISTS ix_iotda_command_status_refresh ON jishe.iotda_command (updated_at)
+    WHERE status = 'sent' AND command_status IN ('PENDING', 'SENT', 'DELIVERED');
+
+COMMENT ON TABLE jishe.iotda_command_batch IS 'IoTDA 批量设备命令';
+COMMENT ON TABLE jishe.iotda_command IS 'IoTDA 设备命令发件箱';
+COMMENT ON COLUMN jishe.iotda_command.status IS '发件箱状态: pending / sending / sent / failed';
+COMMENT ON COLUMN jishe.iotda_command.next_attempt_at IS 'pending 时为下次尝试时间，sending 时为认领到期时间';
+COMMENT ON COLUMN jishe.iotda_command.command_status IS 'IoTDA 命令状态';
@@ -0,0 +1,10 @@
+--
+-- 用户角色变更时间
+-- AUTH_ROLE_SOURCE=token 且启用 AUTH_ROLE_REVOCATION_ENABLED 时，签发时间不晚于 roles_changed_at 的令牌
+-- 其 roles 声明不再被信任；保存在数据库中，多个 worker 进程共享
+-- 应用的 User 模型包含此列，升级应用前需先执行
+--
+
+ALTER TABLE jishe."user" ADD COLUMN IF NOT EXISTS roles_changed_at timestamp with time zone;
+
+COMMENT ON COLUMN jishe."user".roles_changed_at IS '最近一次角色变更时间';
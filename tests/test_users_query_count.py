@@ -0,0 +1,107 @@
+"""
+用户列表与用户详情的SQL条数回归测试
+
+list_users_with_roles 与 get_user_with_roles 通过聚合查询一次取出用户及其角色，
+执行的语句数不应随每页用户数或角色数增长（避免退化为逐个用户查询角色的 N+1）。
+
+测试数据写在连接级事务中，结束时整体回滚，不会留在数据库里；数据库不可用时跳过。
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.user import get_user_with_roles, list_users_with_roles
+from db.database import async_engine
+from models.role import Role
+from models.user import User
+from models.user_role import UserRole
+
+PAGE_SIZES = (1, 100)
+
+
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    """统计上下文内通过 async_engine 执行的语句"""
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest_asyncio.fixture
+async def db():
+    """在回滚的事务中提供会话"""
+    try:
+        conn = await async_engine.connect()
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"数据库不可用: {e}")
+    trans = await conn.begin()
+    session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+        await trans.rollback()
+        await conn.close()
+        await async_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def user_ids(db: AsyncSession) -> List[int]:
+    """
+    插入 max(PAGE_SIZES) + 1 个用户（分页查询会多取一条），每个用户关联全部角色
+
+    Returns:
+        List[int]: 按ID升序的用户ID
+    """
+    role_ids = list((await db.execute(select(Role.role_id))).scalars())
+    if not role_ids:
+        pytest.skip("数据库中没有角色数据")
+    result = await db.execute(
+        insert(User)
+        .values(
+            [
+                {"username": f"query_count_{i}", "password": "x", "email": "default@example.com", "avatar_url": ""}
+                for i in range(max(PAGE_SIZES) + 1)
+            ]
+        )
+        .returning(User.id)
+    )
+    ids = sorted(result.scalars())
+    await db.execute(insert(UserRole), [{"user_id": uid, "role_id": rid} for uid in ids for rid in role_ids])
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_list_users_with_roles_query_count_is_constant(db: AsyncSession, user_ids: List[int]):
+    counts = {}
+    for size in PAGE_SIZES:
+        with count_statements() as statements:
+            users = await list_users_with_roles(db, limit=size, after=(user_ids[0] - 1,))
+        assert [user["id"] for user in users] == user_ids[: size + 1]
+        assert all(user["role_ids"] for user in users)
+        counts[size] = len(statements)
+
+    assert counts[1] == counts[100] == 1, counts
+
+
+@pytest.mark.asyncio
+async def test_get_user_with_roles_query_count_is_constant(db: AsyncSession, user_ids: List[int]):
+    for size in PAGE_SIZES:
+        for user_id in user_ids[:size]:
+            with count_statements() as statements:
+                user = await get_user_with_roles(db, user_id)
+            assert user is not None and user["role_ids"]
+            assert len(statements) == 1, (size, user_id, statements)